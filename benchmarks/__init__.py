@@ -0,0 +1,4 @@
+"""Micro-benchmarks of brickops hot paths, with stored baselines.
+
+Run with `python -m benchmarks.naming`, see benchmarks/harness.py.
+"""
@@ -0,0 +1,196 @@
+"""Measuring ops/sec and allocations per call, and comparing with a baseline.
+
+Each case is a function called without arguments. Its speed is the best of
+a few timed rounds, each long enough to make timer resolution negligible.
+Its allocations are the peak memory traced by tracemalloc during a single
+call, as a median over several calls, which is stable between runs, unlike
+the speed, which depends on the machine.
+
+To compare speeds measured on different machines, or while the machine is
+busy, the timed rounds of each case alternate with rounds of a fixed
+reference workload, and its speed relative to the reference is its score.
+
+Baselines are JSON files with the results per case. A case regresses when
+its score is lower than in the baseline by more than the speed tolerance, or
+it allocates more by more than the allocation tolerance.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+DEFAULT_MIN_TIME = 0.05
+DEFAULT_ROUNDS = 5
+ALLOC_CALLS = 15
+SPEED_TOLERANCE = 0.3
+ALLOC_TOLERANCE = 0.10
+
+
+@dataclass(frozen=True)
+class Result:
+    """Speed and allocations of a benchmark case."""
+
+    name: str
+    ops_per_sec: float
+    alloc_bytes: int
+    # ops_per_sec relative to the reference workload of the same run
+    score: float
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    *,
+    min_time: float = DEFAULT_MIN_TIME,
+    rounds: int = DEFAULT_ROUNDS,
+) -> Result:
+    """Measure calls of func per second, and bytes allocated per call."""
+    func()  # Warm up, e.g. compiling regexes, outside of the measurements
+    number = _calibrate(func, min_time)
+    reference_number = _reference_number(min_time)
+    best = reference_best = math.inf
+    for _ in range(rounds):
+        best = min(best, _timed(func, number))
+        reference_best = min(
+            reference_best, _timed(reference_workload, reference_number)
+        )
+    ops_per_sec = number / best
+    return Result(
+        name=name,
+        ops_per_sec=ops_per_sec,
+        alloc_bytes=_alloc_bytes(func),
+        score=ops_per_sec / (reference_number / reference_best),
+    )
+
+
+def run(
+    cases: Iterable[tuple[str, Callable[[], object]]],
+    *,
+    min_time: float = DEFAULT_MIN_TIME,
+    rounds: int = DEFAULT_ROUNDS,
+) -> list[Result]:
+    """Measure each (name, func) case."""
+    return [
+        measure(name, func, min_time=min_time, rounds=rounds) for name, func in cases
+    ]
+
+
+def reference_workload() -> str:
+    """Parsing and formatting a name, like the code benchmarked, without brickops."""
+    match = _REFERENCE_PATTERN.search(_REFERENCE_PATH)
+    parts = dict(zip(("domain", "project", "flow"), match.groups() if match else ()))
+    return "{domain}_{project}_{flow}".format(**parts)
+
+
+def regressions(
+    results: Iterable[Result],
+    baseline: dict[str, Result],
+    *,
+    speed_tolerance: float = SPEED_TOLERANCE,
+    alloc_tolerance: float = ALLOC_TOLERANCE,
+) -> list[str]:
+    """Descriptions of the cases that regressed from the baseline.
+
+    Cases without a baseline are not compared."""
+    found = []
+    for result in results:
+        if (base := baseline.get(result.name)) is None:
+            continue
+        if result.score < base.score * (1 - speed_tolerance):
+            found.append(
+                f"{result.name}: score {result.score:.4f}, baseline {base.score:.4f}"
+            )
+        if result.alloc_bytes > base.alloc_bytes * (1 + alloc_tolerance):
+            found.append(
+                f"{result.name}: {result.alloc_bytes:,} bytes per call, "
+                f"baseline {base.alloc_bytes:,}"
+            )
+    return found
+
+
+def report(results: Iterable[Result], baseline: dict[str, Result]) -> str:
+    """Table of the results, with the change from the baseline."""
+    lines = [f"{'case':<48} {'ops/sec':>12} {'change':>8} {'bytes/call':>11}"]
+    for result in results:
+        change = ""
+        if base := baseline.get(result.name):
+            change = f"{result.score / base.score - 1:+.0%}"
+        lines.append(
+            f"{result.name:<48} {result.ops_per_sec:>12,.0f} {change:>8} "
+            f"{result.alloc_bytes:>11,}"
+        )
+    return "\n".join(lines)
+
+
+def load_baseline(path: str | Path) -> dict[str, Result]:
+    """Results by case name, empty if there is no baseline yet."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    cases = json.loads(path.read_text())["cases"]
+    return {name: Result(name=name, **values) for name, values in cases.items()}
+
+
+def save_baseline(path: str | Path, results: Iterable[Result]) -> None:
+    """Save results as the baseline, with the Python version they were run with."""
+    cases = {}
+    for result in results:
+        values = asdict(result)
+        del values["name"]
+        values["ops_per_sec"] = round(values["ops_per_sec"])
+        values["score"] = float(f"{values['score']:.4g}")
+        cases[result.name] = values
+    baseline = {"python": platform.python_version(), "cases": cases}
+    Path(path).write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+_REFERENCE_PATH = "/Repos/user/repo/domains/transport/projects/taxinyc/flows/revenue"
+_REFERENCE_PATTERN = re.compile(r"/domains/([^/]+)/projects/([^/]+)/flows/([^/]+)")
+
+
+def _calibrate(func: Callable[[], object], min_time: float) -> int:
+    number = 1
+    while (elapsed := _timed(func, number)) < min_time:
+        # Aim a bit over min_time, at most growing tenfold per try
+        growth = 10 if elapsed <= 0 else min(10, 1.2 * min_time / elapsed)
+        number = max(number + 1, int(number * growth))
+    return number
+
+
+@cache
+def _reference_number(min_time: float) -> int:
+    return _calibrate(reference_workload, min_time)
+
+
+def _timed(func: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def _alloc_bytes(func: Callable[[], object]) -> int:
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_CALLS):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return int(statistics.median(peaks))
@@ -0,0 +1,238 @@
+"""Benchmarks of the naming functions, run in notebooks and DLT graph construction.
+
+Every case runs with a stub DbContext, with the git info in the widgets as in
+a deployed task, so nothing is looked up over the network. The cases cover:
+
+- the default naming config, and a custom config with all mesh levels,
+- notebook paths with and without an org level,
+- cold calls, which find and read .brickopscfg/config.yml, and warm calls,
+  with the config already read,
+- names resolved at deploy time, and read from the widgets.
+
+Usage:
+
+    python -m benchmarks.naming            # compare with benchmarks/baseline.json
+    python -m benchmarks.naming --update   # store the results as the baseline
+    python -m benchmarks.naming -k tablename --min-time 0.5
+
+Exits with 1 when a case regressed from the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+from benchmarks import harness
+from brickops.databricks.context import DbContext
+from brickops.datamesh.cfg import read_config
+from brickops.datamesh.naming import catname_from_path, dbname, tablename
+from brickops.datamesh.parsepath.extractname import (
+    PipelineContext,
+    extract_name_from_path,
+)
+from brickops.datamesh.parsepath.parse import parsepath
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Sequence
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+PATHS = {
+    "no-org": "/Repos/test@vlfk.no/dp-notebooks/domains/transport/projects/taxinyc/flows/prep/revenue/revenue",
+    "org": "/Repos/test@vlfk.no/dp-notebooks/orgs/acme/domains/transport/projects/taxinyc/flows/prep/revenue/revenue",
+}
+CONFIGS: dict[str, dict[str, Any] | None] = {
+    "default": None,
+    "custom": {
+        "naming": {
+            "job": {
+                "prod": "{org}_{domain}_{project}_{flow}_{env}",
+                "other": "{org}_{domain}_{project}_{flow}_{env}_{username}_{gitbranch}_{gitshortref}",
+            },
+            "catalog": {
+                "prod": "{org}_{domain}_{project}_{env}",
+                "other": "{org}_{domain}_{project}_{env}",
+            },
+            "db": {
+                "prod": "{db}",
+                "other": "{env}_{username}_{gitbranch}_{gitshortref}_{activity}_{flowtype}_{flow}_{db}",
+            },
+        }
+    },
+}
+WIDGETS = {
+    "git_url": "https://github.com/acme/dp-notebooks",
+    "git_branch": "feature/faster-names",
+    "git_commit": "0e7768a7c1d2e3f4",
+    "pipeline_env": "dev",
+}
+PIPELINE_CONTEXT = PipelineContext(
+    username="TestUser",
+    gitbranch="featurefasternames",
+    gitshortref="0e7768a7",
+    env="dev",
+)
+
+Case = tuple[str, "Callable[[], object]"]
+
+
+def stub_context(path: str, **widgets: str) -> DbContext:
+    """Context of a deployed task, with no API url, so nothing is looked up."""
+    return DbContext(
+        api_url="",
+        api_token="",
+        notebook_path=path,
+        username="TestUser@vlfk.no",
+        widgets={**WIDGETS, **widgets},
+    )
+
+
+@contextmanager
+def naming_config(config: dict[str, Any] | None) -> Iterator[None]:
+    """Run in a folder with config as .brickopscfg/config.yml, or with no config."""
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory() as folder:
+        if config is not None:
+            config_dir = Path(folder) / ".brickopscfg"
+            config_dir.mkdir()
+            (config_dir / "config.yml").write_text(yaml.safe_dump(config))
+        os.chdir(folder)
+        read_config.cache_clear()
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+            read_config.cache_clear()
+
+
+def parse_cases() -> list[Case]:
+    """Parsing paths, which does not depend on the config."""
+    return [
+        (f"parsepath/{path_name}", partial(parsepath, path))
+        for path_name, path in PATHS.items()
+    ]
+
+
+def config_cases(config_name: str) -> list[Case]:
+    """Naming functions for each path, with the config read cold and warm."""
+    cases = []
+    for path_name, path in PATHS.items():
+        db_context = stub_context(path)
+        funcs: dict[str, Callable[[], object]] = {
+            "extract_name_from_path": partial(
+                extract_name_from_path,
+                path=path,
+                resource="db",
+                resource_name="revenue",
+                pipeline_context=PIPELINE_CONTEXT,
+            ),
+            "catname_from_path": partial(catname_from_path, db_context=db_context),
+            "dbname": partial(
+                dbname, db="revenue", cat="transport", db_context=db_context
+            ),
+            "tablename": partial(
+                tablename, tbl="trips", db="revenue", db_context=db_context
+            ),
+        }
+        for func_name, func in funcs.items():
+            prefix = f"{config_name}/{path_name}"
+            cases.append((f"{prefix}/warm/{func_name}", func))
+            cases.append((f"{prefix}/cold/{func_name}", _cold(func)))
+    return cases
+
+
+def preresolved_cases() -> list[Case]:
+    """Names resolved at deploy time, read from the widgets."""
+    db_context = stub_context(
+        PATHS["no-org"],
+        brickops_catalog="transport",
+        brickops_db_template="dev_TestUser_featurefasternames_0e7768a7_{db}",
+    )
+    return [
+        (
+            "preresolved/tablename",
+            partial(tablename, tbl="trips", db="revenue", db_context=db_context),
+        )
+    ]
+
+
+def run_all(
+    selected: Callable[[str], bool] = lambda _: True,
+    *,
+    min_time: float = harness.DEFAULT_MIN_TIME,
+    rounds: int = harness.DEFAULT_ROUNDS,
+) -> list[harness.Result]:
+    """Run the selected cases, each config in its own folder."""
+    results = []
+    with naming_config(None):
+        cases = parse_cases() + preresolved_cases()
+        results += harness.run(
+            (case for case in cases if selected(case[0])),
+            min_time=min_time,
+            rounds=rounds,
+        )
+    for config_name, config in CONFIGS.items():
+        with naming_config(config):
+            results += harness.run(
+                (case for case in config_cases(config_name) if selected(case[0])),
+                min_time=min_time,
+                rounds=rounds,
+            )
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="keyword", default="", help="only matching cases")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="save as baseline")
+    parser.add_argument("--min-time", type=float, default=harness.DEFAULT_MIN_TIME)
+    parser.add_argument("--rounds", type=int, default=harness.DEFAULT_ROUNDS)
+    parser.add_argument(
+        "--speed-tolerance", type=float, default=harness.SPEED_TOLERANCE
+    )
+    parser.add_argument(
+        "--alloc-tolerance", type=float, default=harness.ALLOC_TOLERANCE
+    )
+    args = parser.parse_args(argv)
+
+    results = run_all(
+        lambda name: args.keyword in name, min_time=args.min_time, rounds=args.rounds
+    )
+    baseline = harness.load_baseline(args.baseline)
+    print(harness.report(results, baseline))
+    if args.update:
+        # Cases not run, e.g. with -k, keep their baseline
+        updated = baseline | {result.name: result for result in results}
+        harness.save_baseline(args.baseline, updated.values())
+        return 0
+    found = harness.regressions(
+        results,
+        baseline,
+        speed_tolerance=args.speed_tolerance,
+        alloc_tolerance=args.alloc_tolerance,
+    )
+    for regression in found:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if found else 0
+
+
+def _cold(func: Callable[[], object]) -> Callable[[], object]:
+    def cold() -> object:
+        read_config.cache_clear()
+        return func()
+
+    return cold
+
+
+if __name__ == "__main__":
+    sys.exit(main())
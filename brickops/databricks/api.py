@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import base64
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from typing import TYPE_CHECKING
 
 import requests
 from requests.exceptions import RequestException
 
+from brickops.databricks import inventory as inv
+from brickops.databricks.payload import Payload, request_body
+from brickops.tracing import bind_context, current_span, span
+
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable, Iterator
     from typing import Any, ParamSpec, TypeVar
 
+    from brickops.databricks.inventory import Inventory
+
     Param = ParamSpec("Param")
     RetType = TypeVar("RetType")
 
@@ -17,6 +28,9 @@ from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# Error code of the Databricks APIs for a missing resource
+NOT_FOUND_ERROR = "RESOURCE_DOES_NOT_EXIST"
+
 
 # This provides a common error handling decorator for the API client methods.
 # The nested decorator pattern is used to allow the error_handling decorator to
@@ -29,63 +43,241 @@ def error_handling(
     ) -> Callable[Param, RetType]:
         @wraps(func)
         def wrapper(*args: Param.args, **kwargs: Param.kwargs) -> RetType:
-            try:
-                return func(*args, **kwargs)
-            except RequestException as err:
-                msg = f"Api error while making {method} call:"
-                if err.response is not None:
-                    msg += f" {err.response.text}"
-                logger.error(msg)
-
-                raise ApiClientError(message=msg) from err
+            stub = kwargs.get("stub", args[1] if len(args) > 1 else None)
+            with span(f"api.{method}", method=method, stub=stub):
+                try:
+                    return func(*args, **kwargs)
+                except RequestException as err:
+                    msg = f"Api error while making {method} call:"
+                    status_code = None
+                    if err.response is not None:
+                        msg += f" {err.response.text}"
+                        status_code = err.response.status_code
+                    logger.error(msg)
+
+                    raise ApiClientError(message=msg, status_code=status_code) from err
 
         return wrapper
 
     return decorator
 
 
+class RateLimiter:
+    """Spaces out requests evenly, to at most per_second, across threads."""
+
+    def __init__(self: RateLimiter, per_second: float) -> None:
+        self.interval = 1 / per_second
+        self.next_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self: RateLimiter) -> None:
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Clients of the same workspace share a connection pool and rate limiter
+_sessions: dict[str, requests.Session] = {}
+_rate_limiters: dict[str, RateLimiter] = {}
+_sessions_lock = threading.Lock()
+
+
+def set_rate_limit(host: str, per_second: float | None) -> None:
+    """Limit the requests per second to a workspace, for all clients of it."""
+    if per_second:
+        _rate_limiters[host] = RateLimiter(per_second)
+    else:
+        _rate_limiters.pop(host, None)
+
+
+def _session(host: str) -> requests.Session:
+    with _sessions_lock:
+        if host not in _sessions:
+            _sessions[host] = requests.Session()
+        return _sessions[host]
+
+
 class ApiClientError(Exception):
-    """Custom exception for API client errors."""
+    """Custom exception for API client errors.
 
-    def __init__(self: ApiClientError, message: str) -> None:
+    status_code is the HTTP status of the response, None if there was none."""
+
+    def __init__(
+        self: ApiClientError, message: str, status_code: int | None = None
+    ) -> None:
         self.message = message
+        self.status_code = status_code
         super().__init__(self.message)
 
+    @property
+    def not_found(self: ApiClientError) -> bool:
+        """Whether the error is that the requested resource does not exist."""
+        return (
+            self.status_code == HTTPStatus.NOT_FOUND or NOT_FOUND_ERROR in self.message
+        )
+
 
 class ApiClient:
     """Wrapper for databricks API."""
 
-    def __init__(self: ApiClient, host: str, token: str) -> None:
+    def __init__(
+        self: ApiClient, host: str, token: str, inventory: Inventory | None = None
+    ) -> None:
+        """Listings are read through the inventory, if given or configured."""
         self.api_host = host
         self.api_token = token
         self.headers = {
             "Authorization": f"Bearer {self.api_token}",
             "Content-Type": "application/json",
         }
+        self.inventory = inventory or inv.default_inventory()
+        self.session = _session(host)
 
     def get_job_by_name(self: ApiClient, job_name: str) -> dict[str, Any] | None:
+        """The listed job with the name, without tasks, see get_job() for those."""
+        if self.inventory and (
+            cached := self.inventory.lookup(
+                self.api_host, inv.JOB, job_name, self.iter_jobs
+            )
+        ):
+            return cached[0]
+        # Not in the inventory, or created since it was refreshed
         result = self.get("jobs/list", params={"name": job_name})
         jobs: list[dict[str, Any]] = result.get("jobs", [])
         if jobs is None or len(jobs) == 0:
             return None
         return jobs[0]
 
-    def get_jobs(self: ApiClient) -> list[dict[str, Any]]:
-        result = self.get("jobs/list", version="2.2")
-        job_list: list[dict[str, Any]] = result.get("jobs", [])
-        while next_page_token := result.get("next_page_token"):
+    def get_jobs(self: ApiClient, expand_tasks: bool = False) -> list[dict[str, Any]]:
+        """List all jobs. Tasks and job clusters are only included with expand_tasks."""
+        if expand_tasks:
+            return list(self.iter_jobs(expand_tasks=True))
+        return self._listing(inv.JOB, self.iter_jobs)
+
+    def iter_jobs(
+        self: ApiClient, expand_tasks: bool = False
+    ) -> Iterator[dict[str, Any]]:
+        """Stream all jobs, fetching pages as they are consumed.
+
+        With expand_tasks, jobs with tasks truncated in the listing are fetched
+        with get_job(), so each job has all of its tasks and job clusters."""
+        params = {"expand_tasks": str(expand_tasks).lower()}
+        while True:
+            result = self.get("jobs/list", version="2.2", params=params)
+            for job in result.get("jobs", []):
+                if expand_tasks and job.get("has_more"):
+                    job = self.get_job(job["job_id"])  # noqa: PLW2901
+                yield job
+            if not (next_page_token := result.get("next_page_token")):
+                return
+            params = params | {"page_token": next_page_token}
+
+    def get_job(self: ApiClient, job_id: int) -> dict[str, Any]:
+        """Get a job, with all of its settings.
+
+        Jobs API 2.2 pages the tasks, job clusters, environments and parameters
+        of jobs with more than 100 of them, so all pages are merged."""
+        pages = self._job_pages(job_id)
+        try:
+            job = next(pages)
+        except ApiClientError as err:
+            if err.not_found:
+                self._forget(inv.JOB, str(job_id))
+            raise
+        settings = job.setdefault("settings", {})
+        for page in pages:
+            for key in ("tasks", "job_clusters", "environments", "parameters"):
+                if key in page.get("settings", {}):
+                    settings.setdefault(key, []).extend(page["settings"][key])
+        job.pop("next_page_token", None)
+        return job
+
+    def iter_job_tasks(self: ApiClient, job_id: int) -> Iterator[dict[str, Any]]:
+        """Stream the tasks of a job, fetching pages as they are consumed."""
+        for page in self._job_pages(job_id):
+            yield from page.get("settings", {}).get("tasks", [])
+
+    def _job_pages(self: ApiClient, job_id: int) -> Iterator[dict[str, Any]]:
+        params = {"job_id": str(job_id)}
+        while True:
+            result = self.get("jobs/get", version="2.2", params=params)
+            yield result
+            if not (next_page_token := result.get("next_page_token")):
+                return
+            params = params | {"page_token": next_page_token}
+
+    def list_job_runs(
+        self: ApiClient,
+        job_id: int,
+        *,
+        completed_only: bool = True,
+        expand_tasks: bool = True,
+        limit: int = 25,
+        start_time_from: int | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Stream runs of a job, newest first, fetching pages as they are consumed.
+
+        With start_time_from, in epoch milliseconds, only runs started since."""
+        params = {
+            "job_id": str(job_id),
+            "completed_only": str(completed_only).lower(),
+            "expand_tasks": str(expand_tasks).lower(),
+            "limit": str(limit),
+        }
+        if start_time_from is not None:
+            params["start_time_from"] = str(start_time_from)
+        while True:
+            result = self.get("jobs/runs/list", version="2.2", params=params)
+            yield from result.get("runs", [])
+            if not (next_page_token := result.get("next_page_token")):
+                return
+            params = params | {"page_token": next_page_token}
+
+    def get_run(
+        self: ApiClient,
+        run_id: str,
+        all_tasks: bool = True,
+        include_history: bool = False,
+    ) -> dict[str, Any]:
+        """Get a run, including all tasks.
+
+        Jobs API 2.2 pages the tasks of large runs, so all pages are merged,
+        unless all_tasks is False, e.g. when only polling the state of the run.
+        With include_history, the repair history of the run is included."""
+        params = {"run_id": str(run_id)}
+        if include_history:
+            params["include_history"] = "true"
+        run = self.get("jobs/runs/get", version="2.2", params=params)
+        result = run
+        while all_tasks and (next_page_token := result.get("next_page_token")):
             result = self.get(
-                "jobs/list", version="2.2", params={"page_token": next_page_token}
+                "jobs/runs/get",
+                version="2.2",
+                params=params | {"page_token": next_page_token},
             )
-            job_list.extend(result.get("jobs", []))
-        return job_list
+            for key in ("tasks", "job_clusters"):
+                if key in result:
+                    run.setdefault(key, []).extend(result[key])
+        run.pop("next_page_token", None)
+        return run
 
-    def delete_job(self: ApiClient, job_id: str) -> dict[str, Any]:
-        return self.post("jobs/delete", payload={"job_id": job_id})
+    def delete_job(self: ApiClient, job_id: int) -> dict[str, Any]:
+        result = self.post("jobs/delete", payload={"job_id": job_id})
+        self._forget(inv.JOB, str(job_id))
+        return result
 
     def get_pipeline_by_name(
         self: ApiClient, pipeline_name: str
     ) -> dict[str, Any] | None:
+        if self.inventory and (
+            cached := self.inventory.lookup(
+                self.api_host, inv.PIPELINE, pipeline_name, self.iter_pipelines
+            )
+        ):
+            return cached[0]
         result = self.get(
             "pipelines",
             version="2.0",
@@ -99,24 +291,46 @@ class ApiClient:
         return pipelines[0]
 
     def get_pipelines(self: ApiClient) -> list[dict[str, Any]]:
+        return self._listing(inv.PIPELINE, self.iter_pipelines)
+
+    def iter_pipelines(self: ApiClient) -> Iterator[dict[str, Any]]:
+        """Stream all pipelines, fetching pages as they are consumed."""
         result = self.get("pipelines", version="2.0")
-        pipeline_list: list[dict[str, Any]] = result.get("statuses", [])
+        yield from result.get("statuses", [])
         while next_page_token := result.get("next_page_token"):
             result = self.get(
                 "pipelines/list", version="2.0", params={"page_token": next_page_token}
             )
-            pipeline_list.extend(result.get("statuses", []))
-        return pipeline_list
+            yield from result.get("statuses", [])
+
+    def get_pipeline(self: ApiClient, pipeline_id: str) -> dict[str, Any]:
+        try:
+            return self.get(f"pipelines/{pipeline_id}", version="2.0")
+        except ApiClientError as err:
+            if err.not_found:
+                self._forget(inv.PIPELINE, pipeline_id)
+            raise
 
     def delete_pipeline(self: ApiClient, pipeline_id: str) -> dict[str, Any]:
-        return self.post("pipelines/delete", payload={"pipeline_id": pipeline_id})
+        result = self.post("pipelines/delete", payload={"pipeline_id": pipeline_id})
+        self._forget(inv.PIPELINE, pipeline_id)
+        return result
 
     def get_catalogs(self: ApiClient) -> list[dict[str, Any]]:
-        return self.get("unity-catalog/catalogs").get("catalogs", [])  # type: ignore [no-any-return]
+        return self._listing(
+            inv.CATALOG,
+            lambda: self.get("unity-catalog/catalogs").get("catalogs", []),
+        )
 
     def get_schemas(self: ApiClient, catalog: str) -> list[dict[str, Any]]:
-        return self.get("unity-catalog/schemas", params={"catalog_name": catalog}).get(  # type: ignore [no-any-return]
-            "schemas", []
+        return self._listing(
+            inv.SCHEMA, lambda: self.iter_schemas(catalog), scope=catalog
+        )
+
+    def iter_schemas(self: ApiClient, catalog: str) -> Iterator[dict[str, Any]]:
+        """Stream the schemas of a catalog, fetching pages as they are consumed."""
+        return self._iter_paged(
+            "unity-catalog/schemas", "schemas", {"catalog_name": catalog}
         )
 
     def get_volumes(
@@ -128,19 +342,78 @@ class ApiClient:
         ).get("volumes", [])
 
     def delete_schema(self: ApiClient, full_name: str) -> dict[str, Any]:
-        return self.delete(f"unity-catalog/schemas/{full_name}")
+        result = self.delete(f"unity-catalog/schemas/{full_name}")
+        self._forget(inv.SCHEMA, full_name, scope=full_name.split(".")[0])
+        self._invalidate(inv.TABLE, scope=full_name)
+        return result
 
     def delete_volume(self: ApiClient, full_name: str) -> dict[str, Any]:
         return self.delete(f"unity-catalog/volumes/{full_name}")
 
-    def get_tables(self: ApiClient, catalog: str, schema: str) -> list[dict[str, Any]]:
-        return self.get(  # type: ignore [no-any-return]
-            "unity-catalog/tables",
-            params={"catalog_name": catalog, "schema_name": schema},
-        ).get("tables", [])
+    def get_tables(
+        self: ApiClient,
+        catalog: str,
+        schema: str,
+        *,
+        omit_columns: bool = False,
+        omit_properties: bool = False,
+        max_results: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """List tables in a schema, all pages.
+
+        When only names and types are needed, omit columns and properties
+        to keep responses small. Only such slim listings are kept in the
+        inventory."""
+        params = {"catalog_name": catalog, "schema_name": schema}
+        if omit_columns:
+            params["omit_columns"] = "true"
+        if omit_properties:
+            params["omit_properties"] = "true"
+        if omit_columns and omit_properties:
+            return self._listing(
+                inv.TABLE,
+                lambda: self._paged(
+                    "unity-catalog/tables", "tables", params, max_results
+                ),
+                scope=f"{catalog}.{schema}",
+            )
+        return self._paged("unity-catalog/tables", "tables", params, max_results)
+
+    def get_table_summaries(
+        self: ApiClient,
+        catalog: str,
+        *,
+        schema_name_pattern: str | None = None,
+        table_name_pattern: str | None = None,
+        max_results: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """List full name and type of tables across the schemas of a catalog.
+
+        Patterns use SQL LIKE syntax, e.g. "dev_%"."""
+        params = {"catalog_name": catalog}
+        if schema_name_pattern:
+            params["schema_name_pattern"] = schema_name_pattern
+        if table_name_pattern:
+            params["table_name_pattern"] = table_name_pattern
+        return self._paged(
+            "unity-catalog/table-summaries", "tables", params, max_results
+        )
 
     def get_dashboards(self: ApiClient) -> list[dict[str, Any]]:
-        return self.get("lakeview/dashboards", version="2.0").get("dashboards", [])  # type: ignore [no-any-return]
+        result = self.get("lakeview/dashboards", version="2.0")
+        dashboards: list[dict[str, Any]] = result.get("dashboards", [])
+        while next_page_token := result.get("next_page_token"):
+            result = self.get(
+                "lakeview/dashboards",
+                version="2.0",
+                params={"page_token": next_page_token},
+            )
+            dashboards.extend(result.get("dashboards", []))
+        return dashboards
+
+    def delete_dashboard(self: ApiClient, dashboard_id: str) -> dict[str, Any]:
+        """Move a dashboard to trash."""
+        return self.delete(f"lakeview/dashboards/{dashboard_id}", version="2.0")
 
     def patch_permissions(
         self: ApiClient,
@@ -171,34 +444,157 @@ class ApiClient:
     def get_pipeline_permissions(self: ApiClient, pipeline_id: str) -> dict[str, Any]:
         return self.get(stub=f"permissions/pipelines/{pipeline_id}", version="2.0")
 
+    def update_permissions(
+        self: ApiClient,
+        request_object_type: str,
+        request_object_id: str,
+        access_control_list: list[dict[str, str]],
+    ) -> dict[str, Any]:
+        """Add or change permissions of several principals, keeping the others."""
+        return self.patch(
+            f"permissions/{request_object_type}/{request_object_id}",
+            {"access_control_list": access_control_list},
+            version="2.0",
+        )
+
+    def set_permissions(
+        self: ApiClient,
+        request_object_type: str,
+        request_object_id: str,
+        access_control_list: list[dict[str, str]],
+    ) -> dict[str, Any]:
+        """Replace all direct permissions of an object."""
+        return self.put(
+            f"permissions/{request_object_type}/{request_object_id}",
+            {"access_control_list": access_control_list},
+            version="2.0",
+        )
+
     def delete_table(self: ApiClient, full_name: str) -> dict[str, Any]:
-        return self.delete(f"unity-catalog/tables/{full_name}")
+        result = self.delete(f"unity-catalog/tables/{full_name}")
+        self._forget(inv.TABLE, full_name, scope=full_name.rsplit(".", 1)[0])
+        return result
 
     def run_job_now(self: ApiClient, job_id: str) -> dict[str, Any]:
         logger.info(f"Running job: {job_id}")
         return self.post("jobs/run-now", payload={"job_id": job_id})
 
-    def run_pipeline_now(self: ApiClient, pipeline_id: str) -> dict[str, Any]:
+    def submit_run(self: ApiClient, run_config: dict[str, Any]) -> dict[str, Any]:
+        """Submit a one-time run, which does not create a job."""
+        logger.info(f"Submitting run: {run_config.get('run_name')}")
+        return self.post("jobs/runs/submit", payload=run_config)
+
+    def repair_run(
+        self: ApiClient,
+        run_id: str,
+        *,
+        rerun_tasks: list[str] | None = None,
+        rerun_all_failed_tasks: bool = False,
+        rerun_dependent_tasks: bool = True,
+        latest_repair_id: str | None = None,
+    ) -> dict[str, Any]:
+        """Re-run tasks of a finished run, in the same run."""
+        logger.info(f"Repairing run: {run_id}")
+        payload: dict[str, Any] = {"run_id": run_id}
+        if rerun_all_failed_tasks:
+            payload["rerun_all_failed_tasks"] = True
+        else:
+            payload["rerun_tasks"] = rerun_tasks or []
+            payload["rerun_dependent_tasks"] = rerun_dependent_tasks
+        if latest_repair_id:
+            payload["latest_repair_id"] = latest_repair_id
+        return self.post("jobs/runs/repair", version="2.2", payload=payload)
+
+    def run_pipeline_now(
+        self: ApiClient,
+        pipeline_id: str,
+        *,
+        full_refresh: bool = False,
+        refresh_selection: list[str] | None = None,
+        full_refresh_selection: list[str] | None = None,
+        validate_only: bool = False,
+    ) -> dict[str, Any]:
+        """Start a pipeline update, incremental unless full_refresh is set."""
         logger.info(f"Running pipeline: {pipeline_id}")
+        payload: dict[str, Any] = {
+            "full_refresh": full_refresh,
+            "validate_only": validate_only,
+        }
+        if refresh_selection:
+            payload["refresh_selection"] = refresh_selection
+        if full_refresh_selection:
+            payload["full_refresh_selection"] = full_refresh_selection
         return self.post(
             f"pipelines/{pipeline_id}/updates",
-            payload={"full_refresh": True},
+            payload=payload,
+            version="2.0",
+        )
+
+    def get_pipeline_update(
+        self: ApiClient, pipeline_id: str, update_id: str
+    ) -> dict[str, Any]:
+        return self.get(  # type: ignore [no-any-return]
+            f"pipelines/{pipeline_id}/updates/{update_id}", version="2.0"
+        ).get("update", {})
+
+    def first_pipeline_event(
+        self: ApiClient, pipeline_id: str
+    ) -> dict[str, Any] | None:
+        """Oldest event in the event log of a pipeline, None if it has none."""
+        events = self._iter_paged(
+            f"pipelines/{pipeline_id}/events",
+            "events",
+            {"order_by": "timestamp asc"},
+            max_results=1,
+            version="2.0",
+        )
+        return next(events, None)
+
+    def last_pipeline_update_event(
+        self: ApiClient, pipeline_id: str, update_id: str
+    ) -> dict[str, Any] | None:
+        """Latest event of a pipeline update, e.g. to tell when it finished.
+
+        Events are listed newest first, so only the pages up to the latest
+        event of the update are fetched."""
+        events = self._iter_paged(
+            f"pipelines/{pipeline_id}/events",
+            "events",
+            {"order_by": "timestamp desc"},
             version="2.0",
         )
+        return next(
+            (
+                event
+                for event in events
+                if event.get("origin", {}).get("update_id") == update_id
+            ),
+            None,
+        )
 
     def update_job(
-        self: ApiClient, *, job_id: str, job_name: str, job_config: dict[str, Any]
+        self: ApiClient,
+        *,
+        job_id: str,
+        job_name: str,
+        job_config: dict[str, Any] | Payload,
     ) -> dict[str, Any]:
         logger.info(f"Resetting job: {job_name}")
         data = {"job_id": job_id, "new_settings": job_config}
-        return self.post("jobs/reset", payload=data)
+        try:
+            return self.post("jobs/reset", payload=data)
+        except ApiClientError as err:
+            # Deleted since it was looked up, e.g. in the inventory
+            if err.not_found:
+                self._forget(inv.JOB, str(job_id))
+            raise
 
     def update_pipeline(
         self: ApiClient,
         *,
         pipeline_id: str,
         pipeline_name: str,
-        pipeline_config: dict[str, Any],
+        pipeline_config: dict[str, Any] | Payload,
     ) -> dict[str, Any]:
         logger.info(f"Resetting pipeline: {pipeline_name}")
         try:
@@ -210,52 +606,247 @@ class ApiClient:
                 "update_pipeline() ApiClientError:pipeline_config:"
                 + repr(pipeline_config)
             )
+            # Deleted since it was looked up, e.g. in the inventory
+            if e.not_found:
+                self._forget(inv.PIPELINE, pipeline_id)
             raise e
 
     def create_job(
-        self: ApiClient, job_name: str, job_config: dict[str, Any]
+        self: ApiClient, job_name: str, job_config: dict[str, Any] | Payload
     ) -> dict[str, Any]:
         logger.info(f"Creating job: {job_name}")
-        return self.post("jobs/create", payload=job_config)
+        result = self.post("jobs/create", payload=job_config)
+        if self.inventory:
+            settings = (
+                job_config.data if isinstance(job_config, Payload) else job_config
+            )
+            # As listed without expand_tasks
+            listed = {
+                key: value
+                for key, value in settings.items()
+                if key not in ("tasks", "job_clusters")
+            }
+            self._remember(inv.JOB, {"job_id": result["job_id"], "settings": listed})
+        return result
 
     def create_pipeline(
-        self: ApiClient, pipeline_name: str, pipeline_config: dict[str, Any]
+        self: ApiClient, pipeline_name: str, pipeline_config: dict[str, Any] | Payload
     ) -> dict[str, Any]:
         logger.info(f"Creating pipeline: {pipeline_name}")
         try:
-            return self.post("pipelines", payload=pipeline_config, version="2.0")
+            result = self.post("pipelines", payload=pipeline_config, version="2.0")
         except ApiClientError as e:
             logger.error(
                 "create_pipeline() ApiClientError:pipeline_config:"
                 + repr(pipeline_config)
             )
             raise e
+        if self.inventory:
+            self._remember(
+                inv.PIPELINE,
+                {"pipeline_id": result["pipeline_id"], "name": pipeline_name},
+            )
+        return result
 
     def get_clusters(self: ApiClient) -> list[dict[str, Any]]:
-        response = self.get("clusters/list")
-        return response["clusters"]  # type: ignore [no-any-return]
+        return self._listing(
+            inv.CLUSTER, lambda: self.get("clusters/list").get("clusters", [])
+        )
 
     def get_workspace_status(self: ApiClient, path: str) -> dict[str, Any]:
         return self.get("workspace/get-status", version="2.0", params={"path": path})
 
+    def list_workspace(self: ApiClient, path: str) -> list[dict[str, Any]]:
+        return self.get(  # type: ignore [no-any-return]
+            "workspace/list", version="2.0", params={"path": path}
+        ).get("objects", [])
+
+    def export_workspace(
+        self: ApiClient, path: str, export_format: str = "SOURCE"
+    ) -> bytes:
+        response = self.get(
+            "workspace/export",
+            version="2.0",
+            params={"path": path, "format": export_format},
+        )
+        return base64.b64decode(response.get("content", ""))
+
+    def import_workspace(
+        self: ApiClient,
+        path: str,
+        content: bytes,
+        *,
+        import_format: str = "SOURCE",
+        language: str | None = None,
+        overwrite: bool = True,
+    ) -> dict[str, Any]:
+        payload = {
+            "path": path,
+            "content": base64.b64encode(content).decode(),
+            "format": import_format,
+            "overwrite": overwrite,
+        }
+        if language:
+            payload["language"] = language
+        return self.post("workspace/import", version="2.0", payload=payload)
+
+    def mkdirs_workspace(self: ApiClient, path: str) -> dict[str, Any]:
+        return self.post("workspace/mkdirs", version="2.0", payload={"path": path})
+
+    def delete_workspace(
+        self: ApiClient, path: str, recursive: bool = False
+    ) -> dict[str, Any]:
+        return self.post(
+            "workspace/delete",
+            version="2.0",
+            payload={"path": path, "recursive": recursive},
+        )
+
+    def get_warehouses(self: ApiClient) -> list[dict[str, Any]]:
+        return self.get("sql/warehouses", version="2.0").get("warehouses", [])  # type: ignore [no-any-return]
+
+    def get_warehouse_by_name(self: ApiClient, name: str) -> dict[str, Any] | None:
+        for warehouse in self.get_warehouses():
+            if warehouse["name"] == name:
+                return warehouse
+        return None
+
+    def execute_statement(
+        self: ApiClient,
+        statement: str,
+        warehouse_id: str,
+        *,
+        catalog: str | None = None,
+        schema: str | None = None,
+        parameters: list[dict[str, Any]] | None = None,
+        wait_timeout: str = "10s",
+    ) -> dict[str, Any]:
+        """Submit a SQL statement, returning when finished or after wait_timeout.
+
+        If the statement is still running, poll it with get_statement()."""
+        payload: dict[str, Any] = {
+            "statement": statement,
+            "warehouse_id": warehouse_id,
+            "wait_timeout": wait_timeout,
+            "on_wait_timeout": "CONTINUE",
+            "disposition": "INLINE",
+            "format": "JSON_ARRAY",
+        }
+        if catalog:
+            payload["catalog"] = catalog
+        if schema:
+            payload["schema"] = schema
+        if parameters:
+            payload["parameters"] = parameters
+        return self.post("sql/statements", version="2.0", payload=payload)
+
+    def get_statement(self: ApiClient, statement_id: str) -> dict[str, Any]:
+        return self.get(f"sql/statements/{statement_id}", version="2.0")
+
+    def get_statement_result_chunk(
+        self: ApiClient, statement_id: str, chunk_index: int
+    ) -> dict[str, Any]:
+        return self.get(
+            f"sql/statements/{statement_id}/result/chunks/{chunk_index}",
+            version="2.0",
+        )
+
+    def cancel_statement(self: ApiClient, statement_id: str) -> dict[str, Any]:
+        return self.post(f"sql/statements/{statement_id}/cancel", version="2.0")
+
     def get_repo(self: ApiClient, repo_id: str) -> dict[str, Any]:
         return self.get(f"repos/{repo_id}", version="2.0")
 
     def get_repos(self: ApiClient) -> list[dict[str, Any]]:
-        repos_response = self.get(
-            "repos", version="2.0", params={"path_prefix": "/Repos"}
-        )
-        folders_response = self.get(
-            "repos", version="2.0", params={"path_prefix": "/Users"}
-        )
-        return repos_response.get("repos", []) + folders_response.get("repos", [])  # type: ignore [no-any-return]
+        return self._listing(inv.REPO, self._list_repos)
+
+    def _list_repos(self: ApiClient) -> list[dict[str, Any]]:
+        # Repos and git folders are listed concurrently, by separate calls
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    bind_context(self.get),
+                    "repos",
+                    version="2.0",
+                    params={"path_prefix": prefix},
+                )
+                for prefix in ("/Repos", "/Users")
+            ]
+            return [repo for f in futures for repo in f.result().get("repos", [])]
+
+    def _listing(
+        self: ApiClient,
+        kind: str,
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+        scope: str = "",
+    ) -> list[dict[str, Any]]:
+        """List objects through the inventory, if there is one."""
+        if not self.inventory:
+            return list(fetch())
+        return self.inventory.items(self.api_host, kind, fetch, scope=scope)
+
+    def _invalidate(self: ApiClient, kind: str, scope: str | None = None) -> None:
+        """Mark a listing stale, e.g. when the scope it is in was deleted."""
+        if self.inventory:
+            self.inventory.invalidate(self.api_host, kind, scope=scope)
+
+    def _remember(
+        self: ApiClient, kind: str, obj: dict[str, Any], scope: str = ""
+    ) -> None:
+        """Store a created object in the inventory, without listing them all.
+
+        A listing refreshed while the change is in flight can miss it, which is
+        why name lookups fall back to the API when not found in the inventory."""
+        if self.inventory:
+            self.inventory.put(self.api_host, kind, obj, scope=scope)
+
+    def _forget(self: ApiClient, kind: str, key: str, scope: str = "") -> None:
+        """Remove a deleted object from the inventory, without listing them all.
+
+        Also used when an object is found to be gone, as the inventory serves
+        a listing until max_age, even if objects were deleted elsewhere."""
+        if self.inventory:
+            self.inventory.remove(self.api_host, kind, key, scope=scope)
+
+    def _paged(
+        self: ApiClient,
+        stub: str,
+        key: str,
+        params: dict[str, str],
+        max_results: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Get all pages of a listing, with max_results items per page."""
+        return list(self._iter_paged(stub, key, params, max_results))
+
+    def _iter_paged(
+        self: ApiClient,
+        stub: str,
+        key: str,
+        params: dict[str, str],
+        max_results: int | None = None,
+        version: str = "2.1",
+    ) -> Iterator[dict[str, Any]]:
+        if max_results:
+            params = {**params, "max_results": str(max_results)}
+        result = self.get(stub, version=version, params=params)
+        yield from result.get(key, [])
+        while next_page_token := result.get("next_page_token"):
+            result = self.get(
+                stub, version=version, params={**params, "page_token": next_page_token}
+            )
+            yield from result.get(key, [])
 
     def unpack_response(self: ApiClient, response: requests.Response) -> dict[str, Any]:
+        current_span().set(status_code=response.status_code)
         response.raise_for_status()
         response_json = response.json()
         logger.debug(f"Api response: {response_json}")
         return response_json  # type: ignore [no-any-return]
 
+    def throttle(self: ApiClient) -> None:
+        if rate_limiter := _rate_limiters.get(self.api_host):
+            rate_limiter.wait()
+
     def build_url(self: ApiClient, stub: str, version: str = "2.1") -> str:
         return f"{self.api_host}/api/{version}/{stub}"
 
@@ -266,25 +857,28 @@ class ApiClient:
             return func()
         except RequestException as err:
             msg = f"Api error while making {method} call:"
+            status_code = None
             if err.response is not None:
                 msg += f" {err.response.text}"
+                status_code = err.response.status_code
             logger.error(msg)
 
-            raise ApiClientError(message=msg) from err
+            raise ApiClientError(message=msg, status_code=status_code) from err
 
     @error_handling("POST")
     def post(
         self: ApiClient,
         stub: str,
         version: str = "2.1",
-        payload: dict[str, Any] | None = None,
+        payload: dict[str, Any] | Payload | None = None,
     ) -> dict[str, Any]:
+        self.throttle()
         return self.unpack_response(
-            requests.post(
+            self.session.post(
                 url=self.build_url(stub, version),
                 headers=self.headers,
-                json=payload,
                 timeout=10,
+                **_body(payload),
             )
         )
 
@@ -294,8 +888,9 @@ class ApiClient:
         stub: str,
         version: str = "2.1",
     ) -> dict[str, Any]:
+        self.throttle()
         return self.unpack_response(
-            requests.delete(
+            self.session.delete(
                 self.build_url(stub, version),
                 headers=self.headers,
                 timeout=10,
@@ -309,8 +904,9 @@ class ApiClient:
         version: str = "2.1",
         params: dict[str, str] | None = None,
     ) -> dict[str, Any]:
+        self.throttle()
         return self.unpack_response(
-            requests.get(
+            self.session.get(
                 self.build_url(stub, version),
                 headers=self.headers,
                 params=params,
@@ -320,14 +916,18 @@ class ApiClient:
 
     @error_handling("PUT")
     def put(
-        self: ApiClient, stub: str, payload: dict[str, Any], version: str = "2.1"
+        self: ApiClient,
+        stub: str,
+        payload: dict[str, Any] | Payload,
+        version: str = "2.1",
     ) -> dict[str, Any]:
+        self.throttle()
         return self.unpack_response(
-            requests.put(
+            self.session.put(
                 url=self.build_url(stub, version),
                 headers=self.headers,
-                json=payload,
                 timeout=10,
+                **_body(payload),
             )
         )
 
@@ -335,11 +935,19 @@ class ApiClient:
     def patch(
         self: ApiClient, stub: str, payload: dict[str, Any], version: str = "2.1"
     ) -> dict[str, Any]:
+        self.throttle()
         return self.unpack_response(
-            requests.patch(
+            self.session.patch(
                 url=self.build_url(stub, version),
                 headers=self.headers,
                 json=payload,
                 timeout=10,
             )
         )
+
+
+def _body(payload: dict[str, Any] | Payload | None) -> dict[str, Any]:
+    """Request argument for the JSON body, reusing the bytes of payloads in it."""
+    if payload is not None and (body := request_body(payload)) is not None:
+        return {"data": body}
+    return {"json": payload}
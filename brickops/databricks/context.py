@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import inspect
+import json
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
@@ -9,6 +10,9 @@ if TYPE_CHECKING:
 
     from databricks.sdk.runtime.dbutils_stub import dbutils as dbutils_type
 
+# Pipeline configuration key with names and context resolved at deploy time
+PIPELINE_CONF_KEY = "brickops.names"
+
 
 def current_env(db_context: DbContext | None = None) -> str:
     """Get the current environment.
@@ -81,5 +85,21 @@ def _convert_to_data(dbutils: dbutils_type) -> DbContext:
         api_token=ctx.apiToken().get(),
         notebook_path=ctx.notebookPath().get(),
         username=str(ctx.userName().get()),
-        widgets=dbutils.widgets.getAll(),  # type: ignore [attr-defined]
+        widgets=_with_pipeline_conf(dbutils.widgets.getAll()),  # type: ignore [attr-defined]
     )
+
+
+def _with_pipeline_conf(widgets: dict[str, str]) -> dict[str, str]:
+    """Add values from the brickops pipeline configuration, if there are no widgets.
+
+    DLT pipelines have no widgets, so the deployed env, git info and names
+    are given in the pipeline configuration instead."""
+    if widgets:
+        return widgets
+    try:
+        conf = get_spark().conf.get(PIPELINE_CONF_KEY, None)
+    except RuntimeError:
+        return widgets
+    if not conf:
+        return widgets
+    return json.loads(conf) | widgets  # type: ignore [no-any-return]
@@ -0,0 +1,280 @@
+"""Local SQLite inventory of workspace objects.
+
+Looking up jobs, pipelines, clusters, repos or UC objects by name means
+listing them over REST. With an inventory, ApiClient reads listings through
+a SQLite file on disk, so repeated CLI and CI invocations start warm.
+
+Listings older than max_age seconds are refreshed. The list APIs have no
+change cursor, so a refresh lists all objects again, but only writes the
+objects that changed, detected by their updated_at timestamp where the API
+has one, otherwise by a hash of their content, and removes objects that are
+gone. Objects created or deleted through ApiClient are written as single
+rows, so they do not make the listing stale. Listings of UC objects are
+scoped, e.g. schemas per catalog.
+
+The file is opened in WAL mode, so several processes can read while one
+refreshes. The inventory is off unless the BRICKOPS_INVENTORY environment
+variable, or inventory.path in .brickopscfg/config.yml, names the file.
+max_age can be configured as inventory.max_age.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from brickops.datamesh.cfg import get_config
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "BRICKOPS_INVENTORY"
+DEFAULT_MAX_AGE = 300.0
+# Seconds to wait for another process holding the write lock
+LOCK_TIMEOUT = 30.0
+
+JOB = "job"
+PIPELINE = "pipeline"
+CLUSTER = "cluster"
+REPO = "repo"
+CATALOG = "catalog"
+SCHEMA = "schema"
+TABLE = "table"
+
+
+class Kind(NamedTuple):
+    """How to identify objects of a kind in a listing."""
+
+    key: Callable[[dict[str, Any]], str]
+    name: Callable[[dict[str, Any]], str]
+
+
+KINDS = {
+    JOB: Kind(lambda o: str(o["job_id"]), lambda o: o["settings"]["name"]),
+    PIPELINE: Kind(lambda o: o["pipeline_id"], lambda o: o.get("name", "")),
+    CLUSTER: Kind(lambda o: o["cluster_id"], lambda o: o.get("cluster_name", "")),
+    REPO: Kind(lambda o: str(o["id"]), lambda o: o.get("path", "")),
+    CATALOG: Kind(lambda o: o["name"], lambda o: o["name"]),
+    SCHEMA: Kind(lambda o: o["full_name"], lambda o: o["name"]),
+    TABLE: Kind(lambda o: o["full_name"], lambda o: o["name"]),
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS objects (
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (host, kind, scope, key)
+);
+CREATE INDEX IF NOT EXISTS objects_name ON objects (host, kind, name);
+CREATE TABLE IF NOT EXISTS listings (
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    refreshed REAL NOT NULL,
+    PRIMARY KEY (host, kind, scope)
+);
+"""
+
+
+class RefreshStats(NamedTuple):
+    """Changes written by a refresh."""
+
+    added: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
+class Inventory:
+    """SQLite store of workspace object listings, per workspace host."""
+
+    def __init__(self, path: str | Path, max_age: float = DEFAULT_MAX_AGE) -> None:
+        self.path = Path(path).expanduser()
+        self.max_age = max_age
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA_SQL)
+
+    def items(
+        self,
+        host: str,
+        kind: str,
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+        scope: str = "",
+    ) -> list[dict[str, Any]]:
+        """All objects of a kind, refreshed with fetch when stale."""
+        if self._is_stale(host, kind, scope):
+            self.refresh(host, kind, fetch, scope)
+        rows = self._connection().execute(
+            "SELECT data FROM objects WHERE host = ? AND kind = ? AND scope = ?"
+            " ORDER BY rowid",
+            (host, kind, scope),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def lookup(
+        self,
+        host: str,
+        kind: str,
+        name: str,
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+    ) -> list[dict[str, Any]]:
+        """Objects of a kind with the given name, in any scope."""
+        if self._is_stale(host, kind, ""):
+            self.refresh(host, kind, fetch)
+        rows = self._connection().execute(
+            "SELECT data FROM objects WHERE host = ? AND kind = ? AND name = ?"
+            " ORDER BY rowid",
+            (host, kind, name),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def refresh(
+        self,
+        host: str,
+        kind: str,
+        fetch: Callable[[], Iterable[dict[str, Any]]],
+        scope: str = "",
+    ) -> RefreshStats:
+        """Replace the listing with the result of fetch, writing only changes."""
+        spec = KINDS[kind]
+        # Fetch before taking the write lock, so other processes can keep writing
+        fetched = {spec.key(obj): obj for obj in fetch()}
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = dict(
+                conn.execute(
+                    "SELECT key, version FROM objects"
+                    " WHERE host = ? AND kind = ? AND scope = ?",
+                    (host, kind, scope),
+                ).fetchall()
+            )
+            added = updated = unchanged = 0
+            for key, obj in fetched.items():
+                version = _version(obj)
+                if stored.get(key) == version:
+                    unchanged += 1
+                    continue
+                if key in stored:
+                    updated += 1
+                else:
+                    added += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (host, kind, scope, key, spec.name(obj), version, json.dumps(obj)),
+                )
+            deleted = set(stored) - set(fetched)
+            conn.executemany(
+                "DELETE FROM objects"
+                " WHERE host = ? AND kind = ? AND scope = ? AND key = ?",
+                [(host, kind, scope, key) for key in deleted],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?)",
+                (host, kind, scope, time.time()),
+            )
+        stats = RefreshStats(added, updated, len(deleted), unchanged)
+        logger.debug(f"Refreshed inventory of {kind} {scope}: {stats}")
+        return stats
+
+    def put(self, host: str, kind: str, obj: dict[str, Any], scope: str = "") -> None:
+        """Store one object, e.g. after creating it, leaving the listing as is."""
+        spec = KINDS[kind]
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    host,
+                    kind,
+                    scope,
+                    spec.key(obj),
+                    spec.name(obj),
+                    _version(obj),
+                    json.dumps(obj),
+                ),
+            )
+
+    def remove(self, host: str, kind: str, key: str, scope: str = "") -> None:
+        """Remove one object, e.g. after deleting it, leaving the listing as is."""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM objects"
+                " WHERE host = ? AND kind = ? AND scope = ? AND key = ?",
+                (host, kind, scope, key),
+            )
+
+    def invalidate(self, host: str, kind: str, scope: str | None = None) -> None:
+        """Mark listings as stale, e.g. after deleting the scope they are in."""
+        conn = self._connection()
+        with conn:
+            if scope is None:
+                conn.execute(
+                    "DELETE FROM listings WHERE host = ? AND kind = ?", (host, kind)
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM listings WHERE host = ? AND kind = ? AND scope = ?",
+                    (host, kind, scope),
+                )
+
+    def _is_stale(self, host: str, kind: str, scope: str) -> bool:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT refreshed FROM listings"
+                " WHERE host = ? AND kind = ? AND scope = ?",
+                (host, kind, scope),
+            )
+            .fetchone()
+        )
+        return row is None or time.time() - row[0] > self.max_age
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can not be shared between threads
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=LOCK_TIMEOUT, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+def default_inventory() -> Inventory | None:
+    """The configured inventory, or None when not enabled."""
+    config = get_config("inventory") or {}
+    path = os.environ.get(ENV_VAR) or config.get("path")
+    if not path:
+        return None
+    return _open(str(path), float(config.get("max_age", DEFAULT_MAX_AGE)))
+
+
+@cache
+def _open(path: str, max_age: float) -> Inventory:
+    return Inventory(path, max_age=max_age)
+
+
+def _version(obj: dict[str, Any]) -> str:
+    if updated_at := obj.get("updated_at"):
+        return str(updated_at)
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
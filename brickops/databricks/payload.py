@@ -0,0 +1,84 @@
+"""Canonical JSON payloads, serialized once and reused.
+
+A job or pipeline config is converted to its API settings, and serialized
+with sorted keys and no whitespace, once. The same bytes are then sent as
+the body of each API call, their sha256 identifies the content, e.g. to
+tell whether a redeploy changes anything, and logging pretty prints the
+settings only when the log record is emitted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True, eq=False)
+class Payload:
+    """Settings, their canonical JSON body, and its content hash.
+
+    The settings are shared with the body, and must not be changed."""
+
+    data: dict[str, Any]
+    body: bytes
+    content_hash: str
+
+    @classmethod
+    def of(cls, data: dict[str, Any]) -> Payload:
+        body = json.dumps(
+            data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode()
+        return cls(data=data, body=body, content_hash=hashlib.sha256(body).hexdigest())
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, sort_keys=True, indent=4)
+
+
+class CachedPayload(ABC):
+    """Base for configs, computing their payload once, until an attribute is set.
+
+    The settings are frozen by the first payload(): changes made in place to
+    nested settings afterwards, e.g. appending a task, are not noticed until an
+    attribute of the config is set. So payload() should only be called once the
+    config is built."""
+
+    _payload: Payload | None = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name != "_payload":
+            super().__setattr__("_payload", None)
+
+    def payload(self) -> Payload:
+        """Canonical payload of the API settings of the config."""
+        if self._payload is None:
+            self._payload = Payload.of(self.settings())
+        return self._payload
+
+    @abstractmethod
+    def settings(self) -> dict[str, Any]:
+        """API settings of the config, as a new dict."""
+
+
+def request_body(payload: dict[str, Any] | Payload) -> bytes | None:
+    """JSON body reusing the bytes of payloads, at the top level or as values.
+
+    None if there are no payloads in it, so it can be sent as json as usual."""
+    if isinstance(payload, Payload):
+        return payload.body
+    if not any(isinstance(value, Payload) for value in payload.values()):
+        return None
+    fields = [
+        json.dumps(key).encode()
+        + b":"
+        + (
+            value.body
+            if isinstance(value, Payload)
+            else json.dumps(value, separators=(",", ":")).encode()
+        )
+        for key, value in payload.items()
+    ]
+    return b"{" + b",".join(fields) + b"}"
@@ -0,0 +1,118 @@
+"""Run SQL statements on a SQL warehouse through the Statement Execution API.
+
+Set-based statements, e.g. DROP SCHEMA ... CASCADE, replace loops of REST
+calls per object. The warehouse is given by name or id, or configured as
+sql.warehouse in .brickopscfg/config.yml.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, NamedTuple
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.datamesh.cfg import get_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 10.0
+RUNNING_STATES = {"PENDING", "RUNNING"}
+SUCCEEDED = "SUCCEEDED"
+
+
+class StatementResult(NamedTuple):
+    """Result of a SQL statement, with all rows as lists of strings."""
+
+    statement_id: str
+    columns: list[str]
+    rows: list[list[str | None]]
+
+
+def resolve_warehouse(api_client: ApiClient, warehouse: str | None = None) -> str:
+    """Resolve a warehouse name or id, by default from sql.warehouse in config."""
+    if not warehouse:
+        warehouse = (get_config("sql") or {}).get("warehouse")
+    if not warehouse:
+        msg = "No SQL warehouse given, and sql.warehouse is not configured."
+        raise ValueError(msg)
+    if found := api_client.get_warehouse_by_name(warehouse):
+        return str(found["id"])
+    # Not a name, so assume it is the id
+    return warehouse
+
+
+def execute(
+    api_client: ApiClient,
+    statement: str,
+    *,
+    warehouse: str | None = None,
+    warehouse_id: str | None = None,
+    catalog: str | None = None,
+    schema: str | None = None,
+    parameters: dict[str, Any] | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> StatementResult:
+    """Run a SQL statement and wait for the result.
+
+    The warehouse is resolved with resolve_warehouse(), unless its
+    warehouse_id is given, e.g. when running many statements.
+    Named parameters, referenced as :name in the statement, are passed
+    separately from the statement, so values need no quoting.
+    Statements still running after timeout seconds are canceled."""
+    response = api_client.execute_statement(
+        statement,
+        warehouse_id or resolve_warehouse(api_client, warehouse),
+        catalog=catalog,
+        schema=schema,
+        parameters=[
+            {"name": name, "value": None if value is None else str(value)}
+            for name, value in (parameters or {}).items()
+        ],
+    )
+    response = _wait(api_client, response, timeout)
+    return _result(api_client, response)
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a dotted name, e.g. catalog.schema, for use in SQL."""
+    return ".".join(f"`{part.replace('`', '``')}`" for part in name.split("."))
+
+
+def _wait(
+    api_client: ApiClient, response: dict[str, Any], timeout: float
+) -> dict[str, Any]:
+    statement_id = response["statement_id"]
+    deadline = time.monotonic() + timeout
+    interval = DEFAULT_POLL_INTERVAL
+    while response["status"]["state"] in RUNNING_STATES:
+        if time.monotonic() >= deadline:
+            api_client.cancel_statement(statement_id)
+            msg = f"Statement {statement_id} timed out after {timeout} seconds."
+            raise ApiClientError(msg)
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+        response = api_client.get_statement(statement_id)
+
+    status = response["status"]
+    if status["state"] != SUCCEEDED:
+        error = status.get("error", {}).get("message", "")
+        msg = f"Statement {statement_id} {status['state']}: {error}"
+        raise ApiClientError(msg)
+    return response
+
+
+def _result(api_client: ApiClient, response: dict[str, Any]) -> StatementResult:
+    statement_id = response["statement_id"]
+    columns = [
+        column["name"]
+        for column in response.get("manifest", {}).get("schema", {}).get("columns", [])
+    ]
+    chunk = response.get("result", {})
+    rows = list(chunk.get("data_array", []))
+    while (chunk_index := chunk.get("next_chunk_index")) is not None:
+        chunk = api_client.get_statement_result_chunk(statement_id, chunk_index)
+        rows.extend(chunk.get("data_array", []))
+    return StatementResult(statement_id=statement_id, columns=columns, rows=rows)
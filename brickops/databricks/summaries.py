@@ -0,0 +1,112 @@
+"""Compact records for workspace listings.
+
+Listing jobs, pipelines or schemas returns full nested JSON for each item,
+while most tools only need a few fields. The summaries here are streamed
+page by page, and only keep the fields asked for; other fields are None.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from brickops.databricks.api import ApiClient
+
+
+class JobSummary(NamedTuple):
+    """Summary of a job. created_time is in epoch milliseconds."""
+
+    job_id: int
+    name: str | None = None
+    tags: dict[str, str] | None = None
+    created_time: int | None = None
+    creator_user_name: str | None = None
+
+
+class PipelineSummary(NamedTuple):
+    """Summary of a pipeline."""
+
+    pipeline_id: str
+    name: str | None = None
+    state: str | None = None
+    creator_user_name: str | None = None
+
+
+class SchemaSummary(NamedTuple):
+    """Summary of a UC schema. created_at is in epoch milliseconds."""
+
+    full_name: str
+    name: str | None = None
+    catalog_name: str | None = None
+    owner: str | None = None
+    created_at: int | None = None
+
+
+Summary = TypeVar("Summary", JobSummary, PipelineSummary, SchemaSummary)
+
+
+def job_summaries(
+    api_client: ApiClient, fields: Sequence[str] = JobSummary._fields
+) -> Iterator[JobSummary]:
+    """Stream summaries of all jobs, with the given fields."""
+    keep = _keep(JobSummary, fields)
+    for job in api_client.iter_jobs(expand_tasks=False):
+        settings = job.get("settings", {})
+        yield _project(
+            JobSummary,
+            keep,
+            job_id=job["job_id"],
+            name=settings.get("name"),
+            tags=settings.get("tags", {}),
+            created_time=job.get("created_time"),
+            creator_user_name=job.get("creator_user_name"),
+        )
+
+
+def pipeline_summaries(
+    api_client: ApiClient, fields: Sequence[str] = PipelineSummary._fields
+) -> Iterator[PipelineSummary]:
+    """Stream summaries of all pipelines, with the given fields."""
+    keep = _keep(PipelineSummary, fields)
+    for pipeline in api_client.iter_pipelines():
+        yield _project(
+            PipelineSummary,
+            keep,
+            pipeline_id=pipeline["pipeline_id"],
+            name=pipeline.get("name"),
+            state=pipeline.get("state"),
+            creator_user_name=pipeline.get("creator_user_name"),
+        )
+
+
+def schema_summaries(
+    api_client: ApiClient,
+    catalog: str,
+    fields: Sequence[str] = SchemaSummary._fields,
+) -> Iterator[SchemaSummary]:
+    """Stream summaries of the schemas in a catalog, with the given fields."""
+    keep = _keep(SchemaSummary, fields)
+    for schema in api_client.iter_schemas(catalog):
+        yield _project(
+            SchemaSummary,
+            keep,
+            full_name=schema["full_name"],
+            name=schema.get("name"),
+            catalog_name=schema.get("catalog_name"),
+            owner=schema.get("owner"),
+            created_at=schema.get("created_at"),
+        )
+
+
+def _keep(record: type[Summary], fields: Sequence[str]) -> frozenset[str]:
+    if unknown := set(fields) - set(record._fields):
+        msg = f"Unknown {record.__name__} fields: {sorted(unknown)}"
+        raise ValueError(msg)
+    # The id is always kept, so a summary can be acted on
+    return frozenset({record._fields[0], *fields})
+
+
+def _project(record: type[Summary], keep: frozenset[str], **values: Any) -> Summary:
+    return record(**{f: v for f, v in values.items() if f in keep})
@@ -6,6 +6,7 @@ from brickops.databricks.context import current_env, get_context
 from brickops.databricks.username import get_username
 from brickops.dataops.deploy.repo import git_source
 from brickops.gitutils import clean_branch, commit_shortref
+from brickops.tracing import traced
 from brickops.datamesh.parsepath.extractname import (
     extract_name_from_path,
 )
@@ -13,8 +14,17 @@ from brickops.datamesh.parsepath.extractname import PipelineContext
 
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from brickops.databricks.context import DbContext
 
+# Names resolved at deploy time are passed to tasks as job parameters,
+# and read from widgets by the naming functions.
+CATALOG_PARAM = "brickops_catalog"
+DB_TEMPLATE_PARAM = "brickops_db_template"
+DB_PARAM_PREFIX = "brickops_db_"
+DB_PLACEHOLDER = "{db}"
+
 
 def tablename(
     tbl: str,
@@ -47,6 +57,7 @@ def tablename(
     return _escape_sql_name(f"{db_name}.{tbl}")
 
 
+@traced("naming.name_from_path")
 def name_from_path(*, resource: str, db_context: DbContext, env: str) -> str:
     """Derive name from repo data mesh structure.
 
@@ -96,13 +107,18 @@ def dbname(
         raise ValueError(msg)
     if not db_context:
         db_context = get_context()
-    if not env:
-        env = current_env(db_context)
-    nb_path = db_context.notebook_path
-    pipeline_context = _get_pipeline_context(db_context, env=env)
-    db_only = extract_name_from_path(
-        path=nb_path, resource="db", resource_name=db, pipeline_context=pipeline_context
-    )
+    db_only = _preresolved_dbname(db_context, db=db, env=env)
+    if db_only is None:
+        if not env:
+            env = current_env(db_context)
+        nb_path = db_context.notebook_path
+        pipeline_context = _get_pipeline_context(db_context, env=env)
+        db_only = extract_name_from_path(
+            path=nb_path,
+            resource="db",
+            resource_name=db,
+            pipeline_context=pipeline_context,
+        )
     name = db_only
     if prepend_cat:
         name = f"{cat}.{name}"
@@ -113,13 +129,77 @@ def dbname(
 build_table_name = tablename
 
 
+def preresolved_names(
+    *,
+    db_context: DbContext,
+    env: str,
+    git_src: dict[str, Any],
+    dbs: Iterable[str] = (),
+) -> dict[str, str]:
+    """Resolve catalog and db names at deploy time.
+
+    The names are passed on as job parameters or pipeline configuration,
+    so catname_from_path() and dbname() can read them from the widgets,
+    instead of looking up git info and parsing the path in every task.
+    The db template has a {db} placeholder, and covers dbs not listed in dbs.
+    """
+    nb_path = db_context.notebook_path
+    pipeline_context = _pipeline_context(db_context, env=env, git_src=git_src)
+    names = {
+        CATALOG_PARAM: _escape_sql_name(
+            extract_name_from_path(
+                path=nb_path, resource="catalog", pipeline_context=pipeline_context
+            )
+        ),
+        DB_TEMPLATE_PARAM: extract_name_from_path(
+            path=nb_path,
+            resource="db",
+            resource_name=DB_PLACEHOLDER,
+            pipeline_context=pipeline_context,
+        ),
+    }
+    for db in dbs:
+        names[f"{DB_PARAM_PREFIX}{db}"] = extract_name_from_path(
+            path=nb_path,
+            resource="db",
+            resource_name=db,
+            pipeline_context=pipeline_context,
+        )
+    return names
+
+
+def _preresolved(db_context: DbContext, key: str, env: str | None) -> str | None:
+    """Get a name resolved at deploy time from the widgets.
+
+    Only used if resolved for the requested env, i.e. the env of the deployment."""
+    value = db_context.widgets.get(key)
+    if not value:
+        return None
+    if env and env != db_context.widgets.get("pipeline_env"):
+        return None
+    return value
+
+
+def _preresolved_dbname(db_context: DbContext, db: str, env: str | None) -> str | None:
+    if (
+        name := _preresolved(db_context, f"{DB_PARAM_PREFIX}{db}", env=env)
+    ) is not None:
+        return name
+    if (template := _preresolved(db_context, DB_TEMPLATE_PARAM, env=env)) is not None:
+        return template.replace(DB_PLACEHOLDER, db)
+    return None
+
+
 def _git_src(db_context: DbContext) -> dict[str, Any]:
     """Get git src params from either task params or repos api.
 
-    Widget parameters take precedence over repos api.
+    Widget parameters take precedence over repos api, which is not called
+    when the widgets have the git branch and commit.
     """
-    git_data = git_source(db_context)
     git_data_from_widgets = _git_src_from_widget_params(db_context)
+    if "git_branch" in git_data_from_widgets and "git_commit" in git_data_from_widgets:
+        return git_data_from_widgets
+    git_data = git_source(db_context)
     return git_data | git_data_from_widgets
 
 
@@ -152,6 +232,8 @@ def catname_from_path(
     """
     if not db_context:  # Can be extracted from dbutils, available in notebooks
         db_context = get_context()
+    if (cat := _preresolved(db_context, CATALOG_PARAM, env=env)) is not None:
+        return cat
     if not env:
         env = current_env(db_context)
     nb_path = db_context.notebook_path
@@ -224,7 +306,12 @@ def pipelinename(db_context: DbContext, env: str) -> str:
 def _get_pipeline_context(db_context: DbContext, env: str) -> PipelineContext:
     """Get pipeline context from databricks context and env.
     It is used to derive correct name in extract_name_from_path()."""
-    git_src = _git_src(db_context)
+    return _pipeline_context(db_context, env=env, git_src=_git_src(db_context))
+
+
+def _pipeline_context(
+    db_context: DbContext, env: str, git_src: dict[str, Any]
+) -> PipelineContext:
     pipeline_context = PipelineContext(
         username=get_username(db_context),
         gitbranch=clean_branch(git_src["git_branch"]),
@@ -23,7 +23,7 @@ def extract_name_from_path(
     pipeline_context: PipelineContext,
     resource_name: str | None = None,
 ) -> str:
-    naming_config = _get_naming_config(resource=resource, env=pipeline_context.env)
+    naming_config = get_naming_config(resource=resource, env=pipeline_context.env)
     parsed_path = parsepath(path)
     if not parsed_path:
         return ""
@@ -66,11 +66,17 @@ def _compose_name(
     return naming_config.format(**format_dict)
 
 
-def _get_naming_config(resource: str, env: str) -> str:
+def naming_templates(resource: str) -> dict[str, str]:
+    """Get the naming templates for the given resource, by env."""
+    config: dict[str, str] = (
+        _get_nested_config("naming", resource) or DEFAULT_CONFIGS[resource]
+    )
+    return config
+
+
+def get_naming_config(resource: str, env: str) -> str:
     """Get the naming configuration for the given resource."""
-    config = _get_nested_config("naming", resource)
-    if not config:
-        config = DEFAULT_CONFIGS[resource]
+    config = naming_templates(resource)
     if env in config:
         config_str = config[env]
     else:  # Use default 'other' config if env not specified
@@ -0,0 +1,118 @@
+"""Parse resource names back into the parts they were composed from.
+
+This is the inverse of extract_name_from_path(). Each naming template is
+compiled into an anchored regex with a named group per template variable,
+e.g. "{env}_{username}_{gitbranch}_{gitshortref}_{db}" matches
+dev_jdoe_main_0e7768a7_revenue with env=dev, username=jdoe, gitbranch=main,
+gitshortref=0e7768a7 and db=revenue.
+
+Branch names and short refs only contain alphanumerics, see gitutils, so
+user names, which may contain underscores, are what remains between them.
+"""
+
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+
+from brickops.datamesh.parsepath.extractname import get_naming_config, naming_templates
+
+PROD = "prod"
+OTHER = "other"
+VARIABLE = re.compile(r"\{(\w+)\}")
+VARIABLE_PATTERNS = {
+    "env": r"[a-zA-Z0-9]+",
+    "username": r"\w+?",
+    "gitbranch": r"[a-zA-Z0-9]+",
+    "gitshortref": r"[0-9a-f]{8}",
+}
+# org, domain, project, activity, flowtype, flow and the resource name
+DEFAULT_PATTERN = r"[\w\-]+?"
+
+
+@dataclass(frozen=True)
+class ParsedName:
+    """Parts of a resource name, None for parts not in the naming template."""
+
+    resource: str
+    env: str
+    name: str | None = None
+    username: str | None = None
+    gitbranch: str | None = None
+    gitshortref: str | None = None
+    org: str | None = None
+    domain: str | None = None
+    project: str | None = None
+    activity: str | None = None
+    flowtype: str | None = None
+    flow: str | None = None
+
+
+@cache
+def compile_template(template: str, env: str | None = None) -> re.Pattern[str]:
+    """Compile a naming template into an anchored regex with named groups.
+
+    With env, the template is specific to that env, and {env} only matches it.
+    A variable used more than once must have the same value each time."""
+    pattern = []
+    seen: set[str] = set()
+    pos = 0
+    for match in VARIABLE.finditer(template):
+        pattern.append(re.escape(template[pos : match.start()]))
+        variable = match[1]
+        if variable == "env" and env:
+            pattern.append(re.escape(env))
+        elif variable in seen:
+            pattern.append(f"(?P={variable})")
+        else:
+            pattern.append(
+                f"(?P<{variable}>{VARIABLE_PATTERNS.get(variable, DEFAULT_PATTERN)})"
+            )
+            seen.add(variable)
+        pos = match.end()
+    pattern.append(re.escape(template[pos:]))
+    return re.compile(f"^{''.join(pattern)}$")
+
+
+def name_patterns(resource: str) -> list[tuple[str, re.Pattern[str]]]:
+    """Compiled naming templates of a resource, as (env, pattern).
+
+    The prod template is tried last, since it is usually the least specific,
+    e.g. just "{db}". The env of the "other" template comes from the name."""
+    envs = sorted(naming_templates(resource), key=lambda env: env == PROD)
+    return [
+        (
+            env,
+            compile_template(
+                get_naming_config(resource=resource, env=env),
+                env=None if env == OTHER else env,
+            ),
+        )
+        for env in envs
+    ]
+
+
+def parse_name(name: str, resource: str) -> ParsedName | None:
+    """Parse a resource name, e.g. a db name, or None if it does not match."""
+    return _parse(name, resource, name_patterns(resource))
+
+
+def _parse(
+    name: str, resource: str, patterns: list[tuple[str, re.Pattern[str]]]
+) -> ParsedName | None:
+    for env, pattern in patterns:
+        if match := pattern.match(name):
+            parts = match.groupdict()
+            return ParsedName(
+                resource=resource,
+                env=parts.pop("env", env),
+                name=parts.pop(resource, None),
+                **parts,
+            )
+    return None
+
+
+def parse_names(names: Iterable[str], resource: str) -> dict[str, ParsedName | None]:
+    """Parse many names of the same resource type."""
+    patterns = name_patterns(resource)
+    return {name: _parse(name, resource, patterns) for name in names}
@@ -1,30 +1,115 @@
 from __future__ import annotations
 
-import json
+import copy
 import logging
+import os.path
+from contextlib import nullcontext
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 from brickops.databricks import api
 from brickops.databricks.context import DbContext, current_env, get_context
 from brickops.dataops.deploy.job.buildconfig import build_job_config
+from brickops.dataops.deploy.job.buildconfig.health import apply_health_rules
+from brickops.dataops.deploy.job.buildconfig.job_config import submit_config
+from brickops.dataops.deploy.nbpath import nbrelfolder
+from brickops.dataops.deploy.permissions import JOBS, deploy_permissions
+from brickops.dataops.deploy.preflight import cluster_names, preflight
 from brickops.dataops.deploy.readconfig import read_config_yaml
 from brickops.dataops.deploy.repo import git_source
+from brickops.dataops.deploy.snapshot import (
+    GIT_SOURCE,
+    WORKSPACE_SOURCE,
+    snapshot_path,
+    snapshot_tasks,
+    sync_folder,
+)
+from brickops.dataops.deploy.targets import deploy_to_targets, requested_targets
+from brickops.dataops.runs import DEFAULT_TIMEOUT, JobRun
+from brickops.dataops.runs import wait as wait_for_run
+from brickops.tracing import span, traced, tracing
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig
+    from brickops.dataops.deploy.preflight import Preflight
+    from brickops.dataops.deploy.snapshot import SyncResult
+    from brickops.dataops.deploy.targets import WorkspaceTarget
 
 logger = logging.getLogger(__name__)
 
+DEPLOY_MODE = "deploy"
+EPHEMERAL_MODE = "ephemeral"
+
 
 def autojob(
     cfgyaml: str = "deployment.yml",
     env: str | None = None,
+    health: dict[str, Any] | None = None,
+    source: str | None = None,
+    mode: str = DEPLOY_MODE,
+    *,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+    targets: Sequence[str | WorkspaceTarget] | None = None,
+    trace: bool = False,
 ) -> dict[str, Any]:
     """Deploy a job defined in ./deployment.yml.
 
     Job naming and the rest of the configuration is derived from the environment.
+    Health rules, e.g. from brickops.tools.rightsizing.health_rules(), are added
+    to the job and its tasks, unless already set in deployment.yml.
+
+    With source WORKSPACE, given as argument or as source in deployment.yml,
+    the notebooks of the flow are synced to a workspace snapshot folder, and
+    the tasks run from there instead of checking out the git repo on each run.
+
+    With mode "ephemeral", no job is created. The built tasks and clusters are
+    submitted as a one-time run, which leaves nothing behind to clean up.
+    The result contains the run as `run`, and with wait, its RunResult as `result`.
+
+    With targets, names of workspaces configured under workspaces in
+    .brickopscfg/config.yml, or given in the brickops_targets widget, the job
+    is deployed to all of them concurrently, instead of to this workspace.
+    The result contains the result of each workspace in `targets`, and the
+    error of each failed workspace in `failed`.
+
+    With trace, the result contains the time spent in each step of the deploy,
+    including each API call, as `timings`.
     """
-    db_context = get_context()
+    with (
+        tracing() if trace else nullcontext() as active,
+        span("autojob", cfgyaml=cfgyaml, mode=mode),
+    ):
+        result = _autojob(
+            cfgyaml,
+            env,
+            health,
+            source,
+            mode,
+            wait=wait,
+            timeout=timeout,
+            targets=targets,
+        )
+    if active:
+        result["timings"] = active.breakdown()
+    return result
+
+
+def _autojob(
+    cfgyaml: str,
+    env: str | None,
+    health: dict[str, Any] | None,
+    source: str | None,
+    mode: str,
+    *,
+    wait: bool,
+    timeout: float,
+    targets: Sequence[str | WorkspaceTarget] | None,
+) -> dict[str, Any]:
+    with span("deploy.get_context"):
+        db_context = get_context()
 
     if not env:
         env = current_env(db_context)
@@ -33,33 +118,154 @@ def autojob(
         msg = f"env must be 'test', 'dev' or 'prod', not {env}"
         raise ValueError(msg)
 
+    if mode not in (DEPLOY_MODE, EPHEMERAL_MODE):
+        msg = f"mode must be '{DEPLOY_MODE}' or '{EPHEMERAL_MODE}', not {mode}"
+        raise ValueError(msg)
+
     cfg = read_config_yaml(cfgyaml)
-    cfg["git_source"] = git_source(db_context)
-    job_config = build_job_config(
+    permissions = cfg.pop("permissions", None)
+    source = source or cfg.pop("source", GIT_SOURCE)
+    if source not in (GIT_SOURCE, WORKSPACE_SOURCE):
+        msg = f"source must be '{GIT_SOURCE}' or '{WORKSPACE_SOURCE}', not {source}"
+        raise ValueError(msg)
+    if health:
+        cfg = apply_health_rules(cfg, health)
+    deploy = partial(
+        _deploy_job,
         cfg=cfg,
         env=env,
-        db_context=db_context,
+        source=source,
+        mode=mode,
+        permissions=permissions,
+        wait=wait,
+        timeout=timeout,
     )
-    logger.info(
-        "\njob_config:\n" + json.dumps(job_config.dict(), sort_keys=True, indent=4)
+    if workspaces := requested_targets(db_context, targets):
+        if source == WORKSPACE_SOURCE:
+            msg = "Workspace snapshots can not be deployed to other workspaces"
+            raise ValueError(msg)
+        # The repo is only checked out here, so its git source is looked up once
+        git_src = git_source(db_context)
+        fanned_out = deploy_to_targets(
+            partial(deploy, git_src=git_src), db_context, workspaces, git_src
+        )
+        return {"targets": fanned_out.results, "failed": fanned_out.failed}
+    return deploy(db_context)
+
+
+def _deploy_job(
+    db_context: DbContext,
+    *,
+    cfg: dict[str, Any],
+    env: str,
+    source: str,
+    mode: str,
+    permissions: list[dict[str, str]] | None,
+    wait: bool,
+    timeout: float,
+    git_src: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    checks = preflight(
+        db_context,
+        object_type=JOBS,
+        env=env,
+        git_src=git_src,
+        clusters=cluster_names(cfg),
+        find_existing=mode == DEPLOY_MODE,
+    )
+    db_context = checks.db_context
+    # Each workspace gets its own copy, as building the config modifies it
+    cfg = copy.deepcopy(cfg)
+    cfg["git_source"] = checks.git_src
+    job_config = build_job_config(
+        cfg=cfg, env=env, db_context=db_context, cluster_ids=checks.cluster_ids
     )
+    result: dict[str, Any] = {"job_name": job_config.name}
+    if source == WORKSPACE_SOURCE:
+        result["snapshot"] = deploy_snapshot(db_context, job_config)
+    # Serialized once, and only pretty printed if logged
+    payload = job_config.payload()
+    result["content_hash"] = payload.content_hash
+    logger.info("\njob_config:\n%s", payload)
 
-    response = create_or_update_job(db_context, job_config)
+    if mode == EPHEMERAL_MODE:
+        result.update(
+            submit_job_run(db_context, job_config, wait=wait, timeout=timeout)
+        )
+        return result
+
+    result["response"] = create_or_update_job(db_context, job_config, checks)
+    result["permissions"] = deploy_permissions(
+        db_context, JOBS, result["response"]["job_id"], permissions
+    )
 
     logger.info("Job deploy finished.")
-    return {"job_name": job_config.name, "response": response}
+    return result
+
 
+@traced("job.submit_job_run")
+def submit_job_run(
+    db_context: DbContext,
+    job_config: JobConfig,
+    *,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, Any]:
+    """Run the job once, without creating it."""
+    api_client = api.ApiClient(db_context.api_url, db_context.api_token)
+    response = api_client.submit_run(submit_config(job_config))
+    result: dict[str, Any] = {"response": response, "run": JobRun(response["run_id"])}
+    logger.info(f"Submitted one-time run {response['run_id']}.")
+    if wait:
+        result["result"] = wait_for_run(result["run"], db_context, timeout=timeout)
+    return result
 
+
+@traced("job.deploy_snapshot")
+def deploy_snapshot(db_context: DbContext, job_config: JobConfig) -> SyncResult:
+    """Sync the notebooks of the flow to a snapshot version, and point the tasks to it.
+
+    The tasks are only pointed to the version once it is fully uploaded."""
+    api_client = api.ApiClient(db_context.api_url, db_context.api_token)
+    sync_result = sync_folder(
+        api_client,
+        source=os.path.dirname(db_context.notebook_path),
+        folder=snapshot_path(job_config.name),
+    )
+    flow_folder = nbrelfolder(db_context, root_folder=job_config.git_source["git_path"])
+    snapshot_tasks(job_config, flow_folder=flow_folder, target=sync_result.target)
+    return sync_result
+
+
+@traced("job.create_or_update_job")
 def create_or_update_job(
-    db_context: DbContext, job_config: JobConfig
+    db_context: DbContext, job_config: JobConfig, checks: Preflight | None = None
 ) -> dict[str, Any]:
+    """Create the job, or update it if it exists.
+
+    The existing job is looked up by name, unless already done by checks.
+    If it has been deleted since, it is created."""
     api_client = api.ApiClient(db_context.api_url, db_context.api_token)
-    if job := api_client.get_job_by_name(job_name=job_config.name):
-        return api_client.update_job(
-            job_id=job["job_id"], job_name=job_config.name, job_config=job_config.dict()
-        )
+    if checks and checks.knows(job_config.name):
+        job = checks.existing
+    else:
+        job = api_client.get_job_by_name(job_name=job_config.name)
+    if job:
+        try:
+            response = api_client.update_job(
+                job_id=job["job_id"],
+                job_name=job_config.name,
+                job_config=job_config.payload(),
+            )
+        except api.ApiClientError as err:
+            # The lookup may be served from the inventory, after a delete
+            if not err.not_found:
+                raise
+            logger.info(f"Job {job['job_id']} no longer exists, creating it")
+        else:
+            return {"job_id": job["job_id"], **response}
 
     return api_client.create_job(
         job_name=job_config.name,
-        job_config=job_config.dict(),
+        job_config=job_config.payload(),
     )
@@ -1,19 +1,36 @@
 from __future__ import annotations
 
-import json
+import copy
 import logging
+import os.path
+from contextlib import nullcontext
+from functools import partial
 from typing import TYPE_CHECKING, Any
 
 from brickops.databricks import api
 from brickops.databricks.context import DbContext, current_env, get_context
+from brickops.dataops.deploy.permissions import PIPELINES, deploy_permissions
 from brickops.dataops.deploy.pipeline.buildconfig import build_pipeline_config
+from brickops.dataops.deploy.preflight import preflight
 from brickops.dataops.deploy.readconfig import read_config_yaml
 from brickops.dataops.deploy.repo import git_source
+from brickops.dataops.deploy.snapshot import (
+    snapshot_libraries,
+    snapshot_path,
+    sync_folder,
+)
+from brickops.dataops.deploy.targets import deploy_to_targets, requested_targets
+from brickops.tracing import span, traced, tracing
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import (
         PipelineConfig,
     )
+    from brickops.dataops.deploy.preflight import Preflight
+    from brickops.dataops.deploy.snapshot import SyncResult
+    from brickops.dataops.deploy.targets import WorkspaceTarget
 
 
 logger = logging.getLogger(__name__)
@@ -22,12 +39,36 @@ logger = logging.getLogger(__name__)
 def autopipeline(
     cfgyaml: str = "deployment.yml",
     env: str | None = None,
+    *,
+    targets: Sequence[str | WorkspaceTarget] | None = None,
+    trace: bool = False,
 ) -> dict[str, Any]:
     """Deploy a pipeline defined in ./deployment.yml.
 
     Pipeline naming and the rest of the configuration is derived from the environment.
+    With targets, the pipeline is deployed to those workspaces concurrently,
+    as for autojob(), with the result of each workspace in `targets`.
+    The repo is only checked out in this workspace, so the notebooks of the
+    flow are synced to a workspace snapshot in each target, and the libraries
+    of the pipeline point to it.
+    With trace, the result contains the time spent in each step of the deploy,
+    including each API call, as `timings`.
     """
-    db_context = get_context()
+    with (
+        tracing() if trace else nullcontext() as active,
+        span("autopipeline", cfgyaml=cfgyaml),
+    ):
+        result = _autopipeline(cfgyaml, env, targets)
+    if active:
+        result["timings"] = active.breakdown()
+    return result
+
+
+def _autopipeline(
+    cfgyaml: str, env: str | None, targets: Sequence[str | WorkspaceTarget] | None
+) -> dict[str, Any]:
+    with span("deploy.get_context"):
+        db_context = get_context()
     logger.info("db_context:" + repr(db_context))
 
     if not env:
@@ -38,35 +79,114 @@ def autopipeline(
         raise ValueError(msg)
 
     cfg = read_config_yaml(cfgyaml)
-    cfg["git_source"] = git_source(db_context)
-    pipeline_config = build_pipeline_config(
-        cfg=cfg,
-        env=env,
-        db_context=db_context,
-    )
-    logging.info(
-        "\npipeline_config:\n"
-        + json.dumps(pipeline_config.export_dict(), sort_keys=True, indent=4)
+    permissions = cfg.pop("permissions", None)
+    deploy = partial(_deploy_pipeline, cfg=cfg, env=env, permissions=permissions)
+    if workspaces := requested_targets(db_context, targets):
+        # The repo is only checked out here, so its git source is looked up once,
+        # and the notebooks are read from here
+        git_src = git_source(db_context)
+        source_client = api.ApiClient(db_context.api_url, db_context.api_token)
+        fanned_out = deploy_to_targets(
+            partial(deploy, git_src=git_src, source_client=source_client),
+            db_context,
+            workspaces,
+            git_src,
+        )
+        return {"targets": fanned_out.results, "failed": fanned_out.failed}
+    return deploy(db_context)
+
+
+def _deploy_pipeline(
+    db_context: DbContext,
+    *,
+    cfg: dict[str, Any],
+    env: str,
+    permissions: list[dict[str, str]] | None,
+    git_src: dict[str, Any] | None = None,
+    source_client: api.ApiClient | None = None,
+) -> dict[str, Any]:
+    checks = preflight(db_context, object_type=PIPELINES, env=env, git_src=git_src)
+    db_context = checks.db_context
+    # Each workspace gets its own copy, as building the config modifies it
+    cfg = copy.deepcopy(cfg)
+    cfg["git_source"] = checks.git_src
+    pipeline_config = build_pipeline_config(cfg=cfg, env=env, db_context=db_context)
+    result: dict[str, Any] = {"pipeline_name": pipeline_config.name}
+    if source_client:
+        result["snapshot"] = deploy_snapshot(db_context, pipeline_config, source_client)
+    # Serialized once, and only pretty printed if logged
+    payload = pipeline_config.payload()
+    logging.info("\npipeline_config:\n%s", payload)
+
+    response = create_or_update_pipeline(db_context, pipeline_config, checks)
+
+    acl_result = deploy_permissions(
+        db_context, PIPELINES, response["pipeline_id"], permissions
     )
 
-    response = create_or_update_pipeline(db_context, pipeline_config)
-
     logging.info("Pipeline deploy finished.")
-    return {"pipeline_name": pipeline_config.name, "response": response}
+    return result | {
+        "content_hash": payload.content_hash,
+        "response": response,
+        "permissions": acl_result,
+    }
+
+
+@traced("pipeline.deploy_snapshot")
+def deploy_snapshot(
+    db_context: DbContext,
+    pipeline_config: PipelineConfig,
+    source_client: api.ApiClient,
+) -> SyncResult:
+    """Sync the notebooks of the flow to a snapshot version, and point the libraries to it.
+
+    The notebooks are read with source_client, from the workspace the repo is
+    checked out in, and synced to the workspace of db_context."""
+    api_client = api.ApiClient(db_context.api_url, db_context.api_token)
+    source = os.path.dirname(db_context.notebook_path)
+    sync_result = sync_folder(
+        api_client,
+        source=source,
+        folder=snapshot_path(pipeline_config.name),
+        source_client=source_client,
+    )
+    snapshot_libraries(pipeline_config, source=source, target=sync_result.target)
+    return sync_result
 
 
+@traced("pipeline.create_or_update_pipeline")
 def create_or_update_pipeline(
-    db_context: DbContext, pipeline_config: PipelineConfig
+    db_context: DbContext,
+    pipeline_config: PipelineConfig,
+    checks: Preflight | None = None,
 ) -> dict[str, Any]:
+    """Create the pipeline, or update it if it exists.
+
+    The existing pipeline is looked up by name, unless already done by checks.
+    If it has been deleted since, it is created."""
     api_client = api.ApiClient(db_context.api_url, db_context.api_token)
-    if pipeline := api_client.get_pipeline_by_name(pipeline_name=pipeline_config.name):
-        return api_client.update_pipeline(
-            pipeline_id=pipeline["pipeline_id"],
-            pipeline_name=pipeline_config.name,
-            pipeline_config=pipeline_config.export_dict(),
-        )
+    if checks and checks.knows(pipeline_config.name):
+        pipeline = checks.existing
+    else:
+        pipeline = api_client.get_pipeline_by_name(pipeline_name=pipeline_config.name)
+    if pipeline:
+        try:
+            response = api_client.update_pipeline(
+                pipeline_id=pipeline["pipeline_id"],
+                pipeline_name=pipeline_config.name,
+                pipeline_config=pipeline_config.payload(),
+            )
+        except api.ApiClientError as err:
+            # The lookup may be served from the inventory, after a delete
+            if not err.not_found:
+                raise
+            logger.info(
+                f"Pipeline {pipeline['pipeline_id']} no longer exists, creating it"
+            )
+        else:
+            return {"pipeline_id": pipeline["pipeline_id"], **response}
 
     return api_client.create_pipeline(
         pipeline_name=pipeline_config.name,
-        pipeline_config=pipeline_config.export_dict(),
+        pipeline_config=pipeline_config.payload(),
     )
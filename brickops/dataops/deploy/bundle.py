@@ -0,0 +1,165 @@
+"""Export of the deployments in a repo as a Databricks Asset Bundle.
+
+Deploying flows one by one with autojob() costs a lookup and a create or
+reset per flow. Instead, the job and pipeline configs brickops builds for
+every deployment.yml in the repo can be exported as bundle resources, with
+one target per env, and deployed with a single `databricks bundle deploy`,
+which keeps track of the deployed resources in its state.
+
+Names, tags, compute profiles and declared permissions are the same as for
+autojob() and autopipeline(). Each deployment.yml is built as if deployed
+from a notebook next to it, in the repo of the exporting notebook.
+
+Jobs run as the run_as given in deployment.yml. Without it, dev jobs run as
+the exporting user, while jobs for other envs run as the identity deploying
+the bundle.
+"""
+
+from __future__ import annotations
+
+import copy
+import dataclasses
+import logging
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+from brickops.databricks.context import get_context
+from brickops.dataops.deploy.job.buildconfig import build_job_config
+from brickops.dataops.deploy.permissions import JOBS, PIPELINES, declared_acl
+from brickops.dataops.deploy.pipeline.buildconfig import build_pipeline_config
+from brickops.dataops.deploy.readconfig import read_config_yaml
+from brickops.dataops.deploy.repo import git_source
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from brickops.databricks.context import DbContext
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENT_FILE = "deployment.yml"
+BUNDLE_FILE = "databricks.yml"
+DEFAULT_ENVS = ("dev", "prod")
+# Env where jobs without run_as run as the exporting user
+DEV_ENV = "dev"
+# Name of the virtual deploy notebook next to each deployment.yml
+DEPLOY_NOTEBOOK = "deploy"
+
+
+def find_deployments(root: str | Path) -> list[Path]:
+    """All deployment.yml files under root, in path order."""
+    return sorted(Path(root).rglob(DEPLOYMENT_FILE))
+
+
+def bundle_resources(
+    db_context: DbContext,
+    root: str | Path,
+    deployments: Iterable[Path],
+    env: str,
+    git_src: dict[str, Any],
+) -> dict[str, dict[str, Any]]:
+    """Jobs and pipelines for the deployments, keyed by their brickops name.
+
+    A deployment.yml with pipeline_tasks is a pipeline, otherwise a job."""
+    resources: dict[str, dict[str, Any]] = {"jobs": {}, "pipelines": {}}
+    for deployment in deployments:
+        flow_context = _flow_context(db_context, root, deployment, git_src)
+        cfg = copy.deepcopy(read_config_yaml(deployment))
+        permissions = cfg.pop("permissions", None)
+        run_as = cfg.pop("run_as", None)
+        if cfg.pop("source", None):
+            logger.warning(f"Ignoring source in {deployment}, bundles use git")
+        cfg["git_source"] = dict(git_src)
+        resource: dict[str, Any]
+        if "pipeline_tasks" in cfg:
+            kind, object_type = "pipelines", PIPELINES
+            pipeline_config = build_pipeline_config(cfg, env, flow_context)
+            name = pipeline_config.name
+            resource = dict(pipeline_config.export_dict())
+        else:
+            kind, object_type = "jobs", JOBS
+            job_config = build_job_config(cfg, env, flow_context)
+            name = job_config.name
+            resource = dict(job_config.dict())
+            if run_as:
+                resource["run_as"] = run_as
+            elif env != DEV_ENV:
+                del resource["run_as"]
+        if acl := declared_acl(object_type, permissions):
+            resource["permissions"] = [
+                {"level": level, key: principal}
+                for (key, principal), level in sorted(acl.items())
+            ]
+        key = resource_key(name)
+        if key in resources[kind]:
+            msg = f"{deployment} gives the {kind} name {name}, which is already used"
+            raise ValueError(msg)
+        resources[kind][key] = resource
+    return {kind: items for kind, items in resources.items() if items}
+
+
+def build_bundle(
+    db_context: DbContext,
+    root: str | Path,
+    *,
+    bundle_name: str,
+    envs: Sequence[str] = DEFAULT_ENVS,
+    git_src: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Bundle with a target for each env, with the resources built for that env."""
+    if git_src is None:
+        git_src = git_source(db_context)
+    deployments = find_deployments(root)
+    logger.info(f"Exporting {len(deployments)} deployments for {', '.join(envs)}")
+    return {
+        "bundle": {"name": bundle_name},
+        "targets": {
+            env: {
+                "default": env == envs[0],
+                "resources": bundle_resources(
+                    db_context, root, deployments, env=env, git_src=git_src
+                ),
+            }
+            for env in envs
+        },
+    }
+
+
+def export_bundle(
+    root: str | Path,
+    bundle_name: str,
+    path: str | Path = BUNDLE_FILE,
+    envs: Sequence[str] = DEFAULT_ENVS,
+) -> dict[str, Any]:
+    """Export the deployments under root as a bundle, written to path."""
+    bundle = build_bundle(get_context(), root, bundle_name=bundle_name, envs=envs)
+    with Path(path).open("w") as file:
+        yaml.safe_dump(bundle, file, sort_keys=False)
+    return bundle
+
+
+def resource_key(name: str) -> str:
+    """Bundle resource keys only allow letters, digits, - and _."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name)
+
+
+def _flow_context(
+    db_context: DbContext, root: str | Path, deployment: Path, git_src: dict[str, Any]
+) -> DbContext:
+    flow_folder = deployment.parent.relative_to(root).as_posix()
+    if not (repo_path := git_src.get("git_path")):
+        msg = "The git source has no repo path, which is needed to name the flows"
+        raise ValueError(msg)
+    git_widgets = {
+        key: git_src[key]
+        for key in ("git_url", "git_branch", "git_commit")
+        if git_src.get(key)
+    }
+    return dataclasses.replace(
+        db_context,
+        notebook_path=f"{repo_path.rstrip('/')}/{flow_folder}/{DEPLOY_NOTEBOOK}",
+        widgets={**db_context.widgets, **git_widgets},
+    )
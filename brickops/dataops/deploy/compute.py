@@ -0,0 +1,106 @@
+"""Compute profiles for jobs and pipelines.
+
+Profiles are named compute shapes, configured under the `compute` key in
+.brickopscfg/config.yml, e.g:
+
+compute:
+  job:
+    etl-cluster:
+      inherits: common-job-cluster
+      env:
+        prod:
+          new_cluster:
+            autoscale: {min_workers: 2, max_workers: 8}
+            runtime_engine: PHOTON
+        other:
+          new_cluster:
+            num_workers: 1
+
+A profile may inherit from another profile with `inherits`, and may override
+any part of itself per environment under `env`. As for naming, the `other`
+entry is used for envs that are not listed explicitly.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+from brickops.datamesh.cfg import get_config
+
+INHERITS_KEY = "inherits"
+ENV_KEY = "env"
+OTHER_ENV = "other"
+
+# Fixed size and autoscale are mutually exclusive in cluster specs,
+# so setting one of them in an override removes the other.
+_EXCLUSIVE_KEYS = {"autoscale": "num_workers", "num_workers": "autoscale"}
+
+
+def compute_profiles(resource: str, builtin: dict[str, Any]) -> dict[str, Any]:
+    """Return all profiles for resource (job or pipeline).
+
+    Profiles defined in config take precedence over the builtin ones."""
+    config = get_config("compute") or {}
+    return builtin | (config.get(resource) or {})
+
+
+def resolve_profile(
+    *,
+    resource: str,
+    name: str,
+    env: str | None,
+    builtin: dict[str, Any],
+) -> dict[str, Any]:
+    """Resolve a named profile, applying inheritance and env overrides.
+
+    If env is None, only the base profile is returned, without env overrides."""
+    profiles = compute_profiles(resource, builtin)
+    return _resolve(profiles=profiles, name=name, env=env, seen=())
+
+
+def _resolve(
+    *,
+    profiles: dict[str, Any],
+    name: str,
+    env: str | None,
+    seen: tuple[str, ...],
+) -> dict[str, Any]:
+    if name in seen:
+        msg = f"Compute profile inheritance cycle: {' -> '.join((*seen, name))}"
+        raise ValueError(msg)
+    if name not in profiles:
+        msg = f"Unknown compute profile '{name}'. Known profiles: {sorted(profiles)}"
+        raise ValueError(msg)
+
+    profile = copy.deepcopy(profiles[name])
+    parent = profile.pop(INHERITS_KEY, None)
+    env_overrides = profile.pop(ENV_KEY, None) or {}
+
+    resolved: dict[str, Any] = {}
+    if parent:
+        resolved = _resolve(profiles=profiles, name=parent, env=env, seen=(*seen, name))
+    resolved = merge(resolved, profile)
+    if env is not None:
+        override = env_overrides.get(env, env_overrides.get(OTHER_ENV))
+        if override:
+            resolved = merge(resolved, override)
+    return resolved
+
+
+def merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
+    """Deep merge override into base, returning a new dict.
+
+    A None value in override removes the key from the result."""
+    result = copy.deepcopy(base)
+    for key, value in override.items():
+        if value is None:
+            result.pop(key, None)
+            continue
+        if key in _EXCLUSIVE_KEYS:
+            result.pop(_EXCLUSIVE_KEYS[key], None)
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
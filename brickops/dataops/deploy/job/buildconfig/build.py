@@ -2,10 +2,11 @@ from typing import Any
 
 from brickops.databricks.context import DbContext
 from brickops.databricks.username import get_username
-from brickops.datamesh.naming import jobname
+from brickops.datamesh.naming import jobname, preresolved_names
 from brickops.dataops.deploy.job.buildconfig.enrichtasks import enrich_tasks
 from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig, defaultconfig
 from brickops.gitutils import clean_branch, commit_shortref
+from brickops.tracing import traced
 
 
 def depname(*, db_context: DbContext, env: str, git_src: dict[str, Any]) -> str:
@@ -18,12 +19,17 @@ def depname(*, db_context: DbContext, env: str, git_src: dict[str, Any]) -> str:
     return f"{env}_{uname}_{branch}_{short_ref}"
 
 
+@traced("job.build_job_config")
 def build_job_config(
     cfg: dict[str, Any],
     env: str,
     db_context: DbContext,
+    cluster_ids: dict[str, str] | None = None,
 ) -> JobConfig:
-    """Combine custom parameters with default parameters, and default cluster config."""
+    """Combine custom parameters with default parameters, and default cluster config.
+
+    Ids of existing clusters used by the tasks, e.g. from a preflight, can be
+    given in cluster_ids, to avoid looking them up."""
     full_cfg = defaultconfig()
     if env != "prod":
         full_cfg.email_notifications = {}
@@ -34,7 +40,17 @@ def build_job_config(
     tags = _tags(cfg=cfg, depname=dep_name)
     full_cfg.tags = tags
     full_cfg.parameters.extend(build_context_parameters(env, tags))
-    full_cfg = enrich_tasks(job_config=full_cfg, db_context=db_context)
+    full_cfg.parameters.extend(
+        build_name_parameters(
+            db_context=db_context,
+            env=env,
+            git_src=full_cfg.git_source,
+            dbs=cfg.get("schemas", []),
+        )
+    )
+    full_cfg = enrich_tasks(
+        job_config=full_cfg, db_context=db_context, env=env, cluster_ids=cluster_ids
+    )
     if db_context.is_service_principal:
         full_cfg.run_as = {"service_principal_name": db_context.username}
     else:  # if we have a service principal, we need to use the correct config
@@ -67,6 +83,16 @@ def build_context_parameters(env: str, tags: dict[str, Any]) -> list[dict[str, A
     ]
 
 
+def build_name_parameters(
+    *, db_context: DbContext, env: str, git_src: dict[str, Any], dbs: list[str]
+) -> list[dict[str, Any]]:
+    """Create a list of parameters containing catalog and db names resolved at deploy time.
+
+    The db names are resolved for the schemas listed in deployment.yml."""
+    names = preresolved_names(db_context=db_context, env=env, git_src=git_src, dbs=dbs)
+    return [{"name": name, "default": value} for name, value in names.items()]
+
+
 def _tags(*, cfg: dict[str, Any], depname: str) -> dict[str, Any]:
     return {
         "deployment": depname,
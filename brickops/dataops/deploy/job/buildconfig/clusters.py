@@ -1,17 +1,22 @@
 import logging
+from collections.abc import Iterable
 from typing import Any
 
 from brickops.databricks import api
 from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.compute import resolve_profile
 from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig
+from brickops.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
-def add_clusters(job_config: JobConfig, used_clusters: dict[str, Any]) -> JobConfig:
+def add_clusters(
+    job_config: JobConfig, used_clusters: dict[str, Any], env: str | None = None
+) -> JobConfig:
     """Add clusters used by tasks as job_clusters entry in job config."""
     clusters = [
-        _cluster(template_key=template_key, key=cluster["env_cluster_key"])
+        _cluster(template_key=template_key, key=cluster["env_cluster_key"], env=env)
         for template_key, cluster in used_clusters.items()
     ]
 
@@ -19,6 +24,7 @@ def add_clusters(job_config: JobConfig, used_clusters: dict[str, Any]) -> JobCon
     return job_config
 
 
+@traced("job.lookup_cluster_id")
 def lookup_cluster_id(*, db_context: DbContext, cluster_name: str) -> dict[str, Any]:
     api_client = api.ApiClient(db_context.api_url, db_context.api_token)
     cluster_list = api_client.get_clusters()
@@ -30,16 +36,47 @@ def lookup_cluster_id(*, db_context: DbContext, cluster_name: str) -> dict[str,
     raise RuntimeError(msg)
 
 
-def _cluster(*, template_key: str, key: str) -> dict[str, Any]:
-    logger.info(f"template_key: {template_key}, key: {key}")
-    templates = cluster_templates()
-    cluster = templates[template_key]
-    cluster["job_cluster_key"] = key
-    return cluster  # type: ignore [no-any-return]
+@traced("job.lookup_cluster_ids")
+def lookup_cluster_ids(
+    *, db_context: DbContext, cluster_names: Iterable[str]
+) -> dict[str, str]:
+    """Ids of existing clusters by name, from a single listing of the clusters."""
+    api_client = api.ApiClient(db_context.api_url, db_context.api_token)
+    ids = {
+        cluster["cluster_name"]: cluster["cluster_id"]
+        for cluster in api_client.get_clusters()
+    }
+    if missing := sorted(set(cluster_names) - set(ids)):
+        msg = f"Cluster {', '.join(missing)} not found"
+        raise RuntimeError(msg)
+    return {name: ids[name] for name in cluster_names}
+
+
+def job_compute_profile(name: str, env: str | None = None) -> dict[str, Any]:
+    """Resolve a job compute profile by name, for the given env.
+
+    A profile either defines a `new_cluster`, or is `serverless`, optionally
+    with a `performance_target`."""
+    profile = resolve_profile(
+        resource="job", name=name, env=env, builtin=cluster_templates()
+    )
+    if not profile.get("serverless", False) and "new_cluster" not in profile:
+        msg = f"Compute profile '{name}' must define either new_cluster or serverless"
+        raise ValueError(msg)
+    return profile
+
+
+def _cluster(*, template_key: str, key: str, env: str | None = None) -> dict[str, Any]:
+    logger.info(f"template_key: {template_key}, key: {key}, env: {env}")
+    profile = job_compute_profile(template_key, env=env)
+    return {"new_cluster": profile["new_cluster"], "job_cluster_key": key}
 
 
 def cluster_templates() -> dict[str, Any]:
-    """Templates for different cluster types."""
+    """Builtin templates for different cluster types.
+
+    Can be extended or overridden by profiles under compute.job in
+    .brickopscfg/config.yml."""
     # TODO @jesloper: This must be updated
     return {
         "common-job-cluster": {
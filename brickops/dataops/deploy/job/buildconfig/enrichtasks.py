@@ -1,15 +1,28 @@
 from pathlib import Path
 
-from brickops.databricks.context import DbContext
+from brickops.databricks.context import DbContext, current_env
 from brickops.dataops.deploy.job.buildconfig.clusters import (
     add_clusters,
+    job_compute_profile,
     lookup_cluster_id,
 )
 from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig
 from brickops.dataops.deploy.nbpath import nbrelfolder
+from brickops.tracing import traced
 
 
-def enrich_tasks(job_config: JobConfig, db_context: DbContext) -> JobConfig:
+@traced("job.enrich_tasks")
+def enrich_tasks(
+    job_config: JobConfig,
+    db_context: DbContext,
+    env: str | None = None,
+    cluster_ids: dict[str, str] | None = None,
+) -> JobConfig:
+    """Add notebook paths and cluster references to the tasks.
+
+    Existing clusters are looked up by name, unless in cluster_ids."""
+    if not env:
+        env = current_env(db_context)
     tasks = job_config.tasks
     used_clusters = {}
     for task in tasks:
@@ -50,17 +63,28 @@ def enrich_tasks(job_config: JobConfig, db_context: DbContext) -> JobConfig:
 
         if "job_cluster_key" in task:
             env_cluster = task["job_cluster_key"]
+            profile = job_compute_profile(env_cluster, env=env)
+            if profile.get("serverless", False):
+                # Serverless profiles need no job cluster, only an optional
+                # job level performance target.
+                del task["job_cluster_key"]
+                if performance_target := profile.get("performance_target"):
+                    job_config.performance_target = performance_target
+                continue
             used_clusters[task["job_cluster_key"]] = {"env_cluster_key": env_cluster}
             task["job_cluster_key"] = env_cluster
         elif "existing_cluster_name" in task:
             # Ensure we have a cluster reference
             existing_cluster_name = task.pop("existing_cluster_name")
-            task["existing_cluster_id"] = lookup_cluster_id(
-                db_context=db_context, cluster_name=existing_cluster_name
-            )
+            if cluster_ids and existing_cluster_name in cluster_ids:
+                task["existing_cluster_id"] = cluster_ids[existing_cluster_name]
+            else:
+                task["existing_cluster_id"] = lookup_cluster_id(
+                    db_context=db_context, cluster_name=existing_cluster_name
+                )
         elif "existing_cluster_id" not in task:
             msg = "No cluster references found"
             raise ValueError(msg)
 
     # Get list of clusters used by tasks
-    return add_clusters(job_config=job_config, used_clusters=used_clusters)
+    return add_clusters(job_config=job_config, used_clusters=used_clusters, env=env)
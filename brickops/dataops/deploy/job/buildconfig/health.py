@@ -0,0 +1,15 @@
+from typing import Any
+
+
+def apply_health_rules(cfg: dict[str, Any], rules: dict[str, Any]) -> dict[str, Any]:
+    """Set health rules on a job config read from deployment.yml.
+
+    The rules are on the form returned by brickops.tools.rightsizing.health_rules().
+    Health rules already in the config are kept."""
+    if rules.get("job") and "health" not in cfg:
+        cfg["health"] = rules["job"]
+    task_rules = rules.get("tasks", {})
+    for task in cfg.get("tasks", []):
+        if task["task_key"] in task_rules and "health" not in task:
+            task["health"] = task_rules[task["task_key"]]
+    return cfg
@@ -1,10 +1,24 @@
+import copy
 from dataclasses import asdict, dataclass
 from typing import Any
 
+from brickops.databricks.payload import CachedPayload
+
+# Settings of a job which are also accepted for a one-time run
+SUBMIT_FIELDS = (
+    "email_notifications",
+    "git_source",
+    "health",
+    "performance_target",
+    "run_as",
+)
+
 
 @dataclass
-class JobConfig:
-    """Represents a job configuration."""
+class JobConfig(CachedPayload):
+    """Represents a job configuration.
+
+    payload() gives the job settings serialized once, for the API calls."""
 
     name: str
     max_concurrent_runs: int
@@ -16,6 +30,8 @@ class JobConfig:
     parameters: list[dict[str, Any]]
     run_as: dict[str, Any]
     git_source: dict[str, Any]
+    performance_target: str | None = None
+    health: dict[str, Any] | None = None
 
     def update(self, cfg: dict[str, Any]) -> None:
         """Update the job configuration with the given configuration."""
@@ -23,6 +39,9 @@ class JobConfig:
             if hasattr(self, key):
                 setattr(self, key, value)
 
+    def settings(self) -> dict[str, Any]:
+        return self.dict()
+
     def dict(self) -> dict[str, str]:
         # we skip None values to avoid sending them to the API
         return asdict(
@@ -43,3 +62,36 @@ def defaultconfig() -> JobConfig:
         run_as={},
         git_source={},
     )
+
+
+def submit_config(job_config: JobConfig) -> dict[str, Any]:
+    """Settings for a one-time run of the job through jobs/runs/submit.
+
+    One-time runs have no job clusters or job parameters, so the job
+    cluster of each task is inlined as new_cluster, and the job
+    parameters are passed as base parameters to notebook tasks. As in
+    runs of the job, job parameters override base parameters of tasks."""
+    settings = job_config.payload().data
+    clusters = {
+        cluster["job_cluster_key"]: cluster["new_cluster"]
+        for cluster in settings.get("job_clusters", [])
+    }
+    parameters = {
+        param["name"]: param["default"] for param in settings.get("parameters", [])
+    }
+    tasks = []
+    for task in copy.deepcopy(settings["tasks"]):
+        if key := task.pop("job_cluster_key", None):
+            task["new_cluster"] = clusters[key]
+        if "notebook_task" in task and parameters:
+            notebook_task = task["notebook_task"]
+            notebook_task["base_parameters"] = {
+                **notebook_task.get("base_parameters", {}),
+                **parameters,
+            }
+        tasks.append(task)
+    return {
+        "run_name": job_config.name,
+        "tasks": tasks,
+        **{key: settings[key] for key in SUBMIT_FIELDS if settings.get(key)},
+    }
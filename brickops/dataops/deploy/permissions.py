@@ -0,0 +1,254 @@
+"""Declared permissions of jobs and pipelines.
+
+An ACL is declared as a list of principals with a permission level:
+
+    permissions:
+      - group_name: data-engineers
+        permission_level: CAN_MANAGE_RUN
+
+in deployment.yml for a single job or pipeline, or in .brickopscfg/config.yml
+under permissions.jobs and permissions.pipelines for all of them.
+
+The current ACL of each object is fetched concurrently, and compared with
+the declared one. Objects which already have the declared permissions are
+left alone, the others are updated with one call for all their principals.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.datamesh.cfg import get_config
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from brickops.databricks.context import DbContext
+
+logger = logging.getLogger(__name__)
+
+JOBS = "jobs"
+PIPELINES = "pipelines"
+OBJECT_TYPES = (JOBS, PIPELINES)
+PRINCIPAL_KEYS = ("user_name", "group_name", "service_principal_name")
+OWNER = "IS_OWNER"
+DEFAULT_MAX_WORKERS = 8
+
+# (principal key, principal name), e.g. ("group_name", "data-engineers")
+Principal = tuple[str, str]
+Acl = dict[Principal, str]
+
+
+@dataclass
+class PermissionChange:
+    """Change needed to give an object its declared ACL.
+
+    Granted principals are added or changed in place. Revoking principals
+    requires replacing the ACL of the object, with acl as the new ACL."""
+
+    object_type: str
+    object_id: str
+    grant: Acl = field(default_factory=dict)
+    revoke: list[Principal] = field(default_factory=list)
+    acl: Acl = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.grant or self.revoke)
+
+
+@dataclass
+class PermissionsResult:
+    """Result of syncing permissions, changes are only planned with dry_run."""
+
+    changed: list[PermissionChange] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def declared_acl(
+    object_type: str, entries: Iterable[dict[str, str]] | None = None
+) -> Acl:
+    """ACL declared in config for object_type, with entries from deployment.yml.
+
+    Entries override the config for the same principal."""
+    if object_type not in OBJECT_TYPES:
+        msg = f"object_type must be one of {OBJECT_TYPES}, not {object_type}"
+        raise ValueError(msg)
+    config = get_config("permissions") or {}
+    acl: Acl = {}
+    for entry in [*config.get(object_type, []), *(entries or [])]:
+        acl.update(_parse_entry(entry))
+    return acl
+
+
+def current_acl(permissions: dict[str, Any]) -> Acl:
+    """Direct permissions in a permissions API response.
+
+    Inherited permissions, e.g. of workspace admins, can not be changed
+    on the object, and are left out."""
+    acl: Acl = {}
+    for entry in permissions.get("access_control_list", []):
+        principal = _principal(entry)
+        for permission in entry.get("all_permissions", []):
+            if not permission.get("inherited"):
+                acl[principal] = permission["permission_level"]
+    return acl
+
+
+def diff_acl(
+    object_type: str,
+    object_id: str,
+    current: Acl,
+    desired: Acl,
+    *,
+    exclusive: bool = False,
+) -> PermissionChange:
+    """Minimal change from the current to the desired ACL.
+
+    With exclusive, direct permissions which are not declared are revoked,
+    except for the owner."""
+    grant = {
+        principal: level
+        for principal, level in desired.items()
+        if current.get(principal) != level
+    }
+    revoke = []
+    if exclusive:
+        revoke = [
+            principal
+            for principal, level in current.items()
+            if principal not in desired and level != OWNER
+        ]
+    owners = {p: level for p, level in current.items() if level == OWNER}
+    return PermissionChange(
+        object_type=object_type,
+        object_id=object_id,
+        grant=grant,
+        revoke=sorted(revoke),
+        acl={**owners, **desired} if revoke else {},
+    )
+
+
+def sync_permissions(
+    api_client: ApiClient,
+    object_type: str,
+    object_ids: Iterable[str],
+    desired: Acl,
+    *,
+    exclusive: bool = False,
+    dry_run: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> PermissionsResult:
+    """Give each object the desired ACL, with at most max_workers calls in flight.
+
+    Failures are collected in the result instead of stopping the sync."""
+    sync = partial(
+        _sync_object,
+        api_client,
+        object_type,
+        desired=desired,
+        exclusive=exclusive,
+        dry_run=dry_run,
+    )
+    result = PermissionsResult()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for object_id, change, error in executor.map(sync, object_ids):
+            if error:
+                result.failed[object_id] = error
+            elif change:
+                result.changed.append(change)
+            else:
+                result.unchanged.append(object_id)
+    logger.info(
+        f"Permissions of {object_type}: {len(result.changed)} "
+        f"{'to change' if dry_run else 'changed'}, {len(result.unchanged)} "
+        f"unchanged, {len(result.failed)} failed"
+    )
+    return result
+
+
+def apply_change(api_client: ApiClient, change: PermissionChange) -> dict[str, Any]:
+    """Apply a change with a single permissions call."""
+    if change.revoke:
+        logger.info(
+            f"Replacing permissions of {change.object_type}/{change.object_id}, "
+            f"revoking {change.revoke}"
+        )
+        return api_client.set_permissions(
+            change.object_type, change.object_id, _entries(change.acl)
+        )
+    logger.info(
+        f"Granting {_entries(change.grant)} on {change.object_type}/{change.object_id}"
+    )
+    return api_client.update_permissions(
+        change.object_type, change.object_id, _entries(change.grant)
+    )
+
+
+def _sync_object(
+    api_client: ApiClient,
+    object_type: str,
+    object_id: str,
+    desired: Acl,
+    *,
+    exclusive: bool,
+    dry_run: bool,
+) -> tuple[str, PermissionChange | None, str | None]:
+    get_permissions = {
+        JOBS: api_client.get_job_permissions,
+        PIPELINES: api_client.get_pipeline_permissions,
+    }[object_type]
+    try:
+        current = current_acl(get_permissions(object_id))
+        change = diff_acl(object_type, object_id, current, desired, exclusive=exclusive)
+        if change and not dry_run:
+            apply_change(api_client, change)
+    except ApiClientError as err:
+        return object_id, None, err.message
+    return object_id, change or None, None
+
+
+def _parse_entry(entry: dict[str, str]) -> Acl:
+    keys = [key for key in PRINCIPAL_KEYS if key in entry]
+    if len(keys) != 1 or "permission_level" not in entry:
+        msg = (
+            "A permission must have permission_level and one of "
+            f"{', '.join(PRINCIPAL_KEYS)}, not {entry}"
+        )
+        raise ValueError(msg)
+    return {(keys[0], entry[keys[0]]): entry["permission_level"]}
+
+
+def _principal(entry: dict[str, Any]) -> Principal:
+    key = next(key for key in PRINCIPAL_KEYS if key in entry)
+    return key, entry[key]
+
+
+def _entries(acl: Acl) -> list[dict[str, str]]:
+    return [
+        {key: name, "permission_level": level}
+        for (key, name), level in sorted(acl.items())
+    ]
+
+
+def deploy_permissions(
+    db_context: DbContext,
+    object_type: str,
+    object_id: str,
+    entries: Iterable[dict[str, str]] | None = None,
+) -> PermissionsResult | None:
+    """Give a deployed job or pipeline its declared ACL, if one is declared."""
+    acl = declared_acl(object_type, entries)
+    if not acl:
+        return None
+    api_client = ApiClient(db_context.api_url, db_context.api_token)
+    result = sync_permissions(api_client, object_type, [object_id], acl)
+    if result.failed:
+        msg = f"Failed to set permissions of {object_type}/{object_id}: {result.failed}"
+        raise ApiClientError(msg)
+    return result
@@ -1,14 +1,23 @@
+import json
 import logging
 from typing import Any
-from brickops.databricks.context import DbContext
+
+from brickops.databricks.context import PIPELINE_CONF_KEY, DbContext
 from brickops.databricks.username import get_username
-from brickops.datamesh.naming import pipelinename
+from brickops.datamesh.naming import pipelinename, preresolved_names
+from brickops.dataops.deploy.pipeline.buildconfig.clusters import (
+    DEFAULT_PROFILE,
+    apply_compute_profile,
+    pipeline_compute_profile,
+    with_profile_configuration,
+)
 from brickops.dataops.deploy.pipeline.buildconfig.enrichtasks import enrich_tasks
 from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import (
     PipelineConfig,
     defaultconfig,
 )
 from brickops.gitutils import clean_branch, commit_shortref
+from brickops.tracing import traced
 
 
 logger = logging.getLogger(__name__)
@@ -24,19 +33,37 @@ def depname(*, db_context: DbContext, env: str, git_src: dict[str, Any]) -> str:
     return f"{env}_{uname}_{branch}_{short_ref}"
 
 
+@traced("pipeline.build_pipeline_config")
 def build_pipeline_config(
     cfg: dict[str, Any],
     env: str,
     db_context: DbContext,
 ) -> PipelineConfig:
-    """Combine custom parameters with default parameters, and default cluster config."""
+    """Combine custom parameters with default parameters, and default cluster config.
+
+    The compute profile, given by compute_profile in cfg, is applied before cfg,
+    so settings in deployment.yml take precedence. The configuration in cfg is
+    merged over the one from the profile."""
     full_cfg = defaultconfig()
-    full_cfg.update(cfg)
+    profile = pipeline_compute_profile(
+        cfg.get("compute_profile", DEFAULT_PROFILE), env=env
+    )
+    full_cfg = apply_compute_profile(full_cfg, profile)
+    full_cfg.update(with_profile_configuration(cfg, profile))
     full_cfg.name = pipelinename(db_context, env=env)
     dep_name = depname(db_context=db_context, env=env, git_src=full_cfg.git_source)
     tags = _tags(cfg=cfg, depname=dep_name, pipeline_env=env)
     full_cfg.tags = tags
     full_cfg.parameters.extend(build_context_parameters(env, tags))
+    full_cfg.configuration = (full_cfg.configuration or {}) | build_name_configuration(
+        db_context=db_context,
+        env=env,
+        tags=tags,
+        dbs=[
+            *([full_cfg.schema] if full_cfg.schema else []),
+            *cfg.get("schemas", []),
+        ],
+    )
     logger.info("full_cfg:" + repr(full_cfg))
     full_cfg = enrich_tasks(pipeline_config=full_cfg, db_context=db_context, env=env)
     return full_cfg
@@ -64,6 +91,27 @@ def build_context_parameters(env: str, tags: dict[str, Any]) -> list[dict[str, A
     ]
 
 
+def build_name_configuration(
+    *, db_context: DbContext, env: str, tags: dict[str, Any], dbs: list[str]
+) -> dict[str, str]:
+    """Create pipeline configuration with names resolved at deploy time.
+
+    DLT notebooks have no widgets, so the names, env and git info are passed
+    as one json encoded configuration value, read by get_context()."""
+    names = {
+        "pipeline_env": env,
+        "git_url": tags["git_url"],
+        "git_branch": tags["git_branch"],
+        "git_commit": tags["git_commit"],
+    } | preresolved_names(
+        db_context=db_context,
+        env=env,
+        git_src={"git_branch": tags["git_branch"], "git_commit": tags["git_commit"]},
+        dbs=dbs,
+    )
+    return {PIPELINE_CONF_KEY: json.dumps(names, sort_keys=True)}
+
+
 def _tags(*, cfg: dict[str, Any], depname: str, pipeline_env: str) -> dict[str, Any]:
     return {
         "deployment": depname,
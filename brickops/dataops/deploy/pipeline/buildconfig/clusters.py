@@ -0,0 +1,92 @@
+import logging
+from typing import Any
+
+from brickops.dataops.deploy.compute import resolve_profile
+from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "default"
+DEFAULT_CLUSTER_LABEL = "default"
+DEFAULT_AUTOSCALE_MODE = "ENHANCED"
+TRIGGER_INTERVAL_CONF = "pipelines.trigger.interval"
+
+# Pipeline settings a compute profile is allowed to set
+PROFILE_FIELDS = {
+    "serverless",
+    "photon",
+    "continuous",
+    "channel",
+    "edition",
+    "clusters",
+    "configuration",
+}
+
+
+def pipeline_compute_profile(name: str, env: str | None = None) -> dict[str, Any]:
+    """Resolve a pipeline compute profile by name, for the given env.
+
+    The shorthands `autoscale` and `trigger_interval` are expanded to
+    a default cluster and pipeline configuration respectively."""
+    profile = resolve_profile(
+        resource="pipeline", name=name, env=env, builtin=pipeline_profile_templates()
+    )
+    if autoscale := profile.pop("autoscale", None):
+        profile["clusters"] = _with_default_autoscale(
+            profile.get("clusters") or [], autoscale
+        )
+    if trigger_interval := profile.pop("trigger_interval", None):
+        profile["configuration"] = (profile.get("configuration") or {}) | {
+            TRIGGER_INTERVAL_CONF: str(trigger_interval)
+        }
+    if unknown := set(profile) - PROFILE_FIELDS:
+        msg = f"Unsupported settings {sorted(unknown)} in pipeline compute profile '{name}'"
+        raise ValueError(msg)
+    if profile.get("serverless", False) and profile.get("clusters"):
+        msg = f"Pipeline compute profile '{name}' defines clusters, but is serverless. Set serverless: false."
+        raise ValueError(msg)
+    return profile
+
+
+def apply_compute_profile(
+    pipeline_config: PipelineConfig, profile: dict[str, Any]
+) -> PipelineConfig:
+    """Set the pipeline compute settings given by the profile."""
+    if profile.get("clusters") and "serverless" not in profile:
+        # Classic clusters, so do not keep the serverless default
+        pipeline_config.serverless = False
+    pipeline_config.update(profile)
+    return pipeline_config
+
+
+def with_profile_configuration(
+    cfg: dict[str, Any], profile: dict[str, Any]
+) -> dict[str, Any]:
+    """Merge the configuration in cfg over the configuration of the profile.
+
+    Pipeline configuration is a mapping of settings, so a configuration in
+    deployment.yml adds to the one from the profile rather than replacing it,
+    keeping e.g. the profile's trigger interval."""
+    if not cfg.get("configuration") or not profile.get("configuration"):
+        return cfg
+    return cfg | {"configuration": profile["configuration"] | cfg["configuration"]}
+
+
+def pipeline_profile_templates() -> dict[str, Any]:
+    """Builtin pipeline profiles.
+
+    The default profile keeps the pipeline defaults, but can be overridden by
+    compute.pipeline.default in .brickopscfg/config.yml to apply to all pipelines."""
+    return {DEFAULT_PROFILE: {}}
+
+
+def _with_default_autoscale(
+    clusters: list[dict[str, Any]], autoscale: dict[str, Any]
+) -> list[dict[str, Any]]:
+    autoscale = {"mode": DEFAULT_AUTOSCALE_MODE} | autoscale
+    for cluster in clusters:
+        if cluster.get("label", DEFAULT_CLUSTER_LABEL) == DEFAULT_CLUSTER_LABEL:
+            cluster.pop("num_workers", None)
+            cluster["autoscale"] = autoscale
+            return clusters
+    return [*clusters, {"label": DEFAULT_CLUSTER_LABEL, "autoscale": autoscale}]
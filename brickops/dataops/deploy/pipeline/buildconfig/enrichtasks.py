@@ -4,8 +4,10 @@ from brickops.databricks.context import DbContext
 from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import PipelineConfig
 from brickops.datamesh.naming import dbname
 from brickops.datamesh.naming import name_from_path
+from brickops.tracing import traced
 
 
+@traced("pipeline.enrich_tasks")
 def enrich_tasks(
     pipeline_config: PipelineConfig, db_context: DbContext, env: str
 ) -> PipelineConfig:
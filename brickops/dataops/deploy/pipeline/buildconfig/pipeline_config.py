@@ -1,10 +1,14 @@
 from dataclasses import asdict, dataclass
 from typing import Any
 
+from brickops.databricks.payload import CachedPayload
+
 
 @dataclass
-class PipelineConfig:
-    """Represents a pipeline configuration."""
+class PipelineConfig(CachedPayload):
+    """Represents a pipeline configuration.
+
+    payload() gives the exported settings serialized once, for the API calls."""
 
     name: str
     edition: str
@@ -25,6 +29,8 @@ class PipelineConfig:
     policy_name: str
     run_as: dict[str, Any] | None
     git_source: dict[str, Any]
+    clusters: list[dict[str, Any]] | None = None
+    configuration: dict[str, str] | None = None
 
     def update(self, cfg: dict[str, Any]) -> None:
         """Update the pipeline configuration with the given configuration."""
@@ -46,6 +52,9 @@ class PipelineConfig:
             },
         )
 
+    def settings(self) -> dict[str, Any]:
+        return self.export_dict()
+
 
 def defaultconfig() -> PipelineConfig:
     return PipelineConfig(
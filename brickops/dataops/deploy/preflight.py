@@ -0,0 +1,122 @@
+"""Lookups a deploy needs, done once and concurrently before building the config.
+
+Deploying a job or pipeline needs the git source of the repo, the ids of
+existing clusters used by its tasks, and the job or pipeline if it is
+already deployed. The lookups are independent, except that the name of the
+job or pipeline depends on the git source, so a deploy done lookup by lookup
+waits for each of them in turn.
+
+The preflight starts the git and cluster lookups at once, and looks up the
+existing job or pipeline as soon as its name is known. Building the config
+from the preflight makes no API calls, as the git source is passed on as
+widgets, which the naming functions read instead of listing the repos.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks import api
+from brickops.datamesh.naming import jobname, pipelinename
+from brickops.dataops.deploy.job.buildconfig.clusters import lookup_cluster_ids
+from brickops.dataops.deploy.permissions import JOBS, OBJECT_TYPES
+from brickops.dataops.deploy.repo import git_source
+from brickops.dataops.deploy.targets import git_context
+from brickops.tracing import bind_context, traced
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from brickops.databricks.context import DbContext
+
+
+@dataclass
+class Preflight:
+    """Results of the lookups for deploying a job or pipeline.
+
+    db_context has the git source as widgets, and existing is the deployed
+    job or pipeline named name, or None if it is not deployed, or was not
+    looked up."""
+
+    db_context: DbContext
+    git_src: dict[str, Any]
+    name: str
+    cluster_ids: dict[str, str] = field(default_factory=dict)
+    existing: dict[str, Any] | None = None
+    looked_up: bool = False
+
+    def knows(self, name: str) -> bool:
+        """Whether the job or pipeline named name was looked up."""
+        return self.looked_up and name == self.name
+
+
+def cluster_names(cfg: dict[str, Any]) -> list[str]:
+    """Names of existing clusters used by the tasks in a job config."""
+    names = {
+        task["existing_cluster_name"]
+        for task in cfg.get("tasks", [])
+        if "existing_cluster_name" in task
+    }
+    return sorted(names)
+
+
+@traced("deploy.preflight")
+def preflight(
+    db_context: DbContext,
+    *,
+    object_type: str,
+    env: str,
+    git_src: dict[str, Any] | None = None,
+    clusters: Iterable[str] = (),
+    find_existing: bool = True,
+) -> Preflight:
+    """Look up what deploying a job or pipeline needs, concurrently.
+
+    The git source is only looked up if not given, and the existing job or
+    pipeline only with find_existing."""
+    if object_type not in OBJECT_TYPES:
+        msg = f"object_type must be one of {OBJECT_TYPES}, not {object_type}"
+        raise ValueError(msg)
+    clusters = list(clusters)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        git_future = (
+            executor.submit(bind_context(git_source), db_context)
+            if git_src is None
+            else None
+        )
+        clusters_future = (
+            executor.submit(
+                bind_context(lookup_cluster_ids),
+                db_context=db_context,
+                cluster_names=clusters,
+            )
+            if clusters
+            else None
+        )
+        if git_future:
+            git_src = git_future.result()
+        git_src = git_src or {}
+        context = git_context(db_context, git_src)
+        naming = jobname if object_type == JOBS else pipelinename
+        name = naming(context, env=env)
+        existing = _existing(context, object_type, name) if find_existing else None
+        cluster_ids = clusters_future.result() if clusters_future else {}
+    return Preflight(
+        db_context=context,
+        git_src=git_src,
+        name=name,
+        cluster_ids=cluster_ids,
+        existing=existing,
+        looked_up=find_existing,
+    )
+
+
+def _existing(
+    db_context: DbContext, object_type: str, name: str
+) -> dict[str, Any] | None:
+    api_client = api.ApiClient(db_context.api_url, db_context.api_token)
+    if object_type == JOBS:
+        return api_client.get_job_by_name(job_name=name)
+    return api_client.get_pipeline_by_name(pipeline_name=name)
@@ -4,7 +4,10 @@ from typing import Any
 
 import yaml
 
+from brickops.tracing import traced
 
+
+@traced("deploy.read_config_yaml")
 def read_config_yaml(cfgfile: str | Path) -> dict[str, Any]:
     with Path(cfgfile).open() as stream:
         return yaml.safe_load(stream)  # type: ignore [no-any-return]
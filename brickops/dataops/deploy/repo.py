@@ -4,6 +4,7 @@ import logging
 from typing import TYPE_CHECKING, Any
 
 from brickops.databricks import api
+from brickops.tracing import traced
 
 if TYPE_CHECKING:
     from brickops.databricks.context import DbContext
@@ -11,6 +12,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+@traced("deploy.git_source")
 def git_source(db_context: DbContext) -> dict[str, Any]:
     """Get git source information for a repo."""
     if not db_context.api_url:
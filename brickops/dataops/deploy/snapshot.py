@@ -0,0 +1,240 @@
+"""Workspace snapshot deployment of job and pipeline notebooks.
+
+Instead of letting every job run check out the git repo, the notebooks of the
+flow are synced to a workspace folder at deploy time, and the tasks point to
+that folder with source WORKSPACE. Pipelines deployed to other workspaces,
+where the repo is not checked out, have their notebook libraries synced the
+same way, from the deploying workspace.
+
+Each job or pipeline has a folder of snapshot versions, named by a hash of
+the content of the files, e.g. /Shared/brickops/snapshots/<name>/<version>.
+A new version is uploaded in full before the tasks are pointed to it, so
+running jobs keep reading the version they started with. A redeploy without
+changes reuses the existing version.
+
+A manifest in the job folder keeps the content hash of each file, so files
+that have not been modified are not even exported, and when each version was
+synced, so superseded versions can be garbage collected.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks.api import ApiClientError
+from brickops.datamesh.cfg import get_config
+
+if TYPE_CHECKING:
+    from brickops.databricks.api import ApiClient
+    from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig
+    from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import (
+        PipelineConfig,
+    )
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_ROOT = "/Shared/brickops/snapshots"
+MANIFEST_NAME = "brickops_manifest.json"
+GIT_SOURCE = "GIT"
+WORKSPACE_SOURCE = "WORKSPACE"
+VERSION_LENGTH = 12
+VERSION_PATTERN = re.compile(rf"^[0-9a-f]{{{VERSION_LENGTH}}}$")
+
+
+@dataclass
+class SyncResult:
+    """Result of syncing a folder to a snapshot version.
+
+    target is the folder of the version, uploaded is empty when the version
+    already existed."""
+
+    target: str
+    version: str
+    uploaded: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+
+
+def snapshot_root() -> str:
+    """Workspace folder for snapshots, configurable as deploy.snapshot_root."""
+    deploy_config = get_config("deploy") or {}
+    return str(deploy_config.get("snapshot_root", DEFAULT_SNAPSHOT_ROOT))
+
+
+def snapshot_path(name: str) -> str:
+    """Folder of the snapshot versions of a job or pipeline."""
+    return f"{snapshot_root()}/{name}"
+
+
+def sync_folder(
+    api_client: ApiClient,
+    source: str,
+    folder: str,
+    source_client: ApiClient | None = None,
+) -> SyncResult:
+    """Sync notebooks and files in the source folder to a version in folder.
+
+    The source folder is read with source_client, if given, e.g. to sync to
+    another workspace, otherwise from the same workspace.
+    Files are only exported when their modification time has changed since
+    the last sync. When the version is new, all files are uploaded to it, and
+    its manifest is written last, marking it complete."""
+    source_client = source_client or api_client
+    state = _read_manifest(api_client, folder)
+    cached = state.get("files", {})
+    objects = {
+        str(PurePosixPath(obj["path"]).relative_to(source)): obj
+        for obj in _list_recursive(source_client, source)
+    }
+    contents: dict[str, bytes] = {}
+    files: dict[str, dict[str, Any]] = {}
+    for rel_path, obj in objects.items():
+        previous = cached.get(rel_path)
+        if previous and previous["modified_at"] == obj.get("modified_at"):
+            files[rel_path] = previous
+            continue
+        contents[rel_path] = source_client.export_workspace(obj["path"])
+        files[rel_path] = {
+            "sha256": hashlib.sha256(contents[rel_path]).hexdigest(),
+            "modified_at": obj.get("modified_at"),
+        }
+    version = content_version(files)
+    result = SyncResult(target=f"{folder}/{version}", version=version)
+    created_dirs: set[str] = set()
+    _mkdirs(api_client, folder, created_dirs)
+    # Recorded before uploading, so garbage collection keeps the new version
+    versions = state.get("versions", {}) | {version: time.time()}
+    _write_manifest(api_client, folder, {"files": files, "versions": versions})
+
+    if _read_manifest(api_client, result.target):
+        result.unchanged = list(objects)
+    else:
+        for rel_path, obj in objects.items():
+            content = (
+                contents[rel_path]
+                if rel_path in contents
+                else source_client.export_workspace(obj["path"])
+            )
+            target_path = f"{result.target}/{rel_path}"
+            _mkdirs(api_client, str(PurePosixPath(target_path).parent), created_dirs)
+            _upload(api_client, target_path, content, obj)
+            result.uploaded.append(rel_path)
+        _mkdirs(api_client, result.target, created_dirs)
+        _write_manifest(api_client, result.target, {"files": files})
+    logger.info(
+        f"Synced {source} to {result.target}: {len(result.uploaded)} uploaded, "
+        f"{len(result.unchanged)} unchanged"
+    )
+    return result
+
+
+def content_version(files: dict[str, dict[str, Any]]) -> str:
+    """Version of a snapshot, a hash of the paths and content hashes of its files."""
+    hashes = {rel_path: file["sha256"] for rel_path, file in files.items()}
+    digest = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode())
+    return digest.hexdigest()[:VERSION_LENGTH]
+
+
+def synced_versions(api_client: ApiClient, folder: str) -> dict[str, float]:
+    """When each version in a job folder was last synced, in epoch seconds."""
+    return dict(_read_manifest(api_client, folder).get("versions", {}))
+
+
+def snapshot_tasks(job_config: JobConfig, flow_folder: str, target: str) -> JobConfig:
+    """Point git notebook tasks in the flow folder to the snapshot.
+
+    flow_folder is the folder of the flow relative to the repo root, as used
+    for the git notebook paths."""
+    for task in job_config.tasks:
+        nb_task = task.get("notebook_task")
+        if not nb_task or nb_task.get("source") != GIT_SOURCE:
+            continue
+        try:
+            rel_path = PurePosixPath(nb_task["notebook_path"]).relative_to(flow_folder)
+        except ValueError as err:
+            msg = f"""
+            Task {task["task_key"]} has notebook {nb_task["notebook_path"]} outside the
+            flow folder {flow_folder}, which can not be deployed as a workspace snapshot.
+            """
+            raise ValueError(msg) from err
+        nb_task["notebook_path"] = f"{target}/{rel_path}"
+        nb_task["source"] = WORKSPACE_SOURCE
+    return job_config
+
+
+def snapshot_libraries(
+    pipeline_config: PipelineConfig, source: str, target: str
+) -> PipelineConfig:
+    """Point notebook libraries in the source folder to the snapshot."""
+    libraries = copy.deepcopy(pipeline_config.libraries)
+    for library in libraries:
+        notebook = library.get("notebook")
+        if not notebook:
+            continue
+        try:
+            rel_path = PurePosixPath(notebook["path"]).relative_to(source)
+        except ValueError as err:
+            msg = f"""
+            Library {notebook["path"]} is outside the flow folder {source},
+            which can not be deployed as a workspace snapshot.
+            """
+            raise ValueError(msg) from err
+        notebook["path"] = f"{target}/{rel_path}"
+    # Set as a new list, so a cached payload is recomputed
+    pipeline_config.libraries = libraries
+    return pipeline_config
+
+
+def _list_recursive(api_client: ApiClient, path: str) -> list[dict[str, Any]]:
+    objects = []
+    for obj in api_client.list_workspace(path):
+        if obj["object_type"] == "DIRECTORY":
+            objects.extend(_list_recursive(api_client, obj["path"]))
+        elif obj["object_type"] in ("NOTEBOOK", "FILE"):
+            objects.append(obj)
+    return objects
+
+
+def _upload(
+    api_client: ApiClient, path: str, content: bytes, obj: dict[str, Any]
+) -> None:
+    logger.info(f"Uploading {obj['path']} to {path}")
+    if obj["object_type"] == "NOTEBOOK":
+        api_client.import_workspace(path, content, language=obj.get("language"))
+    else:
+        api_client.import_workspace(path, content, import_format="RAW")
+
+
+def _mkdirs(api_client: ApiClient, path: str, created_dirs: set[str]) -> None:
+    if path not in created_dirs:
+        api_client.mkdirs_workspace(path)
+        created_dirs.add(path)
+
+
+def _read_manifest(api_client: ApiClient, target: str) -> dict[str, Any]:
+    try:
+        content = api_client.export_workspace(f"{target}/{MANIFEST_NAME}")
+    except ApiClientError as err:
+        # Any other error must not be taken for a new folder, as it would
+        # start a new version history
+        if not err.not_found:
+            raise
+        logger.info(f"No snapshot manifest found in {target}")
+        return {}
+    return json.loads(content)  # type: ignore [no-any-return]
+
+
+def _write_manifest(
+    api_client: ApiClient, target: str, manifest: dict[str, Any]
+) -> None:
+    content = json.dumps(manifest, sort_keys=True, indent=2).encode()
+    api_client.import_workspace(
+        f"{target}/{MANIFEST_NAME}", content, import_format="RAW"
+    )
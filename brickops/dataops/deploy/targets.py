@@ -0,0 +1,166 @@
+"""Deploying the same flow to several workspaces at once.
+
+Workspaces are configured by name in .brickopscfg/config.yml:
+
+    workspaces:
+      west:
+        host: https://adb-1111.1.azuredatabricks.net
+        token_env: DATABRICKS_TOKEN_WEST
+        max_requests_per_second: 10
+      north:
+        host: https://adb-2222.2.azuredatabricks.net
+        secret_scope: deploy
+        secret_key: north-token
+
+The token is read from the environment variable token_env, or from the
+secret scope of the deploying workspace. All targets are deployed
+concurrently, each with its own connection pool and rate limiter.
+
+The repo is only checked out in the deploying workspace, so its git source
+is resolved once, and passed to each target as widgets.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks.api import set_rate_limit
+from brickops.databricks.context import get_dbutils
+from brickops.datamesh.cfg import get_config
+from brickops.tracing import bind_context
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from brickops.databricks.context import DbContext
+
+logger = logging.getLogger(__name__)
+
+# Comma separated workspace names, e.g. passed by a bulk deploy notebook
+TARGETS_WIDGET = "brickops_targets"
+GIT_WIDGETS = ("git_url", "git_branch", "git_commit", "git_path")
+
+
+@dataclass(frozen=True)
+class WorkspaceTarget:
+    """A workspace to deploy to."""
+
+    name: str
+    host: str
+    token: str = field(repr=False)
+    max_requests_per_second: float | None = None
+
+
+@dataclass
+class TargetsResult:
+    """Result of deploying to each target, or why it failed."""
+
+    results: dict[str, dict[str, Any]] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def workspace_targets(names: Iterable[str]) -> list[WorkspaceTarget]:
+    """Targets for workspace names configured under workspaces."""
+    config = get_config("workspaces") or {}
+    targets = []
+    for name in names:
+        if name not in config:
+            msg = f"Workspace {name} is not configured under workspaces"
+            raise ValueError(msg)
+        workspace = config[name]
+        targets.append(
+            WorkspaceTarget(
+                name=name,
+                host=workspace["host"].rstrip("/"),
+                token=_token(name, workspace),
+                max_requests_per_second=workspace.get("max_requests_per_second"),
+            )
+        )
+    return targets
+
+
+def requested_targets(
+    db_context: DbContext, targets: Iterable[str | WorkspaceTarget] | None
+) -> list[WorkspaceTarget]:
+    """Targets given as names or targets, or else in the brickops_targets widget."""
+    if targets is None:
+        widget = db_context.widgets.get(TARGETS_WIDGET, "")
+        targets = [name.strip() for name in widget.split(",") if name.strip()]
+    targets = list(targets)
+    names = [target for target in targets if isinstance(target, str)]
+    by_name = (
+        {target.name: target for target in workspace_targets(names)} if names else {}
+    )
+    return [
+        target if isinstance(target, WorkspaceTarget) else by_name[target]
+        for target in targets
+    ]
+
+
+def target_context(
+    db_context: DbContext, target: WorkspaceTarget, git_src: dict[str, Any]
+) -> DbContext:
+    """Context of the deploying notebook, pointed at the target workspace."""
+    return dataclasses.replace(
+        git_context(db_context, git_src), api_url=target.host, api_token=target.token
+    )
+
+
+def git_context(db_context: DbContext, git_src: dict[str, Any]) -> DbContext:
+    """Context with the git source as widgets, as in a deployed task."""
+    git_widgets = {key: git_src[key] for key in GIT_WIDGETS if git_src.get(key)}
+    return dataclasses.replace(
+        db_context, widgets={**db_context.widgets, **git_widgets}
+    )
+
+
+def deploy_to_targets(
+    deploy: Callable[[DbContext], dict[str, Any]],
+    db_context: DbContext,
+    targets: Iterable[WorkspaceTarget],
+    git_src: dict[str, Any],
+) -> TargetsResult:
+    """Call deploy with the context of each target, concurrently for all targets.
+
+    A failing target does not stop the others, its error is in the result."""
+    targets = list(targets)
+    for target in targets:
+        set_rate_limit(target.host, target.max_requests_per_second)
+
+    def deploy_target(target: WorkspaceTarget) -> dict[str, Any]:
+        return deploy(target_context(db_context, target, git_src))
+
+    result = TargetsResult()
+    with ThreadPoolExecutor(max_workers=max(len(targets), 1)) as executor:
+        futures = {
+            target.name: executor.submit(bind_context(deploy_target), target)
+            for target in targets
+        }
+        for name, future in futures.items():
+            try:
+                result.results[name] = future.result()
+            except Exception as err:  # noqa: BLE001
+                logger.error(f"Deploy to workspace {name} failed: {err!r}")
+                result.failed[name] = repr(err)
+    return result
+
+
+def _token(name: str, workspace: dict[str, Any]) -> str:
+    if token_env := workspace.get("token_env"):
+        if token := os.environ.get(token_env):
+            return token
+        msg = f"Token for workspace {name} not found in ${token_env}"
+        raise ValueError(msg)
+    if "secret_scope" in workspace:
+        return str(
+            get_dbutils().secrets.get(
+                scope=workspace["secret_scope"], key=workspace["secret_key"]
+            )
+        )
+    msg = f"Workspace {name} needs token_env, or secret_scope and secret_key"
+    raise ValueError(msg)
@@ -4,22 +4,40 @@ from typing import TYPE_CHECKING, Any
 
 from brickops.databricks.api import ApiClient
 from brickops.databricks.context import DbContext, get_context
+from brickops.dataops.runs import DEFAULT_TIMEOUT, JobRepair, JobRun
+from brickops.dataops.runs import wait as wait_for_run
 
 if TYPE_CHECKING:
     from databricks.sdk.runtime.dbutils_stub import dbutils as dbutils_type
 
+# Task results that are re-run by repair_run(), in addition to skipped tasks
+REPAIR_RESULT_STATES = {
+    "FAILED",
+    "TIMEDOUT",
+    "CANCELED",
+    "UPSTREAM_FAILED",
+    "UPSTREAM_CANCELED",
+    "MAXIMUM_CONCURRENT_RUNS_REACHED",
+}
+
 
 def run_job_by_name(
-    job_name: str, dbutils: dbutils_type | None = None
+    job_name: str,
+    dbutils: dbutils_type | None = None,
+    *,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
 ) -> dict[str, Any]:
-    """Run a databricks job by name."""
+    """Run a databricks job by name.
+
+    See run_job() for waiting for the run to finish."""
     db_context = get_context(dbutils)
     job = job_by_name(db_context, job_name=job_name)
     if not job:
         raise ValueError(f"Job {job_name} not found.")
 
     job_id = job["job_id"]
-    return run_job(db_context, job_id=job_id)
+    return run_job(db_context, job_id=job_id, wait=wait, timeout=timeout)
 
 
 def job_by_name(db_context: DbContext, job_name: str) -> dict[str, Any] | None:
@@ -28,7 +46,73 @@ def job_by_name(db_context: DbContext, job_name: str) -> dict[str, Any] | None:
     return api_client.get_job_by_name(job_name=job_name)
 
 
-def run_job(db_context: DbContext, job_id: str) -> dict[str, Any]:
-    """Run job by job_id."""
+def run_job(
+    db_context: DbContext,
+    job_id: str,
+    *,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, Any]:
+    """Run job by job_id.
+
+    The response contains the started run as `run`, which can be passed to
+    brickops.dataops.runs.wait_all(). With wait, the run is polled until it
+    finishes or timeout seconds have passed, and the RunResult is added as `result`.
+    """
     api_client = ApiClient(db_context.api_url, db_context.api_token)
-    return api_client.run_job_now(job_id=job_id)
+    response = api_client.run_job_now(job_id=job_id)
+    response["run"] = JobRun(response["run_id"])
+    if wait:
+        response["result"] = wait_for_run(response["run"], db_context, timeout=timeout)
+    return response
+
+
+def repair_run(
+    run_id: int,
+    db_context: DbContext | None = None,
+    *,
+    rerun_tasks: list[str] | None = None,
+    rerun_all_failed_tasks: bool = False,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, Any]:
+    """Re-run only the failed part of a job run.
+
+    Unless rerun_tasks is given, or rerun_all_failed_tasks is set to let
+    Databricks choose, the failed and skipped tasks of the run are re-run.
+    The response contains the repair as `run`, and with wait, the RunResult
+    of the repair as `result`, as for run_job().
+    """
+    if not db_context:
+        db_context = get_context()
+    api_client = ApiClient(db_context.api_url, db_context.api_token)
+    run = api_client.get_run(str(run_id), include_history=True)
+    if not rerun_tasks and not rerun_all_failed_tasks:
+        rerun_tasks = tasks_to_repair(run)
+        if not rerun_tasks:
+            raise ValueError(f"Run {run_id} has no failed or skipped tasks.")
+    response = api_client.repair_run(
+        str(run_id),
+        rerun_tasks=rerun_tasks,
+        rerun_all_failed_tasks=rerun_all_failed_tasks,
+        latest_repair_id=_latest_repair_id(run),
+    )
+    response["run"] = JobRepair(run_id, response["repair_id"])
+    if wait:
+        response["result"] = wait_for_run(response["run"], db_context, timeout=timeout)
+    return response
+
+
+def tasks_to_repair(run: dict[str, Any]) -> list[str]:
+    """Get the keys of the failed and skipped tasks of a run."""
+    return [
+        task["task_key"]
+        for task in run.get("tasks", [])
+        if task.get("state", {}).get("life_cycle_state") == "SKIPPED"
+        or task.get("state", {}).get("result_state") in REPAIR_RESULT_STATES
+    ]
+
+
+def _latest_repair_id(run: dict[str, Any]) -> str | None:
+    repairs = [r for r in run.get("repair_history", []) if r.get("type") == "REPAIR"]
+    return repairs[-1]["id"] if repairs else None
@@ -4,22 +4,43 @@ from typing import TYPE_CHECKING, Any
 
 from brickops.databricks.api import ApiClient
 from brickops.databricks.context import DbContext, get_context
+from brickops.dataops.runs import DEFAULT_TIMEOUT, PipelineUpdate
+from brickops.dataops.runs import wait as wait_for_run
 
 if TYPE_CHECKING:
     from databricks.sdk.runtime.dbutils_stub import dbutils as dbutils_type
 
 
 def run_pipeline_by_name(
-    pipeline_name: str, dbutils: dbutils_type | None = None
+    pipeline_name: str,
+    dbutils: dbutils_type | None = None,
+    *,
+    full_refresh: bool = False,
+    refresh_selection: list[str] | None = None,
+    full_refresh_selection: list[str] | None = None,
+    validate_only: bool = False,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
 ) -> dict[str, Any]:
-    """Run a databricks DLT pipeline by name."""
+    """Run a databricks DLT pipeline by name.
+
+    See run_pipeline() for the update and wait options."""
     db_context = get_context(dbutils)
     pipeline = pipeline_by_name(db_context, pipeline_name=pipeline_name)
     if not pipeline:
         raise ValueError(f"Pipeline {pipeline_name} not found.")
 
     pipeline_id = pipeline["pipeline_id"]
-    return run_pipeline(pipeline_id=pipeline_id, db_context=db_context)
+    return run_pipeline(
+        pipeline_id=pipeline_id,
+        db_context=db_context,
+        full_refresh=full_refresh,
+        refresh_selection=refresh_selection,
+        full_refresh_selection=full_refresh_selection,
+        validate_only=validate_only,
+        wait=wait,
+        timeout=timeout,
+    )
 
 
 def pipeline_by_name(
@@ -31,10 +52,42 @@ def pipeline_by_name(
 
 
 def run_pipeline(
-    pipeline_id: str, db_context: DbContext | None = None
+    pipeline_id: str,
+    db_context: DbContext | None = None,
+    *,
+    full_refresh: bool = False,
+    refresh_selection: list[str] | None = None,
+    full_refresh_selection: list[str] | None = None,
+    validate_only: bool = False,
+    wait: bool = False,
+    timeout: float = DEFAULT_TIMEOUT,
 ) -> dict[str, Any]:
-    """Run pipeline by pipeline_id."""
+    """Run pipeline by pipeline_id.
+
+    By default the update is incremental, only processing new data.
+    Set full_refresh to recompute all tables, or give the tables to refresh
+    in refresh_selection and/or full_refresh_selection, e.g. names from
+    brickops.datamesh.naming.tablename(). With validate_only the pipeline
+    is only validated, without updating any tables.
+
+    The response contains the started update as `run`, which can be passed to
+    brickops.dataops.runs.wait_all(). With wait, the update is polled until it
+    finishes or timeout seconds have passed, and the RunResult is added as `result`.
+    """
+    if full_refresh and (refresh_selection or full_refresh_selection):
+        msg = "full_refresh can not be combined with refresh selections"
+        raise ValueError(msg)
     if not db_context:
         db_context = get_context()
     api_client = ApiClient(db_context.api_url, db_context.api_token)
-    return api_client.run_pipeline_now(pipeline_id=pipeline_id)
+    response = api_client.run_pipeline_now(
+        pipeline_id=pipeline_id,
+        full_refresh=full_refresh,
+        refresh_selection=refresh_selection,
+        full_refresh_selection=full_refresh_selection,
+        validate_only=validate_only,
+    )
+    response["run"] = PipelineUpdate(pipeline_id, response["update_id"])
+    if wait:
+        response["result"] = wait_for_run(response["run"], db_context, timeout=timeout)
+    return response
@@ -0,0 +1,199 @@
+"""Waiting for job runs and pipeline updates to finish.
+
+All runs are watched by one poll scheduler, which polls each run with
+an interval that grows from min_interval to max_interval, so short runs
+are detected quickly, without hammering the API for long runs.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks.api import ApiClient
+from brickops.databricks.context import DbContext, get_context
+from brickops.timeutils import epoch_seconds, iso_seconds
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 3600.0
+DEFAULT_MIN_INTERVAL = 2.0
+DEFAULT_MAX_INTERVAL = 60.0
+DEFAULT_BACKOFF = 1.5
+
+TERMINAL_JOB_STATES = {"TERMINATED", "SKIPPED", "INTERNAL_ERROR"}
+TERMINAL_PIPELINE_STATES = {"COMPLETED", "FAILED", "CANCELED"}
+SUCCESS = "SUCCESS"
+COMPLETED = "COMPLETED"
+
+
+@dataclass(frozen=True)
+class JobRun:
+    """Reference to a job run."""
+
+    run_id: int
+
+
+@dataclass(frozen=True)
+class PipelineUpdate:
+    """Reference to a pipeline update."""
+
+    pipeline_id: str
+    update_id: str
+
+
+@dataclass(frozen=True)
+class JobRepair:
+    """Reference to a repair of a job run."""
+
+    run_id: int
+    repair_id: int
+
+
+Run = JobRun | PipelineUpdate | JobRepair
+
+
+@dataclass
+class RunResult:
+    """State of a run when it finished, or when waiting for it timed out.
+
+    Times are in epoch seconds, durations in seconds."""
+
+    run: Run
+    state: str
+    result_state: str | None
+    succeeded: bool
+    timed_out: bool = False
+    start_time: float | None = None
+    end_time: float | None = None
+    duration: float | None = None
+    waited: float = 0.0
+    polls: int = 0
+    details: dict[str, Any] = field(default_factory=dict, repr=False)
+
+
+def wait_all(
+    runs: Sequence[Run],
+    db_context: DbContext | None = None,
+    *,
+    timeout: float = DEFAULT_TIMEOUT,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    backoff: float = DEFAULT_BACKOFF,
+) -> list[RunResult]:
+    """Wait for all runs to finish, or for the timeout in seconds.
+
+    Returns a result for each run, in the same order as runs."""
+    if not db_context:
+        db_context = get_context()
+    api_client = ApiClient(db_context.api_url, db_context.api_token)
+
+    start = time.monotonic()
+    deadline = start + timeout
+    results: dict[int, RunResult] = {}
+    intervals = [min_interval] * len(runs)
+    polls = [0] * len(runs)
+    queue = [(start, idx) for idx in range(len(runs))]
+    heapq.heapify(queue)
+    while queue:
+        due, idx = heapq.heappop(queue)
+        if (delay := due - time.monotonic()) > 0:
+            time.sleep(delay)
+        polls[idx] += 1
+        now = time.monotonic()
+        result = poll_run(api_client, runs[idx])
+        result.waited = now - start
+        result.polls = polls[idx]
+        if is_terminal(result):
+            logger.info(f"{runs[idx]} finished with {result.result_state}")
+            results[idx] = result
+        elif now >= deadline:
+            logger.warning(f"Timed out waiting for {runs[idx]} in state {result.state}")
+            result.timed_out = True
+            results[idx] = result
+        else:
+            heapq.heappush(queue, (min(now + intervals[idx], deadline), idx))
+            intervals[idx] = min(intervals[idx] * backoff, max_interval)
+    return [results[idx] for idx in range(len(runs))]
+
+
+def wait(
+    run: Run,
+    db_context: DbContext | None = None,
+    *,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> RunResult:
+    """Wait for a single run to finish, or for the timeout in seconds."""
+    return wait_all([run], db_context, timeout=timeout)[0]
+
+
+def poll_run(api_client: ApiClient, run: Run) -> RunResult:
+    """Get the current state of a run."""
+    if isinstance(run, JobRun):
+        return _job_run_result(
+            run, api_client.get_run(str(run.run_id), all_tasks=False)
+        )
+    if isinstance(run, JobRepair):
+        details = api_client.get_run(
+            str(run.run_id), all_tasks=False, include_history=True
+        )
+        # The repair shows up in the history once it has been scheduled
+        repairs = [
+            r for r in details.get("repair_history", []) if r.get("id") == run.repair_id
+        ]
+        return _job_run_result(run, repairs[0] if repairs else {})
+    details = api_client.get_pipeline_update(run.pipeline_id, run.update_id)
+    # Updates have no end time, so it is taken from their last event once done
+    last_event = (
+        api_client.last_pipeline_update_event(run.pipeline_id, run.update_id)
+        if details.get("state") in TERMINAL_PIPELINE_STATES
+        else None
+    )
+    return _pipeline_update_result(run, details, last_event or {})
+
+
+def is_terminal(result: RunResult) -> bool:
+    if isinstance(result.run, (JobRun, JobRepair)):
+        return result.state in TERMINAL_JOB_STATES
+    return result.state in TERMINAL_PIPELINE_STATES
+
+
+def _job_run_result(run: JobRun | JobRepair, details: dict[str, Any]) -> RunResult:
+    state = details.get("state", {})
+    result_state = state.get("result_state")
+    start_time = epoch_seconds(details.get("start_time"))
+    end_time = epoch_seconds(details.get("end_time"))
+    return RunResult(
+        run=run,
+        state=state.get("life_cycle_state", ""),
+        result_state=result_state,
+        succeeded=result_state == SUCCESS,
+        start_time=start_time,
+        end_time=end_time,
+        duration=end_time - start_time if start_time and end_time else None,
+        details=details,
+    )
+
+
+def _pipeline_update_result(
+    run: PipelineUpdate, details: dict[str, Any], last_event: dict[str, Any]
+) -> RunResult:
+    state = details.get("state", "")
+    start_time = epoch_seconds(details.get("creation_time"))
+    end_time = iso_seconds(last_event.get("timestamp"))
+    return RunResult(
+        run=run,
+        state=state,
+        result_state=state if state in TERMINAL_PIPELINE_STATES else None,
+        succeeded=state == COMPLETED,
+        start_time=start_time,
+        end_time=end_time,
+        duration=end_time - start_time if start_time and end_time else None,
+        details=details,
+    )
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+
+def epoch_seconds(epoch_ms: int | None) -> float | None:
+    """Epoch milliseconds, as in most API responses, as epoch seconds."""
+    return epoch_ms / 1000 if epoch_ms else None
+
+
+def iso_seconds(timestamp: str | None) -> float | None:
+    """ISO 8601 timestamp, as in Lakeview and pipeline event responses, as epoch seconds."""
+    if not timestamp:
+        return None
+    # fromisoformat only accepts the Z suffix from python 3.11
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
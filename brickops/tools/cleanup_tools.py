@@ -1,18 +1,39 @@
+"""Cleanup of jobs and UC schemas left behind by development deployments.
+
+UC calls are independent of each other, so catalogs are listed and tables
+are deleted concurrently, with at most max_workers calls in flight.
+With a SQL warehouse, each schema is instead dropped with a single
+DROP SCHEMA ... CASCADE statement.
+"""
+
 import logging
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from typing import NamedTuple
 
-from brickops.databricks.api import ApiClient
+from brickops.databricks.api import ApiClient, ApiClientError
 from brickops.databricks.context import get_context
+from brickops.databricks.sql import execute, quote_identifier, resolve_warehouse
+from brickops.databricks.summaries import job_summaries, schema_summaries
 from brickops.databricks.username import get_username
+from brickops.datamesh.parsepath.parsename import parse_names
+from brickops.tracing import map_in_context
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_WORKERS = 8
+# Views are deleted before the tables they may depend on
+VIEW_TYPES = {"VIEW", "MATERIALIZED_VIEW", "METRIC_VIEW"}
+
 
 class Job(NamedTuple):
     """Represents a job in Databricks."""
 
     name: str
-    id: str
+    id: int
 
 
 def get_api_client() -> ApiClient:
@@ -22,14 +43,19 @@ def get_api_client() -> ApiClient:
 
 
 def get_jobs(api_client: ApiClient) -> list[Job]:
+    """Get all jobs deployed by the current user, parsed from the job name."""
     context = get_context()
     username = get_username(context)
-    jobs = api_client.get_jobs()
+    jobs = [
+        Job(job.name, job.job_id)
+        for job in job_summaries(api_client, fields=("name", "tags"))
+        if job.name and job.tags and "deployment" in job.tags
+    ]
+    parsed = parse_names({job.name for job in jobs}, "job")
     return [
-        Job(job["settings"]["name"], job["job_id"])
+        job
         for job in jobs
-        if "tags" in job["settings"]
-        and username in job["settings"]["tags"]["deployment"]
+        if (parsed_name := parsed[job.name]) and parsed_name.username == username
     ]
 
 
@@ -39,35 +65,204 @@ def delete_jobs(api_client: ApiClient, jobs: list[Job]) -> None:
         api_client.delete_job(job.id)
 
 
-def get_schemas(api_client: ApiClient) -> list[str]:
-    """Get all schemas that contain the username of the current user."""
+class CleanupProgress(NamedTuple):
+    """Progress of a cleanup, reported after each deletion."""
+
+    deleted: int
+    total: int
+    name: str
+
+
+@dataclass
+class CleanupResult:
+    """Result of deleting schemas."""
+
+    deleted: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+
+def get_schemas(
+    api_client: ApiClient, max_workers: int = DEFAULT_MAX_WORKERS
+) -> list[str]:
+    """Get all schemas deployed by the current user, parsed from the db name."""
     context = get_context()
     username = get_username(context)
-    catalogs = api_client.get_catalogs()
-    schemas = []
-    for catalog in catalogs:
-        schemas_in_catalog = api_client.get_schemas(catalog["name"])
-        schemas.extend(
-            [
-                schema["full_name"]
-                for schema in schemas_in_catalog
-                if username in schema["full_name"]
-            ]
+    catalogs = [catalog["name"] for catalog in api_client.get_catalogs()]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        schemas_in_catalogs = map_in_context(
+            executor,
+            lambda catalog: list(schema_summaries(api_client, catalog, ("name",))),
+            catalogs,
         )
-    return schemas
+    schemas = {
+        schema.full_name: schema.name
+        for schemas_in_catalog in schemas_in_catalogs
+        for schema in schemas_in_catalog
+        if schema.name
+    }
+    # The naming templates are compiled once for all the schema names
+    parsed = parse_names(set(schemas.values()), "db")
+    return [
+        full_name
+        for full_name, name in schemas.items()
+        if (parsed_name := parsed[name]) and parsed_name.username == username
+    ]
 
 
 def get_tables_for_schema(api_client: ApiClient, full_name: str) -> list[str]:
     """Find full name of all tables in a schema."""
     catalog, schema = full_name.split(".")
-    return [tbl["full_name"] for tbl in api_client.get_tables(catalog, schema)]
+    return [
+        tbl["full_name"]
+        for tbl in api_client.get_tables(
+            catalog, schema, omit_columns=True, omit_properties=True
+        )
+    ]
+
+
+def delete_schema(
+    api_client: ApiClient,
+    full_name: str,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    warehouse: str | None = None,
+) -> None:
+    """Delete a schema including all tables and volumes in it."""
+    result = delete_schemas(
+        api_client, [full_name], max_workers=max_workers, warehouse=warehouse
+    )
+    if result.failed:
+        msg = f"Failed to delete schema {full_name}: {result.failed}"
+        raise ApiClientError(msg)
+
+
+def delete_schemas(
+    api_client: ApiClient,
+    schemas: Iterable[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    progress: Callable[[CleanupProgress], None] | None = None,
+    warehouse: str | None = None,
+) -> CleanupResult:
+    """Delete schemas including all tables and volumes in them.
+
+    Schemas are cleaned up concurrently. Within a schema, views are deleted
+    before tables, and the schema itself once everything in it is gone.
+    Failures are collected in the result instead of stopping the cleanup;
+    a schema is kept when anything in it could not be deleted.
+    progress is called after each deletion, by default it logs the progress.
+
+    With warehouse, a SQL warehouse name or id, each schema is dropped with
+    DROP SCHEMA ... CASCADE, one statement per schema.
+    """
+    schemas = list(schemas)
+    tracker = _ProgressTracker(progress or _log_progress, total=len(schemas))
+    result = CleanupResult()
+    if warehouse:
+        warehouse_id = resolve_warehouse(api_client, warehouse)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            drop = partial(drop_schema, api_client, warehouse_id=warehouse_id)
+            list(
+                map_in_context(
+                    executor,
+                    partial(_delete, drop, tracker=tracker, result=result),
+                    schemas,
+                )
+            )
+        return result
+    # Separate pools, so schema workers never wait for a slot they hold themselves
+    with (
+        ThreadPoolExecutor(max_workers=max_workers) as schema_executor,
+        ThreadPoolExecutor(max_workers=max_workers) as object_executor,
+    ):
+        list(
+            map_in_context(
+                schema_executor,
+                lambda schema: _cleanup_schema(
+                    api_client, schema, object_executor, tracker, result
+                ),
+                schemas,
+            )
+        )
+    return result
+
+
+def drop_schema(api_client: ApiClient, full_name: str, warehouse_id: str) -> None:
+    """Drop a schema and everything in it with a single SQL statement."""
+    execute(
+        api_client,
+        f"DROP SCHEMA IF EXISTS {quote_identifier(full_name)} CASCADE",
+        warehouse_id=warehouse_id,
+    )
+
+
+class _ProgressTracker:
+    def __init__(self, callback: Callable[[CleanupProgress], None], total: int) -> None:
+        self.callback = callback
+        self.total = total
+        self.deleted = 0
+        self.lock = threading.Lock()
+
+    def add(self, count: int) -> None:
+        with self.lock:
+            self.total += count
+
+    def done(self, name: str) -> None:
+        with self.lock:
+            self.deleted += 1
+            self.callback(CleanupProgress(self.deleted, self.total, name))
+
+
+def _log_progress(progress: CleanupProgress) -> None:
+    logger.info(f"Deleted {progress.name} ({progress.deleted}/{progress.total})")
+
+
+def _cleanup_schema(
+    api_client: ApiClient,
+    full_name: str,
+    executor: ThreadPoolExecutor,
+    tracker: _ProgressTracker,
+    result: CleanupResult,
+) -> None:
+    catalog, schema = full_name.split(".")
+    try:
+        tables = api_client.get_tables(
+            catalog, schema, omit_columns=True, omit_properties=True
+        )
+        volumes = api_client.get_volumes(catalog, schema)
+    except ApiClientError as err:
+        result.failed[full_name] = err.message
+        return
+    views = [tbl["full_name"] for tbl in tables if tbl.get("table_type") in VIEW_TYPES]
+    others = [
+        tbl["full_name"] for tbl in tables if tbl.get("table_type") not in VIEW_TYPES
+    ]
+    tracker.add(len(tables) + len(volumes))
+
+    for delete, names in (
+        (api_client.delete_table, views),
+        (api_client.delete_table, others),
+        (api_client.delete_volume, [vol["full_name"] for vol in volumes]),
+    ):
+        deleted = map_in_context(
+            executor, partial(_delete, delete, tracker=tracker, result=result), names
+        )
+        if not all(list(deleted)):
+            logger.warning(f"Keeping schema {full_name}, not everything was deleted")
+            return
+
+    _delete(api_client.delete_schema, full_name, tracker, result)
 
 
-def delete_schema(api_client: ApiClient, full_name: str) -> None:
-    """Delete a schema including all tables in it."""
-    if tables := get_tables_for_schema(api_client, full_name):
-        for table in tables:
-            logger.info(f"Deleting {table}")
-            api_client.delete_table(table)
-    logger.info(f"Deleting schema={full_name}")
-    api_client.delete_schema(full_name)
+def _delete(
+    delete: Callable[[str], object],
+    name: str,
+    tracker: _ProgressTracker,
+    result: CleanupResult,
+) -> bool:
+    try:
+        delete(name)
+    except ApiClientError as err:
+        result.failed[name] = err.message
+        return False
+    result.deleted.append(name)
+    tracker.done(name)
+    return True
@@ -0,0 +1,530 @@
+"""Garbage collection of stale development deployments, for all users.
+
+Dev and test deployments are named and tagged with a deployment name,
+{env}_{username}_{gitbranch}_{gitshortref}. Jobs, pipelines, schemas,
+Lakeview dashboards and workspace snapshot folders are inventoried
+concurrently and grouped by deployment,
+from the deployment tag when the resource has tags, otherwise parsed from
+the resource name with the naming templates. Dashboards have no naming
+template, so the deployment name is searched for in their name.
+Prod resources are never touched.
+
+A deployment is stale when it is older than max_age_days, when its branch
+is not among the active branches, or when newer commits of the same branch
+by the same user are deployed. All resources of a stale deployment are
+deleted together, schemas including their tables and volumes. A deployment
+with a resource of unknown age is never stale, it is reported as unknown.
+
+In the snapshot folders of all jobs and pipelines, prod included, versions
+that no job or pipeline uses any more are deleted once they have been
+superseded for a while, so runs that started before can finish. The latest
+version in each folder is always kept.
+
+By default collect() only reports what would be deleted.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Any, NamedTuple
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.databricks.summaries import job_summaries, pipeline_summaries
+from brickops.datamesh.parsepath.parsename import compile_template, parse_name
+from brickops.dataops.deploy.snapshot import (
+    VERSION_PATTERN,
+    WORKSPACE_SOURCE,
+    snapshot_root,
+    synced_versions,
+)
+from brickops.gitutils import clean_branch
+from brickops.timeutils import epoch_seconds, iso_seconds
+from brickops.tools.cleanup_tools import DEFAULT_MAX_WORKERS, delete_schemas
+
+logger = logging.getLogger(__name__)
+
+JOB = "job"
+PIPELINE = "pipeline"
+SCHEMA = "schema"
+# Naming resource of schemas
+DB = "db"
+DASHBOARD = "dashboard"
+SNAPSHOT = "snapshot"
+DEFAULT_MAX_AGE_DAYS = 14.0
+DEFAULT_KEEP_COMMITS = 1
+DEFAULT_SNAPSHOT_GRACE_DAYS = 1.0
+DEV_ENVS = ("dev", "test")
+SECONDS_PER_DAY = 24 * 3600
+# Deployment tags, and the part of resource names identifying the deployment
+DEPLOYMENT_TEMPLATE = "{env}_{username}_{gitbranch}_{gitshortref}"
+# Parts of a deployment name, after the env
+DEPLOYMENT_PARTS = 4
+
+
+class Deployment(NamedTuple):
+    """A dev or test deployment, identified by its deployment name."""
+
+    env: str
+    username: str
+    gitbranch: str
+    gitshortref: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.env}_{self.username}_{self.gitbranch}_{self.gitshortref}"
+
+
+class Resource(NamedTuple):
+    """A deployed resource. created is in epoch seconds, None when unknown.
+
+    id is the job id for jobs, the pipeline and dashboard id, the full name of
+    schemas and the folder of snapshots."""
+
+    kind: str
+    id: int | str
+    name: str
+    deployment: Deployment
+    created: float | None
+
+
+@dataclass
+class RetentionPolicy:
+    """When deployments are stale.
+
+    active_branches, if given, are the branch names in the git remote;
+    deployments of any other branch are stale. keep_commits is the number
+    of latest commits kept per user and branch. Snapshot versions no job uses
+    are kept for snapshot_grace_days after they were superseded."""
+
+    max_age_days: float | None = DEFAULT_MAX_AGE_DAYS
+    active_branches: set[str] | None = None
+    keep_commits: int | None = DEFAULT_KEEP_COMMITS
+    snapshot_grace_days: float = DEFAULT_SNAPSHOT_GRACE_DAYS
+
+
+@dataclass
+class GcReport:
+    """Stale and kept deployments, and with dry_run=False, what was deleted.
+
+    unknown are the kept deployments with a resource of unknown age, and
+    superseded the snapshot versions no job uses any more."""
+
+    stale: dict[Deployment, list[Resource]] = field(default_factory=dict)
+    reasons: dict[Deployment, str] = field(default_factory=dict)
+    kept: dict[Deployment, list[Resource]] = field(default_factory=dict)
+    unknown: dict[Deployment, list[Resource]] = field(default_factory=dict)
+    superseded: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    dry_run: bool = True
+
+    def summary(self) -> str:
+        action = "Would delete" if self.dry_run else "Deleted"
+        lines = [
+            f"{action} {len(self.stale)} stale deployments, keeping {len(self.kept)}:"
+        ]
+        for deployment, resources in sorted(self.stale.items()):
+            kinds = ", ".join(f"{r.kind} {r.name}" for r in resources)
+            lines.append(f"  {deployment.name} ({self.reasons[deployment]}): {kinds}")
+        for deployment, resources in sorted(self.unknown.items()):
+            kinds = ", ".join(
+                f"{r.kind} {r.name}" for r in resources if r.created is None
+            )
+            lines.append(f"  {deployment.name} (kept, unknown age): {kinds}")
+        if self.superseded:
+            lines.append(
+                f"{action} {len(self.superseded)} superseded snapshot versions:"
+            )
+            lines.extend(f"  {path}" for path in self.superseded)
+        lines.extend(f"  failed: {name}: {msg}" for name, msg in self.failed.items())
+        return "\n".join(lines)
+
+
+def parse_deployment(name: str, resource: str | None = None) -> Deployment | None:
+    """Parse the deployment from a deployment tag or a resource name.
+
+    Names of resources with a naming template, i.e. job, pipeline and db,
+    are parsed with the configured template. Other names are searched for
+    a deployment name between underscores."""
+    if not resource:
+        return _search_deployment(name)
+    parsed = parse_name(name, resource)
+    if (
+        parsed
+        and parsed.env in DEV_ENVS
+        and parsed.username
+        and parsed.gitbranch
+        and parsed.gitshortref
+    ):
+        return Deployment(
+            parsed.env, parsed.username, parsed.gitbranch, parsed.gitshortref
+        )
+    return None
+
+
+def inventory(
+    api_client: ApiClient, max_workers: int = DEFAULT_MAX_WORKERS
+) -> list[Resource]:
+    """List the dev and test resources of all users concurrently."""
+    # Listings per kind run side by side, and fan out on a separate pool
+    with (
+        ThreadPoolExecutor(max_workers=5) as listings,
+        ThreadPoolExecutor(max_workers=max_workers) as executor,
+    ):
+        futures = [
+            listings.submit(_jobs, api_client),
+            listings.submit(_pipelines, api_client, executor),
+            listings.submit(_schemas, api_client, executor),
+            listings.submit(_dashboards, api_client),
+            listings.submit(_snapshots, api_client, executor),
+        ]
+        return [resource for future in futures for resource in future.result()]
+
+
+def classify(
+    resources: list[Resource],
+    policy: RetentionPolicy,
+    now: float | None = None,
+) -> tuple[dict[Deployment, list[Resource]], dict[Deployment, str]]:
+    """Group resources by deployment and find the stale deployments.
+
+    Returns all deployments with their resources, and the stale deployments
+    with the reason they are stale. Deployments with a resource of unknown
+    age are never stale, nor counted as newer commits."""
+    now = now or time.time()
+    deployments: dict[Deployment, list[Resource]] = {}
+    for resource in resources:
+        deployments.setdefault(resource.deployment, []).append(resource)
+    created: dict[Deployment, float] = {}
+    for deployment, items in deployments.items():
+        known = [r.created for r in items if r.created is not None]
+        if len(known) == len(items):
+            created[deployment] = max(known)
+
+    reasons: dict[Deployment, str] = {}
+    if policy.keep_commits is not None:
+        by_branch: dict[tuple[str, str, str], list[Deployment]] = {}
+        for deployment in created:
+            key = (deployment.env, deployment.username, deployment.gitbranch)
+            by_branch.setdefault(key, []).append(deployment)
+        for commits in by_branch.values():
+            commits.sort(key=created.__getitem__, reverse=True)
+            for deployment in commits[policy.keep_commits :]:
+                reasons[deployment] = "superseded by newer commit"
+    if policy.active_branches is not None:
+        active = {clean_branch(branch) for branch in policy.active_branches}
+        for deployment in created:
+            if deployment.gitbranch not in active:
+                reasons[deployment] = "branch deleted"
+    if policy.max_age_days is not None:
+        max_age = policy.max_age_days * SECONDS_PER_DAY
+        for deployment, deployment_created in created.items():
+            if now - deployment_created > max_age:
+                reasons[deployment] = f"older than {policy.max_age_days:g} days"
+    return deployments, reasons
+
+
+def superseded_snapshots(
+    api_client: ApiClient,
+    policy: RetentionPolicy | None = None,
+    *,
+    now: float | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> list[str]:
+    """Unused snapshot versions, superseded longer than the grace period ago.
+
+    A version is superseded when a newer version of the job or pipeline is
+    synced. The latest version in each folder is always kept, as are versions
+    that are not in the manifest of the folder, since their age is unknown."""
+    policy = policy or RetentionPolicy()
+    now = now or time.time()
+    grace = policy.snapshot_grace_days * SECONDS_PER_DAY
+    root = snapshot_root()
+    snapshot_folders = _list_folders(api_client, root)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_use = _snapshots_in_use(api_client, root, snapshot_folders, executor)
+        folders = list(
+            executor.map(
+                lambda folder: (
+                    _list_folders(api_client, folder),
+                    synced_versions(api_client, folder),
+                ),
+                snapshot_folders,
+            )
+        )
+    superseded = []
+    for versions, synced in folders:
+        order = sorted(synced, key=synced.__getitem__)
+        # Each version is superseded when the next one is synced
+        superseded_at = dict(zip(order, [synced[v] for v in order[1:]]))
+        for path in versions:
+            version = PurePosixPath(path).name
+            if not VERSION_PATTERN.match(version) or path in in_use:
+                continue
+            if (at := superseded_at.get(version)) is not None and now - at > grace:
+                superseded.append(path)
+    return superseded
+
+
+def collect(
+    api_client: ApiClient,
+    policy: RetentionPolicy | None = None,
+    *,
+    dry_run: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    warehouse: str | None = None,
+) -> GcReport:
+    """Find stale deployments, and unless dry_run, delete them.
+
+    Schemas are deleted with cleanup_tools.delete_schemas(), with
+    DROP SCHEMA ... CASCADE if a SQL warehouse is given."""
+    policy = policy or RetentionPolicy()
+    deployments, reasons = classify(inventory(api_client, max_workers), policy)
+    report = GcReport(dry_run=dry_run, reasons=reasons)
+    for deployment, resources in deployments.items():
+        target = report.stale if deployment in reasons else report.kept
+        target[deployment] = resources
+        if any(r.created is None for r in resources):
+            report.unknown[deployment] = resources
+    # Snapshot folders of stale deployments are deleted as a whole
+    stale_folders = {
+        r.id for items in report.stale.values() for r in items if r.kind == SNAPSHOT
+    }
+    report.superseded = [
+        path
+        for path in superseded_snapshots(api_client, policy, max_workers=max_workers)
+        if str(PurePosixPath(path).parent) not in stale_folders
+    ]
+    logger.info(report.summary())
+    if not dry_run:
+        _teardown(api_client, report, max_workers=max_workers, warehouse=warehouse)
+    return report
+
+
+def _teardown(
+    api_client: ApiClient,
+    report: GcReport,
+    *,
+    max_workers: int,
+    warehouse: str | None,
+) -> None:
+    stale = [r for resources in report.stale.values() for r in resources]
+    deletes: dict[str, Callable[[Any], object]] = {
+        JOB: api_client.delete_job,
+        PIPELINE: api_client.delete_pipeline,
+        DASHBOARD: api_client.delete_dashboard,
+        SNAPSHOT: lambda path: api_client.delete_workspace(path, recursive=True),
+    }
+    others = [(r.kind, r.id, r.name) for r in stale if r.kind in deletes]
+    others += [(SNAPSHOT, path, path) for path in report.superseded]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(
+            executor.map(
+                lambda other: _delete(deletes[other[0]], *other, report),
+                others,
+            )
+        )
+    schemas = [r.name for r in stale if r.kind == SCHEMA]
+    if schemas:
+        result = delete_schemas(
+            api_client, schemas, max_workers=max_workers, warehouse=warehouse
+        )
+        report.deleted.extend(name for name in result.deleted if name in schemas)
+        report.failed.update(result.failed)
+
+
+def _delete(
+    delete: Callable[[Any], object],
+    kind: str,
+    key: int | str,
+    name: str,
+    report: GcReport,
+) -> None:
+    logger.info(f"Deleting {kind} {name}")
+    try:
+        delete(key)
+    except ApiClientError as err:
+        report.failed[name] = err.message
+        return
+    report.deleted.append(name)
+
+
+def _jobs(api_client: ApiClient) -> list[Resource]:
+    resources = []
+    for job in job_summaries(api_client, fields=("name", "tags", "created_time")):
+        name = job.name or ""
+        tag = (job.tags or {}).get("deployment")
+        if deployment := (
+            parse_deployment(tag) if tag else parse_deployment(name, JOB)
+        ):
+            resources.append(
+                Resource(
+                    kind=JOB,
+                    id=job.job_id,
+                    name=name,
+                    deployment=deployment,
+                    created=epoch_seconds(job.created_time),
+                )
+            )
+    return resources
+
+
+def _pipelines(api_client: ApiClient, executor: ThreadPoolExecutor) -> list[Resource]:
+    # Only the details have tags, so only fetch them for dev pipelines
+    candidates = [
+        pipeline.pipeline_id
+        for pipeline in pipeline_summaries(api_client, fields=("name",))
+        if parse_deployment(pipeline.name or "", PIPELINE)
+    ]
+    details = executor.map(api_client.get_pipeline, candidates)
+    first_events = executor.map(api_client.first_pipeline_event, candidates)
+    resources = []
+    for pipeline, first_event in zip(details, first_events):
+        spec = pipeline.get("spec", {})
+        tag = spec.get("tags", {}).get("deployment")
+        if deployment := (
+            parse_deployment(tag)
+            if tag
+            else parse_deployment(pipeline["name"], PIPELINE)
+        ):
+            resources.append(
+                Resource(
+                    kind=PIPELINE,
+                    id=pipeline["pipeline_id"],
+                    name=pipeline["name"],
+                    deployment=deployment,
+                    created=_pipeline_created(first_event),
+                )
+            )
+    return resources
+
+
+def _schemas(api_client: ApiClient, executor: ThreadPoolExecutor) -> list[Resource]:
+    catalogs = [catalog["name"] for catalog in api_client.get_catalogs()]
+    return [
+        Resource(
+            kind=SCHEMA,
+            id=schema["full_name"],
+            name=schema["full_name"],
+            deployment=deployment,
+            created=epoch_seconds(schema.get("created_at")),
+        )
+        for schemas in executor.map(api_client.get_schemas, catalogs)
+        for schema in schemas
+        if (deployment := parse_deployment(schema["name"], DB))
+    ]
+
+
+def _dashboards(api_client: ApiClient) -> list[Resource]:
+    return [
+        Resource(
+            kind=DASHBOARD,
+            id=dashboard["dashboard_id"],
+            name=dashboard["display_name"],
+            deployment=deployment,
+            created=iso_seconds(dashboard.get("create_time")),
+        )
+        for dashboard in api_client.get_dashboards()
+        if (deployment := parse_deployment(dashboard.get("display_name", "")))
+    ]
+
+
+def _snapshots(api_client: ApiClient, executor: ThreadPoolExecutor) -> list[Resource]:
+    # Snapshot folders are named by job or pipeline, and only read for dev ones
+    folders = {
+        folder: deployment
+        for folder in _list_folders(api_client, snapshot_root())
+        if (
+            deployment := parse_deployment(PurePosixPath(folder).name, JOB)
+            or parse_deployment(PurePosixPath(folder).name, PIPELINE)
+        )
+    }
+    return [
+        Resource(
+            kind=SNAPSHOT,
+            id=folder,
+            name=folder,
+            deployment=deployment,
+            created=max(synced.values(), default=None),
+        )
+        for (folder, deployment), synced in zip(
+            folders.items(),
+            executor.map(lambda folder: synced_versions(api_client, folder), folders),
+        )
+    ]
+
+
+def _snapshots_in_use(
+    api_client: ApiClient,
+    root: str,
+    folders: list[str],
+    executor: ThreadPoolExecutor,
+) -> set[str]:
+    """Snapshot versions the tasks of any job or libraries of any pipeline point to."""
+    notebooks = [
+        task["notebook_task"]["notebook_path"]
+        for job in api_client.iter_jobs(expand_tasks=True)
+        for task in job.get("settings", {}).get("tasks", [])
+        if task.get("notebook_task", {}).get("source") == WORKSPACE_SOURCE
+    ]
+    # Only the details have libraries, so only fetch them for pipelines with a folder
+    names = {PurePosixPath(folder).name for folder in folders}
+    candidates = [
+        pipeline.pipeline_id
+        for pipeline in pipeline_summaries(api_client, fields=("name",))
+        if pipeline.name in names
+    ]
+    notebooks += [
+        library["notebook"]["path"]
+        for pipeline in executor.map(api_client.get_pipeline, candidates)
+        for library in pipeline.get("spec", {}).get("libraries", [])
+        if "notebook" in library
+    ]
+    in_use = set()
+    for notebook in notebooks:
+        path = PurePosixPath(notebook)
+        if not path.is_relative_to(root):
+            continue
+        # <root>/<name>/<version>/<notebook>
+        parts = path.relative_to(root).parts
+        if len(parts) > 2:
+            in_use.add(f"{root}/{parts[0]}/{parts[1]}")
+    return in_use
+
+
+def _list_folders(api_client: ApiClient, path: str) -> list[str]:
+    try:
+        objects = api_client.list_workspace(path)
+    except ApiClientError as err:
+        if not err.not_found:
+            raise
+        logger.info(f"No snapshots in {path}")
+        return []
+    return [obj["path"] for obj in objects if obj["object_type"] == "DIRECTORY"]
+
+
+def _pipeline_created(first_event: dict[str, Any] | None) -> float | None:
+    # Pipelines have no creation time, but their event log starts with the
+    # creation, unless it is no longer retained, which leaves the age unknown
+    if not first_event:
+        return None
+    user_action = first_event.get("details", {}).get("user_action", {})
+    if user_action.get("action") != "CREATE":
+        return None
+    return iso_seconds(first_event.get("timestamp"))
+
+
+def _search_deployment(name: str) -> Deployment | None:
+    parts = name.split("_")
+    for start, env in enumerate(parts):
+        if env not in DEV_ENVS:
+            continue
+        pattern = compile_template(DEPLOYMENT_TEMPLATE, env=env)
+        # The shortest match, as the next part may be e.g. a db name
+        for end in range(start + DEPLOYMENT_PARTS, len(parts) + 1):
+            if match := pattern.match("_".join(parts[start:end])):
+                return Deployment(env=env, **match.groupdict())
+    return None
@@ -0,0 +1,272 @@
+"""Cluster right-sizing and health thresholds from the run history of jobs.
+
+Jobs deployed by brickops are recognized by their `deployment` tag.
+Run durations are reported by the jobs API in milliseconds, while
+statistics and health rules here are in seconds.
+"""
+
+import logging
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, NamedTuple
+
+from brickops.databricks.api import ApiClient
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "SUCCESS"
+PHASES = ("queue", "setup", "execution", "cleanup")
+HEALTH_METRIC = "RUN_DURATION_SECONDS"
+DEFAULT_HEALTH_FACTOR = 1.5
+
+
+class DurationStats(NamedTuple):
+    """Duration percentiles in seconds."""
+
+    count: int
+    p50: float
+    p90: float
+    p95: float
+    max: float
+
+
+class ClusterRecommendation(NamedTuple):
+    """Recommended size of a cluster."""
+
+    num_workers: int
+    autoscale: dict[str, int]
+
+
+@dataclass
+class TaskRunStats:
+    """Duration statistics for a task across runs."""
+
+    task_key: str
+    execution: DurationStats
+    setup: DurationStats
+    queue: DurationStats
+    job_cluster_key: str | None = None
+
+
+@dataclass
+class JobRunStats:
+    """Duration statistics for a job across runs."""
+
+    job_id: int
+    job_name: str
+    run: DurationStats
+    setup: DurationStats
+    queue: DurationStats
+    tasks: dict[str, TaskRunStats] = field(default_factory=dict)
+
+
+def deployed_jobs(
+    api_client: ApiClient, deployment: str | None = None
+) -> list[dict[str, Any]]:
+    """Get jobs deployed by brickops, optionally only for one deployment, e.g. prod."""
+    return [
+        job
+        # Job clusters are only listed with the tasks
+        for job in api_client.get_jobs(expand_tasks=True)
+        if is_deployed(job["settings"].get("tags"), deployment)
+    ]
+
+
+def is_deployed(tags: dict[str, str] | None, deployment: str | None = None) -> bool:
+    """Whether job tags are of a job deployed by brickops, to the deployment if given."""
+    if not tags or "deployment" not in tags:
+        return False
+    return deployment in (None, tags["deployment"])
+
+
+def with_all_tasks(api_client: ApiClient, run: dict[str, Any]) -> dict[str, Any]:
+    """A listed run, fetched again if its tasks are truncated, as in large runs."""
+    return api_client.get_run(run["run_id"]) if run.get("has_more") else run
+
+
+def run_durations(run: dict[str, Any]) -> dict[str, float]:
+    """Durations of the phases of a run or task run, and its duration, in seconds."""
+    durations = {phase: _ms(run, f"{phase}_duration") for phase in PHASES}
+    # Multi task runs report run_duration, single task runs the three phases
+    durations["duration"] = _ms(run, "run_duration") or (
+        durations["setup"] + durations["execution"] + durations["cleanup"]
+    )
+    return durations
+
+
+def job_run_stats(
+    api_client: ApiClient, job: dict[str, Any], max_runs: int = 50
+) -> JobRunStats:
+    """Compute duration statistics from the latest successful runs of a job."""
+    runs = list(islice(_successful_runs(api_client, job["job_id"]), max_runs))
+    task_runs: dict[str, list[dict[str, Any]]] = {}
+    for run in runs:
+        for task in run.get("tasks", []):
+            task_runs.setdefault(task["task_key"], []).append(task)
+
+    return JobRunStats(
+        job_id=job["job_id"],
+        job_name=job["settings"]["name"],
+        run=duration_stats([run_durations(run)["duration"] for run in runs]),
+        setup=duration_stats([_ms(run, "setup_duration") for run in runs]),
+        queue=duration_stats([_ms(run, "queue_duration") for run in runs]),
+        tasks={
+            task_key: TaskRunStats(
+                task_key=task_key,
+                execution=duration_stats(
+                    [_ms(task, "execution_duration") for task in tasks]
+                ),
+                setup=duration_stats([_ms(task, "setup_duration") for task in tasks]),
+                queue=duration_stats([_ms(task, "queue_duration") for task in tasks]),
+                job_cluster_key=tasks[0].get("job_cluster_key"),
+            )
+            for task_key, tasks in task_runs.items()
+        },
+    )
+
+
+def duration_stats(durations: list[float]) -> DurationStats:
+    """Compute percentiles for a list of durations."""
+    values = sorted(durations)
+    return DurationStats(
+        count=len(values),
+        p50=percentile(values, 50),
+        p90=percentile(values, 90),
+        p95=percentile(values, 95),
+        max=values[-1] if values else 0.0,
+    )
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Percentile with linear interpolation between the closest ranks."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (
+        rank - low
+    )
+
+
+def recommend_cluster_size(
+    stats: DurationStats,
+    *,
+    num_workers: int,
+    target_duration_seconds: float | None = None,
+    max_workers_cap: int = 32,
+) -> ClusterRecommendation:
+    """Recommend num_workers and autoscale bounds for a cluster.
+
+    This is a heuristic, which assumes execution time scales roughly linearly
+    with the number of workers. With a target duration, the fixed size is
+    scaled so the median run meets the target. The autoscale upper bound
+    covers the spread between median and p95 runs.
+    """
+    workers = max(num_workers, 1)
+    if target_duration_seconds and stats.p50:
+        workers = math.ceil(workers * stats.p50 / target_duration_seconds)
+    workers = min(max(workers, 1), max_workers_cap)
+    spread = stats.p95 / stats.p50 if stats.p50 else 1.0
+    max_workers = min(max(workers, math.ceil(workers * spread)), max_workers_cap)
+    return ClusterRecommendation(
+        num_workers=workers,
+        autoscale={"min_workers": workers, "max_workers": max_workers},
+    )
+
+
+def recommend_job_clusters(
+    job: dict[str, Any],
+    stats: JobRunStats,
+    target_duration_seconds: float | None = None,
+) -> dict[str, ClusterRecommendation]:
+    """Recommend a size for each job cluster, from the slowest task using it."""
+    recommendations = {}
+    for job_cluster in job["settings"].get("job_clusters", []):
+        key = job_cluster["job_cluster_key"]
+        task_stats = [
+            task.execution
+            for task in stats.tasks.values()
+            if task.job_cluster_key == key
+        ]
+        if not task_stats:
+            continue
+        slowest = max(task_stats, key=lambda s: s.p50)
+        new_cluster = job_cluster.get("new_cluster", {})
+        num_workers = new_cluster.get(
+            "num_workers", new_cluster.get("autoscale", {}).get("min_workers", 1)
+        )
+        recommendations[key] = recommend_cluster_size(
+            slowest,
+            num_workers=num_workers,
+            target_duration_seconds=target_duration_seconds,
+        )
+    return recommendations
+
+
+def health_rules(
+    stats: JobRunStats, factor: float = DEFAULT_HEALTH_FACTOR
+) -> dict[str, Any]:
+    """Create RUN_DURATION_SECONDS health rules for a job and its tasks.
+
+    The threshold is the p95 duration times factor, so only clear regressions alert.
+    The result can be passed as health to autojob()."""
+    return {
+        "job": _health(stats.run, factor),
+        "tasks": {
+            task_key: _health(task.execution, factor)
+            for task_key, task in stats.tasks.items()
+            if task.execution.count
+        },
+    }
+
+
+def rightsizing_report(
+    api_client: ApiClient,
+    deployment: str | None = "prod",
+    max_runs: int = 50,
+    target_duration_seconds: float | None = None,
+) -> list[dict[str, Any]]:
+    """Run statistics, cluster recommendations and health rules for deployed jobs."""
+    report = []
+    for job in deployed_jobs(api_client, deployment=deployment):
+        logger.info(f"Collecting run history for job '{job['settings']['name']}'")
+        stats = job_run_stats(api_client, job, max_runs=max_runs)
+        if not stats.run.count:
+            continue
+        report.append(
+            {
+                "job_name": stats.job_name,
+                "job_id": stats.job_id,
+                "stats": stats,
+                "clusters": recommend_job_clusters(
+                    job, stats, target_duration_seconds=target_duration_seconds
+                ),
+                "health": health_rules(stats),
+            }
+        )
+    return report
+
+
+def _successful_runs(api_client: ApiClient, job_id: int) -> Iterator[dict[str, Any]]:
+    for run in api_client.list_job_runs(job_id):
+        if run.get("state", {}).get("result_state") == SUCCESS:
+            yield with_all_tasks(api_client, run)
+
+
+def _health(stats: DurationStats, factor: float) -> dict[str, Any]:
+    return {
+        "rules": [
+            {
+                "metric": HEALTH_METRIC,
+                "op": "GREATER_THAN",
+                "value": math.ceil(stats.p95 * factor),
+            }
+        ]
+    }
+
+
+def _ms(item: dict[str, Any], key: str) -> float:
+    return float(item.get(key) or 0) / 1000
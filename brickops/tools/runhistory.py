@@ -0,0 +1,392 @@
+"""Run history of deployed jobs, stored column by column, and reports on it.
+
+Each job run, and each task in it, is a row in a RunHistory. Every column
+is a typed array, and strings are stored as codes into the distinct values
+of their column, so a history of many runs takes little memory, and is
+saved to a single compact file.
+
+Runs are collected from jobs/runs/list for jobs with a `deployment` tag.
+Only completed runs are listed, so a run that started before the latest
+collected run may finish after it was collected. Each collect therefore
+lists the runs since lookback_days before the latest collected run of the
+job, and skips the runs already in the history.
+Durations are in seconds, times in epoch milliseconds as in the jobs API.
+
+Reports aggregate a column at a time, with map(), compress() and sorting
+keyed on the columns, so the loops over the rows run in C, not in Python.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import operator
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import compress, groupby, islice, repeat
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from brickops.databricks.summaries import JobSummary, job_summaries
+from brickops.datamesh.parsepath.parsename import parse_name
+from brickops.tools.rightsizing import (
+    SUCCESS,
+    DurationStats,
+    duration_stats,
+    is_deployed,
+    run_durations,
+    with_all_tasks,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from typing import TypeAlias
+
+    from brickops.databricks.api import ApiClient
+
+    Column: TypeAlias = "array[Any] | StringColumn"
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_LOOKBACK_DAYS = 2.0
+DAY_MS = 24 * 3600 * 1000
+STRING = "str"
+# Rows for the run itself have an empty task_key
+JOB_ROW = ""
+COLUMNS = {
+    "job_id": "q",
+    "run_id": "q",
+    "start_time": "q",
+    "job_name": STRING,
+    "domain": STRING,
+    "project": STRING,
+    "task_key": STRING,
+    "result_state": STRING,
+    "queue": "d",
+    "setup": "d",
+    "execution": "d",
+    "cleanup": "d",
+    "duration": "d",
+}
+DURATIONS = ("queue", "setup", "execution", "cleanup", "duration")
+
+
+class StringColumn:
+    """Column of strings, stored as codes into the distinct values."""
+
+    def __init__(self, values: Iterable[str] = (), codes: Iterable[int] = ()) -> None:
+        self.values = list(values)
+        self.index = {value: code for code, value in enumerate(self.values)}
+        self.codes = array("i", codes)
+
+    def append(self, value: str) -> None:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def code(self, value: str) -> int:
+        """Code of a value, or -1 when the column has no such value."""
+        return self.index.get(value, -1)
+
+    def __getitem__(self, idx: int) -> str:
+        return self.values[self.codes[idx]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class RunHistory:
+    """Runs and task runs of jobs, one typed column per field in COLUMNS."""
+
+    def __init__(self, columns: dict[str, Column] | None = None) -> None:
+        self.columns: dict[str, Column] = columns or {
+            name: StringColumn() if typecode == STRING else array(typecode)
+            for name, typecode in COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns["run_id"])
+
+    def append(self, row: dict[str, Any]) -> None:
+        for name, column in self.columns.items():
+            column.append(row[name])
+
+    def extend(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Values of a column, strings decoded."""
+        column = self.columns[name]
+        if isinstance(column, StringColumn):
+            return [column.values[code] for code in column.codes]
+        return column
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        names = list(self.columns)
+        for values in zip(*(self.column(name) for name in names)):
+            yield dict(zip(names, values))
+
+    def last_start_times(self) -> dict[int, int]:
+        """Start time of the latest run of each job in the history."""
+        latest: dict[int, int] = {}
+        for job_id, start_time in zip(
+            _numbers(self, "job_id"), _numbers(self, "start_time")
+        ):
+            if start_time > latest.get(job_id, -1):
+                latest[job_id] = start_time
+        return latest
+
+    def save(self, path: str | Path) -> None:
+        """Save as a JSON header line followed by the raw column arrays."""
+        path = Path(path)
+        header = {
+            "format": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "rows": len(self),
+            "strings": {
+                name: column.values
+                for name, column in self.columns.items()
+                if isinstance(column, StringColumn)
+            },
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            for column in self.columns.values():
+                data = column.codes if isinstance(column, StringColumn) else column
+                file.write(data.tobytes())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> RunHistory:
+        with Path(path).open("rb") as file:
+            header = json.loads(file.readline())
+            if header["format"] != FORMAT_VERSION:
+                msg = f"Unsupported run history format {header['format']} in {path}"
+                raise ValueError(msg)
+            columns: dict[str, Column] = {}
+            for name, typecode in COLUMNS.items():
+                data = array("i" if typecode == STRING else typecode)
+                data.frombytes(file.read(header["rows"] * data.itemsize))
+                if header["byteorder"] != sys.byteorder:
+                    data.byteswap()
+                columns[name] = (
+                    StringColumn(header["strings"][name], data)
+                    if typecode == STRING
+                    else data
+                )
+        return cls(columns)
+
+
+def collect_runs(
+    api_client: ApiClient,
+    history: RunHistory | None = None,
+    *,
+    deployment: str | None = "prod",
+    max_runs: int | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    lookback_days: float = DEFAULT_LOOKBACK_DAYS,
+) -> RunHistory:
+    """Add the completed runs of deployed jobs, which are not in the history yet.
+
+    The runs of each job are streamed page by page, concurrently for up to
+    max_workers jobs, back to lookback_days before the latest run already
+    collected. Runs still running when collected, which started longer than
+    that before, are missed. With deployment None, jobs of all deployments
+    are collected."""
+    history = history if history is not None else RunHistory()
+    jobs = [
+        job
+        for job in job_summaries(api_client, fields=("name", "tags"))
+        if is_deployed(job.tags, deployment)
+    ]
+    lookback = int(lookback_days * DAY_MS)
+    fetch = partial(
+        _job_rows,
+        api_client,
+        since={
+            job_id: start_time - lookback
+            for job_id, start_time in history.last_start_times().items()
+        },
+        known=set(_numbers(history, "run_id")),
+        max_runs=max_runs,
+    )
+    before = len(history)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for rows in executor.map(fetch, jobs):
+            history.extend(rows)
+    logger.info(f"Collected {len(history) - before} rows from {len(jobs)} jobs")
+    return history
+
+
+@dataclass
+class PerformanceRow:
+    """Duration statistics of a group of runs, in total and over time.
+
+    recent covers the last recent_days, baseline the runs before."""
+
+    group: dict[str, str]
+    stats: DurationStats
+    recent: DurationStats
+    baseline: DurationStats
+
+    @property
+    def change(self) -> float | None:
+        """Relative change of the median duration, recent against baseline."""
+        if not self.recent.count or not self.baseline.p50:
+            return None
+        return self.recent.p50 / self.baseline.p50 - 1
+
+
+def performance_report(
+    history: RunHistory,
+    *,
+    by: Sequence[str] = ("domain", "project"),
+    metric: str = "duration",
+    tasks: bool = False,
+    recent_days: float = 7,
+    now: float | None = None,
+    result_state: str | None = SUCCESS,
+) -> list[PerformanceRow]:
+    """Percentiles and trend of a duration metric, grouped by the columns in by.
+
+    By default, whole successful runs are grouped by domain and project.
+    With tasks, task runs are reported instead, grouped by task_key as well.
+    """
+    if metric not in DURATIONS:
+        msg = f"metric must be one of {DURATIONS}, not {metric}"
+        raise ValueError(msg)
+    by = [*by, "task_key"] if tasks and "task_key" not in by else list(by)
+    group_columns = [_strings(history, name) for name in by]
+    task_keys = _strings(history, "task_key")
+    states = _strings(history, "result_state")
+    cutoff = ((now if now is not None else time.time()) * 1000) - recent_days * DAY_MS
+
+    # Rows of task runs, or of whole runs, in the result state
+    selected: Iterable[bool] = map(
+        operator.ne if tasks else operator.eq,
+        task_keys.codes,
+        repeat(task_keys.code(JOB_ROW)),
+    )
+    if result_state:
+        selected = map(
+            operator.and_,
+            selected,
+            map(operator.eq, states.codes, repeat(states.code(result_state))),
+        )
+    # One code per row for its combination of group codes, and whether recent
+    codes: Iterable[int] = repeat(0)
+    for column in group_columns:
+        codes = map(
+            operator.add,
+            map(operator.mul, codes, repeat(len(column.values))),
+            column.codes,
+        )
+    is_recent = map(operator.ge, _numbers(history, "start_time"), repeat(cutoff))
+    keys = list(map(operator.add, map(operator.mul, codes, repeat(2)), is_recent))
+    groups = list(map(operator.floordiv, keys, repeat(2)))
+    rows = sorted(compress(range(len(history)), selected), key=keys.__getitem__)
+
+    values = _numbers(history, metric)
+    report = []
+    for group, group_rows in groupby(rows, key=groups.__getitem__):
+        # Sorted on the keys, so baseline rows come before recent rows
+        split = {
+            key % 2: list(map(values.__getitem__, same))
+            for key, same in groupby(group_rows, key=keys.__getitem__)
+        }
+        recent, baseline = split.get(1, []), split.get(0, [])
+        report.append(
+            PerformanceRow(
+                group=dict(zip(by, _decode(group, group_columns))),
+                stats=duration_stats(recent + baseline),
+                recent=duration_stats(recent),
+                baseline=duration_stats(baseline),
+            )
+        )
+    return report
+
+
+def regressions(
+    report: Iterable[PerformanceRow], threshold: float = 0.2
+) -> list[PerformanceRow]:
+    """Rows where the recent median is more than threshold slower, worst first."""
+    return sorted(
+        (row for row in report if row.change is not None and row.change > threshold),
+        key=lambda row: row.change or 0.0,
+        reverse=True,
+    )
+
+
+def _job_rows(
+    api_client: ApiClient,
+    job: JobSummary,
+    since: dict[int, int],
+    known: set[int],
+    max_runs: int | None,
+) -> list[dict[str, Any]]:
+    job_id = job.job_id
+    name = job.name or ""
+    parsed = parse_name(name, "job")
+    context = {
+        "job_id": job_id,
+        "job_name": name,
+        "domain": (parsed and parsed.domain) or "",
+        "project": (parsed and parsed.project) or "",
+    }
+    new_runs = (
+        listed
+        for listed in api_client.list_job_runs(
+            job_id, start_time_from=since.get(job_id)
+        )
+        if listed["run_id"] not in known
+    )
+    rows = []
+    for listed in islice(new_runs, max_runs):
+        run = with_all_tasks(api_client, listed)
+        run_context = {
+            **context,
+            "run_id": run["run_id"],
+            "start_time": run.get("start_time", 0),
+            "result_state": run.get("state", {}).get("result_state") or "",
+        }
+        rows.append({**run_context, "task_key": JOB_ROW, **run_durations(run)})
+        rows.extend(
+            {**run_context, "task_key": task["task_key"], **run_durations(task)}
+            for task in run.get("tasks", [])
+        )
+    return rows
+
+
+def _decode(group: int, columns: Sequence[StringColumn]) -> list[str]:
+    """Values of the columns from the combined code of a group."""
+    values = []
+    for column in reversed(columns):
+        group, code = divmod(group, len(column.values))
+        values.append(column.values[code])
+    return values[::-1]
+
+
+def _strings(history: RunHistory, name: str) -> StringColumn:
+    column = history.columns[name]
+    if not isinstance(column, StringColumn):
+        msg = f"Can only group by string columns, not {name}"
+        raise TypeError(msg)
+    return column
+
+
+def _numbers(history: RunHistory, name: str) -> array[Any]:
+    column = history.columns[name]
+    if isinstance(column, StringColumn):
+        msg = f"{name} is not a numeric column"
+        raise TypeError(msg)
+    return column
@@ -0,0 +1,222 @@
+"""Lightweight tracing of deploys and API calls.
+
+Spans are nested timings with attributes, e.g. the HTTP stub and status of
+an API call. Tracing is enabled for a block with the tracing() context
+manager, or for the whole process by setting BRICKOPS_TRACE to a file path.
+Finished spans are appended to the file as JSON lines, with OpenTelemetry
+field names (trace_id, span_id, parent_span_id, start_time_unix_nano, ...).
+
+When tracing is off, span() returns a shared no-op context manager.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from functools import partial, wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar, final
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor
+    from types import TracebackType
+
+ENV_VAR = "BRICKOPS_TRACE"
+
+Func = TypeVar("Func", bound="Callable[..., Any]")
+Ret = TypeVar("Ret")
+
+
+@dataclass
+class Span:
+    """A finished or running span. Times are in nanoseconds since the epoch."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    start_time_unix_nano: int
+    end_time_unix_nano: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_unix_nano or time.time_ns()
+        return (end - self.start_time_unix_nano) / 1e6
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+
+class Trace:
+    """Spans collected while tracing, optionally exported to a JSON lines file."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.trace_id = secrets.token_hex(16)
+        self.path = Path(path) if path else None
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if self.path:
+                with self.path.open("a") as file:
+                    file.write(json.dumps(span.__dict__, default=str) + "\n")
+
+    def breakdown(self) -> list[dict[str, Any]]:
+        """Timing of each span in start order, with its depth in the span tree."""
+        depth: dict[str | None, int] = {None: -1}
+        rows = []
+        for span in sorted(self.spans, key=lambda s: s.start_time_unix_nano):
+            depth[span.span_id] = depth.get(span.parent_span_id, -1) + 1
+            rows.append(
+                {
+                    "name": span.name,
+                    "depth": depth[span.span_id],
+                    "duration_ms": round(span.duration_ms, 3),
+                    "status": span.status,
+                    "attributes": span.attributes,
+                }
+            )
+        return rows
+
+
+_trace: ContextVar[Trace | None] = ContextVar("brickops_trace", default=None)
+_current: ContextVar[Span | None] = ContextVar("brickops_span", default=None)
+_process_trace: Trace | None = None
+
+
+@final
+class _NoopSpan:
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+    def set(self, **attributes: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, trace: Trace, name: str, attributes: dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> Span:
+        parent = _current.get()
+        self.span = Span(
+            name=self.name,
+            trace_id=self.trace.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent else None,
+            start_time_unix_nano=time.time_ns(),
+            attributes=self.attributes,
+        )
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.span.end_time_unix_nano = time.time_ns()
+        if exc_type:
+            self.span.status = "ERROR"
+            self.span.attributes["error"] = repr(exc)
+        _current.reset(self.token)
+        self.trace.finish(self.span)
+
+
+def active_trace() -> Trace | None:
+    """The trace spans are recorded to, if tracing is on."""
+    return _trace.get() or _env_trace()
+
+
+def span(name: str, **attributes: Any) -> _ActiveSpan | _NoopSpan:
+    """Time a block as a span, nested in the current span."""
+    trace = active_trace()
+    if trace is None:
+        return NOOP_SPAN
+    return _ActiveSpan(trace, name, attributes)
+
+
+def current_span() -> Span | _NoopSpan:
+    """The innermost running span, to add attributes to."""
+    return _current.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable[[Func], Func]:
+    """Decorator recording each call of a function as a span."""
+
+    def decorator(func: Func) -> Func:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore [return-value]
+
+    return decorator
+
+
+def bind_context(func: Callable[..., Ret]) -> Callable[..., Ret]:
+    """Bind func to a copy of the current context, for running in another thread.
+
+    Spans recorded by func then nest under the current span. Bind once for
+    each submit, as a context can only be entered by one thread at a time."""
+    return partial(copy_context().run, func)
+
+
+def map_in_context(
+    executor: Executor, func: Callable[..., Ret], *iterables: Iterable[Any]
+) -> Iterator[Ret]:
+    """Like executor.map, with each call bound to a copy of the current context."""
+    futures = [executor.submit(bind_context(func), *args) for args in zip(*iterables)]
+    return (future.result() for future in futures)
+
+
+@contextmanager
+def tracing(path: str | Path | None = None) -> Iterator[Trace]:
+    """Record spans in the block, and with path, export them as JSON lines.
+
+    Nested use joins the enclosing trace, so callers can ask for a
+    breakdown without losing spans for an outer trace."""
+    if (outer := _trace.get()) is not None:
+        yield outer
+        return
+    token = _trace.set(Trace(path))
+    try:
+        yield _trace.get()  # type: ignore [misc]
+    finally:
+        _trace.reset(token)
+
+
+def _env_trace() -> Trace | None:
+    global _process_trace
+    path = os.environ.get(ENV_VAR)
+    if not path:
+        return None
+    if _process_trace is None or _process_trace.path != Path(path):
+        _process_trace = Trace(path)
+    return _process_trace
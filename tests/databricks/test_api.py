@@ -48,11 +48,33 @@ def test_delete_job_with_requests_exception(requests_mock: Any) -> None:  # noqa
         "https://test.com/api/2.1/jobs/delete", exc=requests.exceptions.RequestException
     )
     with pytest.raises(ApiClientError) as exc:
-        client.delete_job(job_id="1")
+        client.delete_job(job_id=1)
 
     assert exc.value.message == "Api error while making POST call:"
 
 
+def test_api_client_error_tells_missing_resources(requests_mock: Any) -> None:
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.0/workspace/export",
+        status_code=404,
+        json={"error_code": "RESOURCE_DOES_NOT_EXIST"},
+    )
+    with pytest.raises(ApiClientError) as missing:
+        client.export_workspace("/Shared/missing")
+    assert missing.value.status_code == 404
+    assert missing.value.not_found
+
+    requests_mock.get(
+        "https://test.com/api/2.0/workspace/export",
+        status_code=403,
+        json={"error_code": "PERMISSION_DENIED"},
+    )
+    with pytest.raises(ApiClientError) as denied:
+        client.export_workspace("/Shared/missing")
+    assert not denied.value.not_found
+
+
 def test_delete_schema_with_requests_exception(requests_mock: Any) -> None:  # noqa: ANN401
     client = ApiClient("https://test.com", "test_token")
     schema_name = "test.schema.table"
@@ -77,3 +99,217 @@ def test_delete_table_with_requests_exception(requests_mock: Any) -> None:  # no
         client.delete_table(full_name=schema_name)
 
     assert exc.value.message == "Api error while making DELETE call:"
+
+
+def test_list_job_runs_streams_all_pages(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/runs/list",
+        json={"runs": [{"run_id": 1}], "next_page_token": "token"},
+    )
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/runs/list?page_token=token",
+        json={"runs": [{"run_id": 2}]},
+    )
+    assert list(client.list_job_runs(123)) == [{"run_id": 1}, {"run_id": 2}]
+
+
+def test_last_pipeline_update_event_stops_at_the_update(requests_mock: Any) -> None:
+    client = ApiClient("https://test.com", "test_token")
+    first = requests_mock.get(
+        "https://test.com/api/2.0/pipelines/p1/events",
+        json={
+            "events": [{"id": "e3", "origin": {"update_id": "u2"}}],
+            "next_page_token": "token",
+        },
+    )
+    second = requests_mock.get(
+        "https://test.com/api/2.0/pipelines/p1/events?page_token=token",
+        json={
+            "events": [
+                {"id": "e2", "origin": {"update_id": "u1"}},
+                {"id": "e1", "origin": {"update_id": "u1"}},
+            ],
+            "next_page_token": "more",
+        },
+    )
+    assert client.last_pipeline_update_event("p1", "u1") == {
+        "id": "e2",
+        "origin": {"update_id": "u1"},
+    }
+    assert first.last_request.qs["order_by"] == ["timestamp desc"]
+    assert second.call_count == 1
+
+
+def test_get_run_merges_task_pages(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/runs/get",
+        json={"run_id": 1, "tasks": [{"task_key": "a"}], "next_page_token": "token"},
+    )
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/runs/get?page_token=token",
+        json={"run_id": 1, "tasks": [{"task_key": "b"}]},
+    )
+    assert client.get_run("1") == {
+        "run_id": 1,
+        "tasks": [{"task_key": "a"}, {"task_key": "b"}],
+    }
+
+
+def test_get_job_merges_settings_pages(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/get",
+        json={
+            "job_id": 1,
+            "settings": {"name": "big", "tasks": [{"task_key": "a"}]},
+            "next_page_token": "token",
+        },
+    )
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/get?page_token=token",
+        json={
+            "job_id": 1,
+            "settings": {
+                "tasks": [{"task_key": "b"}],
+                "job_clusters": [{"job_cluster_key": "c"}],
+            },
+        },
+    )
+    assert client.get_job(1) == {
+        "job_id": 1,
+        "settings": {
+            "name": "big",
+            "tasks": [{"task_key": "a"}, {"task_key": "b"}],
+            "job_clusters": [{"job_cluster_key": "c"}],
+        },
+    }
+    assert [task["task_key"] for task in client.iter_job_tasks(1)] == ["a", "b"]
+
+
+def test_iter_jobs_fetches_truncated_tasks(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/list",
+        json={
+            "jobs": [
+                {"job_id": 1, "settings": {"tasks": [{"task_key": "a"}]}},
+                {
+                    "job_id": 2,
+                    "settings": {"tasks": [{"task_key": "a"}]},
+                    "has_more": True,
+                },
+            ]
+        },
+    )
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/get?job_id=2",
+        json={
+            "job_id": 2,
+            "settings": {"tasks": [{"task_key": "a"}, {"task_key": "b"}]},
+        },
+    )
+    jobs = list(client.iter_jobs(expand_tasks=True))
+    assert [len(job["settings"]["tasks"]) for job in jobs] == [1, 2]
+    assert "has_more" not in jobs[1]
+
+
+def test_export_workspace_decodes_content(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.0/workspace/export",
+        json={"content": "IyBEYXRhYnJpY2tz"},
+    )
+    assert client.export_workspace("/Shared/nb") == b"# Databricks"
+
+
+def test_run_pipeline_now_is_incremental_by_default(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post(
+        "https://test.com/api/2.0/pipelines/123/updates", json={"update_id": "1"}
+    )
+    client.run_pipeline_now("123")
+    assert requests_mock.last_request.json() == {
+        "full_refresh": False,
+        "validate_only": False,
+    }
+
+
+def test_run_pipeline_now_with_selections(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post(
+        "https://test.com/api/2.0/pipelines/123/updates", json={"update_id": "1"}
+    )
+    client.run_pipeline_now(
+        "123",
+        refresh_selection=["transport.revenue.daily"],
+        full_refresh_selection=["transport.revenue.totals"],
+    )
+    assert requests_mock.last_request.json() == {
+        "full_refresh": False,
+        "validate_only": False,
+        "refresh_selection": ["transport.revenue.daily"],
+        "full_refresh_selection": ["transport.revenue.totals"],
+    }
+
+
+def test_repair_run_reruns_given_tasks(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post(
+        "https://test.com/api/2.2/jobs/runs/repair", json={"repair_id": 7}
+    )
+    assert client.repair_run("1", rerun_tasks=["b"], latest_repair_id="5") == {
+        "repair_id": 7
+    }
+    assert requests_mock.last_request.json() == {
+        "run_id": "1",
+        "rerun_tasks": ["b"],
+        "rerun_dependent_tasks": True,
+        "latest_repair_id": "5",
+    }
+
+
+def test_submit_run(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post("https://test.com/api/2.1/jobs/runs/submit", json={"run_id": 3})
+    assert client.submit_run({"run_name": "run", "tasks": []}) == {"run_id": 3}
+    assert requests_mock.last_request.json() == {"run_name": "run", "tasks": []}
+
+
+def test_get_tables_slim_and_paged(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.1/unity-catalog/tables",
+        [
+            {"json": {"tables": [{"name": "a"}], "next_page_token": "p2"}},
+            {"json": {"tables": [{"name": "b"}]}},
+        ],
+    )
+    tables = client.get_tables(
+        "dev", "revenue", omit_columns=True, omit_properties=True, max_results=1
+    )
+    assert tables == [{"name": "a"}, {"name": "b"}]
+    assert requests_mock.request_history[0].qs == {
+        "catalog_name": ["dev"],
+        "schema_name": ["revenue"],
+        "omit_columns": ["true"],
+        "omit_properties": ["true"],
+        "max_results": ["1"],
+    }
+    assert requests_mock.request_history[1].qs["page_token"] == ["p2"]
+
+
+def test_get_table_summaries_with_patterns(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.1/unity-catalog/table-summaries",
+        json={"tables": [{"full_name": "dev.dev_x.a", "table_type": "MANAGED"}]},
+    )
+    assert client.get_table_summaries("dev", schema_name_pattern="dev_%") == [
+        {"full_name": "dev.dev_x.a", "table_type": "MANAGED"}
+    ]
+    assert requests_mock.last_request.qs == {
+        "catalog_name": ["dev"],
+        "schema_name_pattern": ["dev_%"],
+    }
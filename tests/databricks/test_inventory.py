@@ -0,0 +1,133 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.databricks.inventory import JOB, Inventory, RefreshStats
+
+HOST = "https://test.com"
+
+
+def _job(job_id: int, name: str) -> dict[str, Any]:
+    return {"job_id": job_id, "settings": {"name": name}}
+
+
+@pytest.fixture
+def inventory(tmp_path: Path) -> Inventory:
+    return Inventory(tmp_path / "inventory.db")
+
+
+def test_refresh_only_writes_changes(inventory: Inventory) -> None:
+    assert inventory.refresh(HOST, JOB, lambda: [_job(1, "a"), _job(2, "b")]) == (
+        RefreshStats(added=2, updated=0, deleted=0, unchanged=0)
+    )
+    assert inventory.refresh(HOST, JOB, lambda: [_job(1, "a"), _job(3, "c")]) == (
+        RefreshStats(added=1, updated=0, deleted=1, unchanged=1)
+    )
+    assert inventory.refresh(HOST, JOB, lambda: [_job(1, "x"), _job(3, "c")]) == (
+        RefreshStats(added=0, updated=1, deleted=0, unchanged=1)
+    )
+    assert inventory.lookup(HOST, JOB, "x", list) == [_job(1, "x")]
+
+
+def test_items_are_refreshed_when_stale_or_invalidated(
+    mocker: pytest_mock.plugin.MockerFixture, inventory: Inventory
+) -> None:
+    fetch = mocker.Mock(return_value=[_job(1, "a")])
+    assert inventory.items(HOST, JOB, fetch) == [_job(1, "a")]
+    assert inventory.items(HOST, JOB, fetch) == [_job(1, "a")]
+    assert fetch.call_count == 1
+
+    inventory.invalidate(HOST, JOB)
+    inventory.items(HOST, JOB, fetch)
+    assert fetch.call_count == 2
+
+    inventory.max_age = 0
+    inventory.items(HOST, JOB, fetch)
+    assert fetch.call_count == 3
+
+
+def test_inventory_is_shared_between_processes(tmp_path: Path) -> None:
+    Inventory(tmp_path / "inventory.db").refresh(HOST, JOB, lambda: [_job(1, "a")])
+    other = Inventory(tmp_path / "inventory.db")
+    assert other.items(HOST, JOB, list) == [_job(1, "a")]
+
+
+def test_api_client_reads_through_inventory(
+    requests_mock: Any,
+    inventory: Inventory,
+) -> None:
+    jobs = requests_mock.get(
+        "https://test.com/api/2.2/jobs/list",
+        json={"jobs": [_job(1, "revenue")]},
+    )
+    client = ApiClient(HOST, "test_token", inventory=inventory)
+    assert client.get_job_by_name("revenue") == _job(1, "revenue")
+    assert client.get_jobs() == [_job(1, "revenue")]
+    assert jobs.call_count == 1
+
+    # A warm start in another process does not call the API
+    other = ApiClient(HOST, "test_token", inventory=Inventory(inventory.path))
+    assert other.get_job_by_name("revenue") == _job(1, "revenue")
+    assert jobs.call_count == 1
+
+
+def test_api_client_falls_back_to_api_for_new_jobs(
+    requests_mock: Any,
+    inventory: Inventory,
+) -> None:
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/list", json={"jobs": [_job(1, "revenue")]}
+    )
+    requests_mock.get(
+        "https://test.com/api/2.1/jobs/list?name=new", json={"jobs": [_job(2, "new")]}
+    )
+    client = ApiClient(HOST, "test_token", inventory=inventory)
+    assert client.get_job_by_name("new") == _job(2, "new")
+
+
+def test_api_client_writes_changed_jobs_without_relisting(
+    requests_mock: Any,
+    inventory: Inventory,
+) -> None:
+    jobs = requests_mock.get(
+        "https://test.com/api/2.2/jobs/list", json={"jobs": [_job(1, "revenue")]}
+    )
+    requests_mock.post("https://test.com/api/2.1/jobs/create", json={"job_id": 2})
+    requests_mock.post("https://test.com/api/2.1/jobs/reset", json={})
+    requests_mock.post("https://test.com/api/2.1/jobs/delete", json={})
+    client = ApiClient(HOST, "test_token", inventory=inventory)
+    assert client.get_jobs() == [_job(1, "revenue")]
+
+    client.create_job("new", {"name": "new", "tasks": [{"task_key": "a"}]})
+    client.update_job(job_id="1", job_name="revenue", job_config={"name": "revenue"})
+    client.delete_job(1)
+    assert client.get_jobs() == [_job(2, "new")]
+    assert client.get_job_by_name("new") == _job(2, "new")
+    assert jobs.call_count == 1
+
+
+def test_api_client_forgets_jobs_deleted_elsewhere(
+    requests_mock: Any,
+    inventory: Inventory,
+) -> None:
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/list", json={"jobs": [_job(1, "revenue")]}
+    )
+    by_name = requests_mock.get("https://test.com/api/2.1/jobs/list", json={})
+    requests_mock.post(
+        "https://test.com/api/2.1/jobs/reset",
+        status_code=400,
+        json={"error_code": "RESOURCE_DOES_NOT_EXIST", "message": "No job 1"},
+    )
+    client = ApiClient(HOST, "test_token", inventory=inventory)
+    assert client.get_job_by_name("revenue") == _job(1, "revenue")
+
+    with pytest.raises(ApiClientError) as err:
+        client.update_job(job_id="1", job_name="revenue", job_config={})
+    assert err.value.not_found
+    # No longer served from the inventory, but looked up
+    assert client.get_job_by_name("revenue") is None
+    assert by_name.call_count == 1
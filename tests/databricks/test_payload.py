@@ -0,0 +1,63 @@
+import json
+from typing import Any
+
+from brickops.databricks.api import ApiClient
+from brickops.databricks.payload import Payload, request_body
+from brickops.dataops.deploy.job.buildconfig.job_config import defaultconfig
+from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import (
+    defaultconfig as default_pipeline_config,
+)
+
+
+def test_payload_is_canonical() -> None:
+    first = Payload.of({"name": "revenue", "tags": {"b": 2, "a": "æ"}})
+    second = Payload.of({"tags": {"a": "æ", "b": 2}, "name": "revenue"})
+    assert first.body == '{"name":"revenue","tags":{"a":"æ","b":2}}'.encode()
+    assert first.content_hash == second.content_hash
+    assert json.loads(str(first)) == first.data
+    assert Payload.of({"name": "other"}).content_hash != first.content_hash
+
+
+def test_config_payload_is_cached_until_changed() -> None:
+    job_config = defaultconfig()
+    job_config.name = "revenue"
+    payload = job_config.payload()
+    assert job_config.payload() is payload
+    assert payload.data == job_config.dict()
+    job_config.update({"max_concurrent_runs": 2})
+    assert job_config.payload() is not payload
+    assert job_config.payload().data["max_concurrent_runs"] == 2
+
+    pipeline_config = default_pipeline_config()
+    assert "pipeline_tasks" not in pipeline_config.payload().data
+    assert pipeline_config.payload() is pipeline_config.payload()
+
+
+def test_config_payload_is_frozen_until_an_attribute_is_set() -> None:
+    job_config = defaultconfig()
+    payload = job_config.payload()
+    job_config.tasks.append({"task_key": "ingest"})
+    assert job_config.payload() is payload
+    assert payload.data["tasks"] == []
+    job_config.tasks = job_config.tasks
+    assert job_config.payload().data["tasks"] == [{"task_key": "ingest"}]
+
+
+def test_request_body_reuses_payload_bytes() -> None:
+    payload = Payload.of({"name": "revenue"})
+    assert request_body(payload) is payload.body
+    assert request_body({"job_id": 1}) is None
+    body = request_body({"job_id": 1, "new_settings": payload})
+    assert body == b'{"job_id":1,"new_settings":{"name":"revenue"}}'
+
+
+def test_update_job_sends_payload_body(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    reset = requests_mock.post("https://test.com/api/2.1/jobs/reset", json={})
+    job_config = defaultconfig()
+    job_config.name = "revenue"
+    client.update_job(job_id="7", job_name="revenue", job_config=job_config.payload())
+    assert reset.last_request.body == (
+        b'{"job_id":"7","new_settings":' + job_config.payload().body + b"}"
+    )
+    assert reset.last_request.headers["Content-Type"] == "application/json"
@@ -0,0 +1,86 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.databricks.sql import execute, quote_identifier, resolve_warehouse
+
+HOST = "https://test.com/api/2.0"
+
+
+@pytest.fixture(autouse=True)
+def sleep(mocker: pytest_mock.plugin.MockerFixture) -> None:
+    mocker.patch("brickops.databricks.sql.time.sleep")
+
+
+@pytest.fixture
+def warehouses(requests_mock: Any) -> None:  # noqa: ANN401
+    requests_mock.get(
+        f"{HOST}/sql/warehouses",
+        json={"warehouses": [{"name": "cleanup", "id": "abc123"}]},
+    )
+
+
+def test_resolve_warehouse_by_name_or_id(warehouses: None) -> None:
+    client = ApiClient("https://test.com", "test_token")
+    assert resolve_warehouse(client, "cleanup") == "abc123"
+    assert resolve_warehouse(client, "def456") == "def456"
+
+
+def test_execute_polls_and_fetches_chunks(
+    requests_mock: Any,  # noqa: ANN401
+    warehouses: None,
+) -> None:
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post(
+        f"{HOST}/sql/statements",
+        json={"statement_id": "s1", "status": {"state": "PENDING"}},
+    )
+    requests_mock.get(
+        f"{HOST}/sql/statements/s1",
+        [
+            {"json": {"statement_id": "s1", "status": {"state": "RUNNING"}}},
+            {
+                "json": {
+                    "statement_id": "s1",
+                    "status": {"state": "SUCCEEDED"},
+                    "manifest": {"schema": {"columns": [{"name": "table_name"}]}},
+                    "result": {"data_array": [["daily"]], "next_chunk_index": 1},
+                }
+            },
+        ],
+    )
+    requests_mock.get(
+        f"{HOST}/sql/statements/s1/result/chunks/1",
+        json={"data_array": [["totals"]]},
+    )
+    result = execute(
+        client,
+        "SELECT table_name FROM system.information_schema.tables "
+        "WHERE table_schema = :schema",
+        warehouse="cleanup",
+        parameters={"schema": "revenue"},
+    )
+    assert result.columns == ["table_name"]
+    assert result.rows == [["daily"], ["totals"]]
+    assert requests_mock.request_history[1].json()["parameters"] == [
+        {"name": "schema", "value": "revenue"}
+    ]
+
+
+def test_execute_failed_statement_raises(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.post(
+        f"{HOST}/sql/statements",
+        json={
+            "statement_id": "s1",
+            "status": {"state": "FAILED", "error": {"message": "SCHEMA_NOT_FOUND"}},
+        },
+    )
+    with pytest.raises(ApiClientError, match="SCHEMA_NOT_FOUND"):
+        execute(client, "DROP SCHEMA dev.revenue", warehouse_id="abc123")
+
+
+def test_quote_identifier() -> None:
+    assert quote_identifier("dev.abirkhan_rev`enue") == "`dev`.`abirkhan_rev``enue`"
@@ -0,0 +1,79 @@
+from typing import Any
+
+import pytest
+
+from brickops.databricks.api import ApiClient
+from brickops.databricks.summaries import (
+    JobSummary,
+    SchemaSummary,
+    job_summaries,
+    schema_summaries,
+)
+
+
+def test_job_summaries_keep_only_requested_fields(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.2/jobs/list",
+        [
+            {
+                "json": {
+                    "jobs": [
+                        {
+                            "job_id": 1,
+                            "created_time": 1000,
+                            "settings": {
+                                "name": "job1",
+                                "tags": {"deployment": "prod"},
+                                "schedule": {"quartz_cron_expression": "0 0 * * * ?"},
+                            },
+                        }
+                    ],
+                    "next_page_token": "p2",
+                }
+            },
+            {"json": {"jobs": [{"job_id": 2, "settings": {"name": "job2"}}]}},
+        ],
+    )
+    summaries = list(job_summaries(client, fields=("name",)))
+    assert summaries == [JobSummary(1, name="job1"), JobSummary(2, name="job2")]
+    assert requests_mock.request_history[0].qs == {"expand_tasks": ["false"]}
+    assert requests_mock.request_history[1].qs["page_token"] == ["p2"]
+
+
+def test_schema_summaries(requests_mock: Any) -> None:  # noqa: ANN401
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get(
+        "https://test.com/api/2.1/unity-catalog/schemas",
+        [
+            {
+                "json": {
+                    "schemas": [
+                        {
+                            "full_name": "dev.revenue",
+                            "name": "revenue",
+                            "catalog_name": "dev",
+                            "owner": "jdoe",
+                            "created_at": 1000,
+                            "properties": {"a": "b"},
+                        }
+                    ],
+                    "next_page_token": "p2",
+                }
+            },
+            {"json": {"schemas": [{"full_name": "dev.sales"}]}},
+        ],
+    )
+    summaries = schema_summaries(client, "dev")
+    assert next(summaries) == SchemaSummary(
+        "dev.revenue", "revenue", "dev", "jdoe", 1000
+    )
+    # The next page is only fetched when consumed
+    assert requests_mock.call_count == 1
+    assert list(summaries) == [SchemaSummary("dev.sales")]
+
+
+def test_unknown_fields_raise() -> None:
+    client = ApiClient("https://test.com", "test_token")
+    with pytest.raises(ValueError, match="settings"):
+        next(job_summaries(client, fields=("settings",)))
@@ -4,11 +4,13 @@ import pytest_mock
 from typing import Any
 from brickops.databricks.context import DbContext
 from brickops.datamesh.naming import (
+    catname_from_path,
     dbname,
     tablename,
     jobname,
     pipelinename,
     name_from_path,
+    preresolved_names,
 )
 
 
@@ -225,3 +227,52 @@ def test_pipelinename(
 ) -> None:
     result = pipelinename(db_context=db_context, env="test")
     assert result == "domainfoo_projectfoo_test_TestUser_gitbranch_abcdefgh_dlt"
+
+
+def test_preresolved_names_are_read_from_widgets_without_api_calls(
+    db_context: DbContext,
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    git_source = mocker.patch("brickops.datamesh.naming.git_source")
+    db_context.widgets |= {
+        "brickops_catalog": "precat",
+        "brickops_db_revenue": "pre_revenue",
+        "brickops_db_template": "pre_{db}",
+    }
+    assert catname_from_path(db_context=db_context) == "precat"
+    assert (
+        dbname(db="revenue", cat="precat", db_context=db_context)
+        == "precat.pre_revenue"
+    )
+    assert (
+        tablename(tbl="tbl", db="other", db_context=db_context)
+        == "precat.pre_other.tbl"
+    )
+    git_source.assert_not_called()
+
+
+def test_preresolved_names_are_not_used_for_other_env(
+    db_context: DbContext,
+) -> None:
+    db_context.widgets |= {
+        "brickops_catalog": "precat",
+        "brickops_db_template": "pre_{db}",
+    }
+    result = dbname(db="test_db", cat="training", db_context=db_context, env="prod")
+    assert result == "training.test_db"
+
+
+def test_preresolved_names_match_runtime_names(db_context: DbContext) -> None:
+    names = preresolved_names(
+        db_context=db_context,
+        env="test",
+        git_src=db_context.widgets,
+        dbs=["revenue"],
+    )
+    assert names == {
+        "brickops_catalog": catname_from_path(db_context=db_context),
+        "brickops_db_template": "test_TestUser_gitbranch_abcdefgh_{db}",
+        "brickops_db_revenue": dbname(
+            db="revenue", cat="", db_context=db_context, prepend_cat=False
+        ),
+    }
@@ -0,0 +1,80 @@
+import pytest
+import pytest_mock
+
+from brickops.datamesh.parsepath.parsename import (
+    ParsedName,
+    compile_template,
+    parse_name,
+    parse_names,
+)
+
+
+def test_parse_dev_db_name() -> None:
+    assert parse_name("dev_jdoe_main_0e7768a7_revenue", "db") == ParsedName(
+        resource="db",
+        env="dev",
+        name="revenue",
+        username="jdoe",
+        gitbranch="main",
+        gitshortref="0e7768a7",
+    )
+
+
+def test_parse_prod_db_name_falls_back_to_prod_template() -> None:
+    assert parse_name("revenue", "db") == ParsedName(
+        resource="db", env="prod", name="revenue"
+    )
+
+
+def test_parse_job_names() -> None:
+    dev = parse_name("transport_taxinyc_dev_j_doe_main_0e7768a7", "job")
+    assert dev
+    assert (dev.domain, dev.project, dev.env, dev.username) == (
+        "transport",
+        "taxinyc",
+        "dev",
+        "j_doe",
+    )
+    prod = parse_name("transport_taxinyc_prod", "job")
+    assert prod
+    assert (prod.domain, prod.project, prod.env) == ("transport", "taxinyc", "prod")
+    assert parse_name("transport_taxinyc_test", "job") is None
+
+
+def test_parse_names_with_configured_templates(
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    mocker.patch(
+        "brickops.datamesh.cfg.read_config",
+        return_value={
+            "naming": {
+                "db": {
+                    "prod": "{domain}_{db}",
+                    "other": "{domain}_{env}_{username}_{gitshortref}_{db}",
+                }
+            }
+        },
+    )
+    parsed = parse_names(
+        ["sales_dev_jdoe_0e7768a7_customers", "sales_customers", "dev_customers"],
+        "db",
+    )
+    assert parsed["sales_dev_jdoe_0e7768a7_customers"] == ParsedName(
+        resource="db",
+        env="dev",
+        name="customers",
+        domain="sales",
+        username="jdoe",
+        gitshortref="0e7768a7",
+    )
+    assert parsed["sales_customers"] == ParsedName(
+        resource="db", env="prod", name="customers", domain="sales"
+    )
+
+
+@pytest.mark.parametrize(
+    ("name", "matches"),
+    [("dev_dev_x", True), ("dev_test_x", False)],
+)
+def test_repeated_variables_must_match(name: str, matches: bool) -> None:
+    assert bool(compile_template("{env}_{env}_{db}").match(name)) is matches
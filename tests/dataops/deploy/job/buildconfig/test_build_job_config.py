@@ -188,9 +188,28 @@ def test_that_values_from_yaml_is_set_correct_in_job_config(
             "name": "git_commit",
             "default": "abcdefgh123",
         },
+        {
+            "name": "brickops_catalog",
+            "default": "test",
+        },
+        {
+            "name": "brickops_db_template",
+            "default": "test_TestUser_gitbranch_abcdefgh_{db}",
+        },
     ]
     assert result.schedule == {
         "quartz_cron_expression": "0 0 20 * * ?",
         "pause_status": "UNPAUSED",
         "timezone_id": "Europe/Brussels",
     }
+
+
+def test_that_names_of_listed_schemas_are_set_as_parameters(
+    basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    basic_config["schemas"] = ["revenue"]
+    result = build_job_config(basic_config, env="test", db_context=db_context)
+    assert {
+        "name": "brickops_db_revenue",
+        "default": "test_TestUser_gitbranch_abcdefgh_revenue",
+    } in result.parameters
@@ -0,0 +1,121 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.job.buildconfig.clusters import job_compute_profile
+from brickops.dataops.deploy.job.buildconfig.enrichtasks import enrich_tasks
+from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig, defaultconfig
+
+COMPUTE_CONFIG = {
+    "compute": {
+        "job": {
+            "etl-cluster": {
+                "inherits": "common-job-cluster",
+                "env": {
+                    "prod": {
+                        "new_cluster": {
+                            "autoscale": {"min_workers": 2, "max_workers": 8},
+                            "node_type_id": "Standard_E8ads_v5",
+                            "runtime_engine": "PHOTON",
+                        }
+                    },
+                    "other": {
+                        "new_cluster": {"num_workers": 0},
+                    },
+                },
+            },
+            "fast-serverless": {
+                "serverless": True,
+                "performance_target": "PERFORMANCE_OPTIMIZED",
+            },
+            "loop-a": {"inherits": "loop-b"},
+            "loop-b": {"inherits": "loop-a"},
+        }
+    }
+}
+
+
+@pytest.fixture
+def compute_config(mocker: pytest_mock.plugin.MockerFixture) -> None:
+    mocker.patch("brickops.datamesh.cfg.read_config", return_value=COMPUTE_CONFIG)
+
+
+@pytest.fixture
+def job_config() -> JobConfig:
+    job_config = defaultconfig()
+    job_config.tasks = [
+        {
+            "task_key": "task_key",
+            "job_cluster_key": "etl-cluster",
+        }
+    ]
+    job_config.git_source = {"git_path": "test"}
+    return job_config
+
+
+@pytest.fixture
+def databricks_context_data() -> DbContext:
+    return DbContext(
+        api_url="api_url",
+        api_token="dummy",  # noqa: S106
+        username="username",
+        notebook_path="test/notebook_path",
+    )
+
+
+def test_that_builtin_profile_is_used_without_config() -> None:
+    profile = job_compute_profile("common-job-cluster", env="prod")
+    assert profile["new_cluster"]["num_workers"] == 1
+
+
+def test_that_prod_override_replaces_fixed_size_with_autoscale(
+    compute_config: None,
+) -> None:
+    cluster = job_compute_profile("etl-cluster", env="prod")["new_cluster"]
+    assert "num_workers" not in cluster
+    assert cluster["autoscale"] == {"min_workers": 2, "max_workers": 8}
+    assert cluster["runtime_engine"] == "PHOTON"
+    # Inherited from common-job-cluster
+    assert cluster["spark_version"] == "14.3.x-scala2.12"
+
+
+def test_that_other_override_is_used_for_unlisted_env(
+    compute_config: None,
+) -> None:
+    cluster = job_compute_profile("etl-cluster", env="test")["new_cluster"]
+    assert cluster["num_workers"] == 0
+    assert cluster["node_type_id"] == "Standard_D4ads_v5"
+    assert cluster["runtime_engine"] == "STANDARD"
+
+
+def test_that_unknown_profile_raises(compute_config: None) -> None:
+    with pytest.raises(ValueError, match="Unknown compute profile"):
+        job_compute_profile("does-not-exist", env="prod")
+
+
+def test_that_inheritance_cycle_raises(compute_config: None) -> None:
+    with pytest.raises(ValueError, match="cycle"):
+        job_compute_profile("loop-a", env="prod")
+
+
+def test_that_enrich_tasks_adds_env_specific_job_cluster(
+    compute_config: None, job_config: JobConfig, databricks_context_data: DbContext
+) -> None:
+    result = enrich_tasks(job_config, db_context=databricks_context_data, env="prod")
+    assert len(result.job_clusters) == 1
+    job_cluster: dict[str, Any] = result.job_clusters[0]
+    assert job_cluster["job_cluster_key"] == "etl-cluster"
+    assert job_cluster["new_cluster"]["runtime_engine"] == "PHOTON"
+
+
+def test_that_serverless_profile_removes_cluster_and_sets_performance_target(
+    compute_config: None, job_config: JobConfig, databricks_context_data: DbContext
+) -> None:
+    job_config.tasks[0]["job_cluster_key"] = "fast-serverless"
+    result = enrich_tasks(job_config, db_context=databricks_context_data, env="prod")
+    assert "job_cluster_key" not in result.tasks[0]
+    assert result.job_clusters == []
+    assert result.performance_target == "PERFORMANCE_OPTIMIZED"
+    assert result.dict()["performance_target"] == "PERFORMANCE_OPTIMIZED"
@@ -0,0 +1,52 @@
+from brickops.dataops.deploy.job.buildconfig.job_config import (
+    defaultconfig,
+    submit_config,
+)
+
+
+def test_submit_config_inlines_clusters_and_parameters() -> None:
+    job_config = defaultconfig()
+    job_config.name = "acme_transport_taxinyc_dev_abirkhan_branch_4c6799ab_revenue"
+    job_config.tags = {"deployment": "dev"}
+    job_config.performance_target = "PERFORMANCE_OPTIMIZED"
+    job_config.git_source = {"git_url": "git_url", "git_commit": "4c6799ab"}
+    job_config.job_clusters = [
+        {"job_cluster_key": "common-job-cluster", "new_cluster": {"num_workers": 0}}
+    ]
+    job_config.parameters = [
+        {"name": "pipeline_env", "default": "dev"},
+        {"name": "brickops_catalog", "default": "transport"},
+    ]
+    job_config.tasks = [
+        {
+            "task_key": "revenue",
+            "job_cluster_key": "common-job-cluster",
+            "notebook_task": {
+                "notebook_path": "flows/revenue/revenue",
+                "base_parameters": {"pipeline_env": "test", "table": "trips"},
+            },
+        },
+        {"task_key": "serverless", "spark_python_task": {"python_file": "x.py"}},
+    ]
+    assert submit_config(job_config) == {
+        "run_name": "acme_transport_taxinyc_dev_abirkhan_branch_4c6799ab_revenue",
+        "git_source": {"git_url": "git_url", "git_commit": "4c6799ab"},
+        "performance_target": "PERFORMANCE_OPTIMIZED",
+        "tasks": [
+            {
+                "task_key": "revenue",
+                "new_cluster": {"num_workers": 0},
+                "notebook_task": {
+                    "notebook_path": "flows/revenue/revenue",
+                    # Job parameters override base parameters, as in job runs
+                    "base_parameters": {
+                        "pipeline_env": "dev",
+                        "table": "trips",
+                        "brickops_catalog": "transport",
+                    },
+                },
+            },
+            {"task_key": "serverless", "spark_python_task": {"python_file": "x.py"}},
+        ],
+    }
+    assert job_config.tasks[0]["job_cluster_key"] == "common-job-cluster"
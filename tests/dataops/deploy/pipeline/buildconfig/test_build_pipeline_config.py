@@ -1,3 +1,4 @@
+import json
 from typing import Any
 import pytest
 
@@ -102,6 +103,20 @@ DEV_EXPECTED_CONFIG = {
         },
     ],
     "schema": "test_TestUser_gitbranch_abcdefgh_dltrevenue",
+    "configuration": {
+        "brickops.names": json.dumps(
+            {
+                "brickops_catalog": "domainfoo",
+                "brickops_db_dltrevenue": "test_TestUser_gitbranch_abcdefgh_dltrevenue",
+                "brickops_db_template": "test_TestUser_gitbranch_abcdefgh_{db}",
+                "git_branch": "git_branch",
+                "git_commit": "abcdefgh123",
+                "git_url": "git_url",
+                "pipeline_env": "test",
+            },
+            sort_keys=True,
+        )
+    },
     "tags": {
         "deployment": "test_TestUser_gitbranch_abcdefgh",
         "git_branch": "git_branch",
@@ -221,3 +236,16 @@ def test_values_from_yaml_is_set_correct_in_pipeline_config(
         "pause_status": "UNPAUSED",
         "timezone_id": "Europe/Brussels",
     }
+
+
+def test_listed_schemas_are_resolved_with_schema(
+    basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    basic_config["schemas"] = ["dltcost"]
+    result = build_pipeline_config(basic_config, env="test", db_context=db_context)
+    assert result.configuration is not None
+    names = json.loads(result.configuration["brickops.names"])
+    assert names["brickops_db_dltrevenue"] == (
+        "test_TestUser_gitbranch_abcdefgh_dltrevenue"
+    )
+    assert names["brickops_db_dltcost"] == "test_TestUser_gitbranch_abcdefgh_dltcost"
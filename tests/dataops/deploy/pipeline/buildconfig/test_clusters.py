@@ -0,0 +1,136 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.pipeline.buildconfig.build import build_pipeline_config
+from brickops.dataops.deploy.pipeline.buildconfig.clusters import (
+    pipeline_compute_profile,
+)
+
+COMPUTE_CONFIG = {
+    "compute": {
+        "pipeline": {
+            "default": {
+                "env": {
+                    "prod": {
+                        "serverless": False,
+                        "autoscale": {"min_workers": 1, "max_workers": 5},
+                        "trigger_interval": "5 minutes",
+                    },
+                },
+            },
+            "streaming": {
+                "inherits": "default",
+                "continuous": True,
+            },
+            "broken": {
+                "serverless": True,
+                "clusters": [{"label": "default", "num_workers": 2}],
+            },
+        }
+    }
+}
+
+
+@pytest.fixture
+def compute_config(mocker: pytest_mock.plugin.MockerFixture) -> None:
+    mocker.patch("brickops.datamesh.cfg.read_config", return_value=COMPUTE_CONFIG)
+
+
+@pytest.fixture
+def basic_config() -> dict[str, Any]:
+    return {
+        "pipeline_tasks": [
+            {
+                "pipeline_key": "revenue",
+            }
+        ],
+        "schema": "dltrevenue",
+        "git_source": {
+            "git_url": "git_url",
+            "git_branch": "git_branch",
+            "git_commit": "abcdefgh123",
+            "git_path": "/Repos/test@vlfk.no/dp-notebooks/",
+        },
+    }
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_token="token",  # noqa: S106
+        api_url="",
+        notebook_path="/Repos/test@vlfk.no/dp-notebooks/domains/domainfoo/projects/projectfoo/flows/prep/flowfoo",
+        username="TestUser@vlfk.no",
+        widgets={
+            "git_url": "git_url",
+            "git_branch": "git_branch",
+            "git_commit": "abcdefgh123",
+        },
+    )
+
+
+def test_default_profile_keeps_defaults_without_config() -> None:
+    assert pipeline_compute_profile("default", env="prod") == {}
+
+
+def test_prod_profile_expands_autoscale_and_trigger_interval(
+    compute_config: None,
+) -> None:
+    profile = pipeline_compute_profile("default", env="prod")
+    assert profile == {
+        "serverless": False,
+        "clusters": [
+            {
+                "label": "default",
+                "autoscale": {"mode": "ENHANCED", "min_workers": 1, "max_workers": 5},
+            }
+        ],
+        "configuration": {"pipelines.trigger.interval": "5 minutes"},
+    }
+
+
+def test_serverless_profile_with_clusters_raises(compute_config: None) -> None:
+    with pytest.raises(ValueError, match="serverless"):
+        pipeline_compute_profile("broken", env="prod")
+
+
+def test_build_pipeline_config_applies_default_profile_in_prod(
+    compute_config: None, basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    result = build_pipeline_config(basic_config, env="prod", db_context=db_context)
+    assert result.serverless is False
+    assert result.clusters is not None
+    assert result.clusters[0]["autoscale"]["mode"] == "ENHANCED"
+    assert result.configuration is not None
+    assert result.configuration["pipelines.trigger.interval"] == "5 minutes"
+
+
+def test_deployment_configuration_is_merged_over_profile(
+    compute_config: None, basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    basic_config["configuration"] = {"spark.sql.shuffle.partitions": "8"}
+    result = build_pipeline_config(basic_config, env="prod", db_context=db_context)
+    assert result.configuration is not None
+    assert result.configuration["pipelines.trigger.interval"] == "5 minutes"
+    assert result.configuration["spark.sql.shuffle.partitions"] == "8"
+
+
+def test_build_pipeline_config_keeps_serverless_in_test(
+    compute_config: None, basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    result = build_pipeline_config(basic_config, env="test", db_context=db_context)
+    assert result.serverless is True
+    assert result.clusters is None
+
+
+def test_deployment_config_overrides_named_profile(
+    compute_config: None, basic_config: dict[str, Any], db_context: DbContext
+) -> None:
+    basic_config["compute_profile"] = "streaming"
+    basic_config["photon"] = False
+    result = build_pipeline_config(basic_config, env="test", db_context=db_context)
+    assert result.continuous is True
+    assert result.photon is False
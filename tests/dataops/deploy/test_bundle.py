@@ -0,0 +1,121 @@
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import pytest
+import yaml
+
+from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.bundle import build_bundle, find_deployments
+
+GIT_SRC = {
+    "git_url": "git_url",
+    "git_branch": "main",
+    "git_commit": "abcdefgh123",
+    "git_path": "/Repos/test@vlfk.no/dp-notebooks/",
+}
+JOB = {
+    "tasks": [{"task_key": "ingest", "serverless": True}],
+    "permissions": [{"user_name": "ops@vlfk.no", "permission_level": "CAN_MANAGE"}],
+}
+PIPELINE = {
+    "pipeline_tasks": [{"pipeline_key": "trips"}],
+    "schema": "trips",
+    "source": "WORKSPACE",
+}
+
+
+def _write(root: Path, flow: str, cfg: Mapping[str, Any]) -> None:
+    folder = root / "domains/transport/projects/taxinyc/flows" / flow
+    folder.mkdir(parents=True)
+    (folder / "deployment.yml").write_text(yaml.safe_dump(cfg))
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    _write(tmp_path, "prep/revenue", JOB)
+    _write(tmp_path, "dlt/trips", PIPELINE)
+    return tmp_path
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_token="token",  # noqa: S106
+        api_url="",
+        notebook_path="/Repos/test@vlfk.no/dp-notebooks/tools/deploy/export_bundle",
+        username="TestUser@vlfk.no",
+    )
+
+
+def test_find_deployments(repo: Path) -> None:
+    assert [path.parent.name for path in find_deployments(repo)] == [
+        "trips",
+        "revenue",
+    ]
+
+
+def test_build_bundle_has_a_target_per_env(repo: Path, db_context: DbContext) -> None:
+    bundle = build_bundle(db_context, repo, bundle_name="dp", git_src=GIT_SRC)
+    assert bundle["bundle"] == {"name": "dp"}
+    assert list(bundle["targets"]) == ["dev", "prod"]
+    assert bundle["targets"]["dev"]["default"] is True
+    dev = bundle["targets"]["dev"]["resources"]
+    assert list(dev["jobs"]) == ["transport_taxinyc_dev_TestUser_main_abcdefgh"]
+    prod = bundle["targets"]["prod"]["resources"]
+    job = prod["jobs"]["transport_taxinyc_prod"]
+    assert job["name"] == "transport_taxinyc_prod"
+    assert job["git_source"]["git_commit"] == "abcdefgh123"
+    assert job["tasks"][0]["notebook_task"] == {
+        "notebook_path": "domains/transport/projects/taxinyc/flows/prep/revenue/ingest",
+        "source": "GIT",
+    }
+    assert job["permissions"] == [{"level": "CAN_MANAGE", "user_name": "ops@vlfk.no"}]
+    pipeline = prod["pipelines"]["transport_taxinyc_prod_dlt"]
+    assert pipeline["schema"] == "trips"
+    assert pipeline["libraries"] == [
+        {
+            "notebook": {
+                "path": "/Repos/test@vlfk.no/dp-notebooks/domains/transport/projects/taxinyc/flows/dlt/trips/trips"
+            }
+        }
+    ]
+
+
+def test_build_bundle_sets_run_as_from_config_or_for_dev(
+    repo: Path, db_context: DbContext
+) -> None:
+    bundle = build_bundle(db_context, repo, bundle_name="dp", git_src=GIT_SRC)
+    dev_job = bundle["targets"]["dev"]["resources"]["jobs"]
+    assert dev_job["transport_taxinyc_dev_TestUser_main_abcdefgh"]["run_as"] == {
+        "user_name": "TestUser@vlfk.no"
+    }
+    prod_job = bundle["targets"]["prod"]["resources"]["jobs"]["transport_taxinyc_prod"]
+    assert "run_as" not in prod_job
+
+    deployment = next(path for path in find_deployments(repo) if "revenue" in str(path))
+    run_as = {"service_principal_name": "sp-etl"}
+    deployment.write_text(yaml.safe_dump({**JOB, "run_as": run_as}))
+    bundle = build_bundle(db_context, repo, bundle_name="dp", git_src=GIT_SRC)
+    for target in bundle["targets"].values():
+        for job in target["resources"]["jobs"].values():
+            assert job["run_as"] == run_as
+
+
+def test_build_bundle_rejects_duplicate_names(
+    repo: Path, db_context: DbContext
+) -> None:
+    # Same domain and project gives the same job name
+    _write(repo, "prep/costs", JOB)
+    with pytest.raises(ValueError, match="transport_taxinyc_prod"):
+        build_bundle(db_context, repo, bundle_name="dp", envs=["prod"], git_src=GIT_SRC)
+
+
+def test_build_bundle_needs_a_repo_path(repo: Path, db_context: DbContext) -> None:
+    with pytest.raises(ValueError, match="repo path"):
+        build_bundle(
+            db_context,
+            repo,
+            bundle_name="dp",
+            git_src={**GIT_SRC, "git_path": None},
+        )
@@ -0,0 +1,171 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.dataops.deploy.permissions import (
+    JOBS,
+    current_acl,
+    declared_acl,
+    diff_acl,
+    sync_permissions,
+)
+
+ENGINEERS = ("group_name", "data-engineers")
+ANALYSTS = ("group_name", "analysts")
+OWNER = ("service_principal_name", "deployer")
+
+
+def permissions(*entries: tuple[tuple[str, str], str, bool]) -> dict[str, Any]:
+    return {
+        "access_control_list": [
+            {
+                principal[0]: principal[1],
+                "all_permissions": [
+                    {"permission_level": level, "inherited": inherited}
+                ],
+            }
+            for principal, level, inherited in entries
+        ]
+    }
+
+
+class FakePermissionsClient(ApiClient):
+    """In-memory direct ACLs of jobs, keyed by job id."""
+
+    def __init__(self: "FakePermissionsClient", acls: dict[str, Any]) -> None:
+        super().__init__("https://test.com", "test_token")
+        self.acls = acls
+        self.calls: list[tuple[str, str, list[dict[str, str]]]] = []
+
+    def get_job_permissions(
+        self: "FakePermissionsClient", job_id: str
+    ) -> dict[str, Any]:
+        if job_id not in self.acls:
+            raise ApiClientError(message="RESOURCE_DOES_NOT_EXIST")
+        return self.acls[job_id]  # type: ignore [no-any-return]
+
+    def update_permissions(
+        self: "FakePermissionsClient",
+        request_object_type: str,
+        request_object_id: str,
+        access_control_list: list[dict[str, str]],
+    ) -> dict[str, Any]:
+        self.calls.append(("PATCH", request_object_id, access_control_list))
+        return {}
+
+    def set_permissions(
+        self: "FakePermissionsClient",
+        request_object_type: str,
+        request_object_id: str,
+        access_control_list: list[dict[str, str]],
+    ) -> dict[str, Any]:
+        self.calls.append(("PUT", request_object_id, access_control_list))
+        return {}
+
+
+def test_declared_acl_combines_config_and_deployment(
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    mocker.patch(
+        "brickops.datamesh.cfg.read_config",
+        return_value={
+            "permissions": {
+                "jobs": [
+                    {"group_name": "data-engineers", "permission_level": "CAN_VIEW"},
+                    {"group_name": "analysts", "permission_level": "CAN_VIEW"},
+                ]
+            }
+        },
+    )
+    acl = declared_acl(
+        JOBS, [{"group_name": "data-engineers", "permission_level": "CAN_MANAGE"}]
+    )
+    assert acl == {ENGINEERS: "CAN_MANAGE", ANALYSTS: "CAN_VIEW"}
+
+
+def test_declared_acl_rejects_entry_without_principal() -> None:
+    with pytest.raises(ValueError, match="permission_level"):
+        declared_acl(JOBS, [{"permission_level": "CAN_VIEW"}])
+
+
+def test_current_acl_skips_inherited_permissions() -> None:
+    response = permissions(
+        (ENGINEERS, "CAN_VIEW", False), (("group_name", "admins"), "CAN_MANAGE", True)
+    )
+    assert current_acl(response) == {ENGINEERS: "CAN_VIEW"}
+
+
+def test_diff_acl_only_grants_what_differs() -> None:
+    change = diff_acl(
+        JOBS,
+        "1",
+        current={ENGINEERS: "CAN_VIEW", ANALYSTS: "CAN_VIEW"},
+        desired={ENGINEERS: "CAN_MANAGE_RUN", ANALYSTS: "CAN_VIEW"},
+    )
+    assert change.grant == {ENGINEERS: "CAN_MANAGE_RUN"}
+    assert change.revoke == []
+
+
+def test_exclusive_diff_revokes_undeclared_but_keeps_owner() -> None:
+    change = diff_acl(
+        JOBS,
+        "1",
+        current={ENGINEERS: "CAN_VIEW", ANALYSTS: "CAN_VIEW", OWNER: "IS_OWNER"},
+        desired={ENGINEERS: "CAN_VIEW"},
+        exclusive=True,
+    )
+    assert not change.grant
+    assert change.revoke == [ANALYSTS]
+    assert change.acl == {OWNER: "IS_OWNER", ENGINEERS: "CAN_VIEW"}
+
+
+def test_sync_permissions_updates_only_changed_objects() -> None:
+    client = FakePermissionsClient(
+        {
+            "1": permissions(
+                (ENGINEERS, "CAN_MANAGE_RUN", False), (ANALYSTS, "CAN_VIEW", False)
+            ),
+            "2": permissions((ANALYSTS, "CAN_VIEW", False)),
+        }
+    )
+    desired = {ENGINEERS: "CAN_MANAGE_RUN", ANALYSTS: "CAN_VIEW"}
+    result = sync_permissions(client, JOBS, ["1", "2", "3"], desired)
+
+    assert client.calls == [
+        (
+            "PATCH",
+            "2",
+            [{"group_name": "data-engineers", "permission_level": "CAN_MANAGE_RUN"}],
+        )
+    ]
+    assert [change.object_id for change in result.changed] == ["2"]
+    assert result.unchanged == ["1"]
+    assert list(result.failed) == ["3"]
+
+
+def test_sync_permissions_dry_run_makes_no_changes() -> None:
+    client = FakePermissionsClient({"1": permissions((ANALYSTS, "CAN_VIEW", False))})
+    result = sync_permissions(
+        client, JOBS, ["1"], {ENGINEERS: "CAN_VIEW"}, exclusive=True, dry_run=True
+    )
+    assert client.calls == []
+    assert result.changed[0].revoke == [ANALYSTS]
+
+
+def test_exclusive_sync_replaces_acl_in_one_call() -> None:
+    client = FakePermissionsClient(
+        {"1": permissions((ANALYSTS, "CAN_VIEW", False), (OWNER, "IS_OWNER", False))}
+    )
+    sync_permissions(client, JOBS, ["1"], {ENGINEERS: "CAN_VIEW"}, exclusive=True)
+    assert client.calls == [
+        (
+            "PUT",
+            "1",
+            [
+                {"group_name": "data-engineers", "permission_level": "CAN_VIEW"},
+                {"service_principal_name": "deployer", "permission_level": "IS_OWNER"},
+            ],
+        )
+    ]
@@ -0,0 +1,158 @@
+import threading
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.autojob import create_or_update_job
+from brickops.dataops.deploy.job.buildconfig.build import build_job_config
+from brickops.dataops.deploy.permissions import JOBS, PIPELINES
+from brickops.dataops.deploy.preflight import cluster_names, preflight
+
+GIT_SRC = {
+    "git_url": "git_url",
+    "git_provider": "github",
+    "git_branch": "main",
+    "git_commit": "abcdefgh123",
+    "git_path": "/Repos/test@vlfk.no/dp-notebooks/",
+}
+CFG = {
+    "tasks": [
+        {"task_key": "ingest", "existing_cluster_name": "shared"},
+        {"task_key": "report", "existing_cluster_name": "shared"},
+    ]
+}
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_token="token",  # noqa: S106
+        api_url="https://test.com",
+        notebook_path="/Repos/test@vlfk.no/dp-notebooks/domains/transport/projects/taxinyc/flows/prep/revenue/deploy",
+        username="TestUser@vlfk.no",
+    )
+
+
+@pytest.fixture
+def lookups(mocker: pytest_mock.plugin.MockerFixture) -> dict[str, Any]:
+    # Only passes when the git and cluster lookups run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def repos(*_: Any) -> dict[str, Any]:
+        barrier.wait()
+        return GIT_SRC
+
+    def clusters(*_: Any) -> list[dict[str, Any]]:
+        barrier.wait()
+        return [{"cluster_name": "shared", "cluster_id": "0101-abc"}]
+
+    return {
+        "git_source": mocker.patch(
+            "brickops.dataops.deploy.preflight.git_source", side_effect=repos
+        ),
+        "get_clusters": mocker.patch.object(
+            ApiClient, "get_clusters", side_effect=clusters
+        ),
+        "get_job_by_name": mocker.patch.object(
+            ApiClient, "get_job_by_name", return_value={"job_id": 7}
+        ),
+    }
+
+
+def test_preflight_looks_up_concurrently_and_once(
+    db_context: DbContext, lookups: dict[str, Any]
+) -> None:
+    checks = preflight(
+        db_context, object_type=JOBS, env="dev", clusters=cluster_names(CFG)
+    )
+    assert checks.git_src == GIT_SRC
+    assert checks.name == "transport_taxinyc_dev_TestUser_main_abcdefgh"
+    assert checks.cluster_ids == {"shared": "0101-abc"}
+    assert checks.existing == {"job_id": 7}
+    assert checks.knows(checks.name)
+    assert checks.db_context.widgets["git_commit"] == "abcdefgh123"
+    lookups["get_clusters"].assert_called_once()
+    lookups["get_job_by_name"].assert_called_once_with(job_name=checks.name)
+
+
+def test_build_from_preflight_makes_no_api_calls(
+    db_context: DbContext,
+    lookups: dict[str, Any],
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    checks = preflight(
+        db_context, object_type=JOBS, env="dev", clusters=cluster_names(CFG)
+    )
+    naming_git_source = mocker.patch("brickops.datamesh.naming.git_source")
+    job_config = build_job_config(
+        cfg={"tasks": [dict(task) for task in CFG["tasks"]], "git_source": GIT_SRC},
+        env="dev",
+        db_context=checks.db_context,
+        cluster_ids=checks.cluster_ids,
+    )
+    assert job_config.name == checks.name
+    assert [task["existing_cluster_id"] for task in job_config.tasks] == [
+        "0101-abc",
+        "0101-abc",
+    ]
+    naming_git_source.assert_not_called()
+    lookups["get_clusters"].assert_called_once()
+
+    update = mocker.patch.object(ApiClient, "update_job", return_value={})
+    response = create_or_update_job(checks.db_context, job_config, checks)
+    assert response == {"job_id": 7}
+    update.assert_called_once()
+    lookups["get_job_by_name"].assert_called_once()
+
+
+def test_job_deleted_since_the_lookup_is_created(
+    db_context: DbContext,
+    lookups: dict[str, Any],
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    checks = preflight(
+        db_context, object_type=JOBS, env="dev", clusters=cluster_names(CFG)
+    )
+    job_config = build_job_config(
+        cfg={"tasks": [dict(task) for task in CFG["tasks"]], "git_source": GIT_SRC},
+        env="dev",
+        db_context=checks.db_context,
+        cluster_ids=checks.cluster_ids,
+    )
+    mocker.patch.object(
+        ApiClient,
+        "update_job",
+        side_effect=ApiClientError(message="No job 7", status_code=404),
+    )
+    create = mocker.patch.object(ApiClient, "create_job", return_value={"job_id": 8})
+    assert create_or_update_job(checks.db_context, job_config, checks) == {"job_id": 8}
+    create.assert_called_once()
+
+
+def test_preflight_with_given_git_source(
+    db_context: DbContext, mocker: pytest_mock.plugin.MockerFixture
+) -> None:
+    git_source = mocker.patch("brickops.dataops.deploy.preflight.git_source")
+    get_pipeline = mocker.patch.object(
+        ApiClient, "get_pipeline_by_name", return_value=None
+    )
+    checks = preflight(db_context, object_type=PIPELINES, env="prod", git_src=GIT_SRC)
+    git_source.assert_not_called()
+    get_pipeline.assert_called_once_with(pipeline_name="transport_taxinyc_prod_dlt")
+    assert checks.existing is None
+    assert checks.knows("transport_taxinyc_prod_dlt")
+    assert not checks.knows("other")
+
+
+def test_preflight_without_existing(
+    db_context: DbContext, mocker: pytest_mock.plugin.MockerFixture
+) -> None:
+    get_job = mocker.patch.object(ApiClient, "get_job_by_name")
+    checks = preflight(
+        db_context, object_type=JOBS, env="prod", git_src=GIT_SRC, find_existing=False
+    )
+    get_job.assert_not_called()
+    assert not checks.knows(checks.name)
@@ -0,0 +1,211 @@
+from typing import Any
+
+import pytest
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.dataops.deploy.job.buildconfig.job_config import JobConfig, defaultconfig
+from brickops.dataops.deploy.pipeline.buildconfig.pipeline_config import (
+    defaultconfig as default_pipeline_config,
+)
+from brickops.dataops.deploy.snapshot import (
+    MANIFEST_NAME,
+    snapshot_libraries,
+    snapshot_tasks,
+    sync_folder,
+    synced_versions,
+)
+
+SOURCE = "/Repos/test@vlfk.no/dp-notebooks/domains/test/projects/project/flows/prep"
+FOLDER = "/Shared/brickops/snapshots/test_project_prod"
+TARGET = f"{FOLDER}/0123456789ab"
+
+
+class FakeWorkspaceClient(ApiClient):
+    """In-memory workspace, keyed by path."""
+
+    def __init__(self: "FakeWorkspaceClient") -> None:
+        super().__init__("https://test.com", "test_token")
+        self.files: dict[str, dict[str, Any]] = {}
+        self.exported: list[str] = []
+        self.imported: list[str] = []
+
+    def add(self: "FakeWorkspaceClient", path: str, content: bytes, ts: int) -> None:
+        self.files[path] = {
+            "path": path,
+            "object_type": "NOTEBOOK",
+            "language": "PYTHON",
+            "modified_at": ts,
+            "content": content,
+        }
+
+    def list_workspace(self: "FakeWorkspaceClient", path: str) -> list[dict[str, Any]]:
+        children = {}
+        for file_path, obj in self.files.items():
+            if not file_path.startswith(path + "/"):
+                continue
+            child, *rest = file_path[len(path) + 1 :].split("/")
+            if rest:
+                children[child] = {
+                    "path": f"{path}/{child}",
+                    "object_type": "DIRECTORY",
+                }
+            else:
+                children[child] = obj
+        return list(children.values())
+
+    def export_workspace(
+        self: "FakeWorkspaceClient", path: str, export_format: str = "SOURCE"
+    ) -> bytes:
+        if path not in self.files:
+            raise ApiClientError(message="RESOURCE_DOES_NOT_EXIST")
+        self.exported.append(path)
+        return self.files[path]["content"]  # type: ignore [no-any-return]
+
+    def import_workspace(
+        self: "FakeWorkspaceClient",
+        path: str,
+        content: bytes,
+        *,
+        import_format: str = "SOURCE",
+        language: str | None = None,
+        overwrite: bool = True,
+    ) -> dict[str, Any]:
+        self.imported.append(path)
+        self.add(path, content, ts=0)
+        return {}
+
+    def mkdirs_workspace(self: "FakeWorkspaceClient", path: str) -> dict[str, Any]:
+        return {}
+
+    def delete_workspace(
+        self: "FakeWorkspaceClient", path: str, recursive: bool = False
+    ) -> dict[str, Any]:
+        del self.files[path]
+        return {}
+
+
+@pytest.fixture
+def api_client() -> FakeWorkspaceClient:
+    client = FakeWorkspaceClient()
+    client.add(f"{SOURCE}/deploy", b"deploy", ts=1)
+    client.add(f"{SOURCE}/revenue", b"revenue", ts=1)
+    client.add(f"{SOURCE}/lib/helpers", b"helpers", ts=1)
+    return client
+
+
+def test_sync_folder_uploads_all_files_first_time(
+    api_client: FakeWorkspaceClient,
+) -> None:
+    result = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    assert sorted(result.uploaded) == ["deploy", "lib/helpers", "revenue"]
+    assert result.target == f"{FOLDER}/{result.version}"
+    assert api_client.files[f"{result.target}/lib/helpers"]["content"] == b"helpers"
+    # The manifest marking the version complete is written last
+    assert api_client.imported[-1] == f"{result.target}/{MANIFEST_NAME}"
+    assert list(synced_versions(api_client, FOLDER)) == [result.version]
+
+
+def test_sync_folder_reuses_unchanged_version(
+    api_client: FakeWorkspaceClient,
+) -> None:
+    first = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    api_client.exported.clear()
+    api_client.add(f"{SOURCE}/deploy", b"deploy", ts=2)  # touched, same content
+
+    result = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    assert result.target == first.target
+    assert result.uploaded == []
+    # lib/helpers is not modified, so it is not even exported
+    assert f"{SOURCE}/lib/helpers" not in api_client.exported
+
+
+def test_sync_folder_uploads_changes_to_new_version(
+    api_client: FakeWorkspaceClient,
+) -> None:
+    first = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    api_client.add(f"{SOURCE}/revenue", b"new revenue", ts=2)
+    del api_client.files[f"{SOURCE}/lib/helpers"]
+
+    result = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    assert result.target != first.target
+    assert sorted(result.uploaded) == ["deploy", "revenue"]
+    assert api_client.files[f"{result.target}/revenue"]["content"] == b"new revenue"
+    assert f"{result.target}/lib/helpers" not in api_client.files
+    # The version running jobs may still use is left as it is
+    assert api_client.files[f"{first.target}/revenue"]["content"] == b"revenue"
+    assert api_client.files[f"{first.target}/lib/helpers"]["content"] == b"helpers"
+    assert set(synced_versions(api_client, FOLDER)) == {first.version, result.version}
+
+
+def test_sync_folder_raises_when_manifest_can_not_be_read(
+    api_client: FakeWorkspaceClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first = sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    api_client.imported.clear()
+
+    def forbidden(path: str, export_format: str = "SOURCE") -> bytes:
+        raise ApiClientError(message="PERMISSION_DENIED", status_code=403)
+
+    monkeypatch.setattr(api_client, "export_workspace", forbidden)
+    with pytest.raises(ApiClientError):
+        sync_folder(api_client, source=SOURCE, folder=FOLDER)
+    # The version history is left as it is
+    assert api_client.imported == []
+    monkeypatch.undo()
+    assert list(synced_versions(api_client, FOLDER)) == [first.version]
+
+
+def test_sync_folder_reads_source_from_another_workspace(
+    api_client: FakeWorkspaceClient,
+) -> None:
+    target_client = FakeWorkspaceClient()
+    result = sync_folder(
+        target_client, source=SOURCE, folder=FOLDER, source_client=api_client
+    )
+    assert sorted(result.uploaded) == ["deploy", "lib/helpers", "revenue"]
+    assert target_client.files[f"{result.target}/revenue"]["content"] == b"revenue"
+    assert not any(path.startswith(FOLDER) for path in api_client.files)
+
+
+@pytest.fixture
+def job_config() -> JobConfig:
+    job_config = defaultconfig()
+    job_config.tasks = [
+        {
+            "task_key": "revenue",
+            "notebook_task": {
+                "notebook_path": "domains/test/projects/project/flows/prep/revenue",
+                "source": "GIT",
+            },
+        }
+    ]
+    return job_config
+
+
+def test_snapshot_tasks_points_tasks_to_snapshot(job_config: JobConfig) -> None:
+    result = snapshot_tasks(
+        job_config,
+        flow_folder="domains/test/projects/project/flows/prep",
+        target=TARGET,
+    )
+    assert result.tasks[0]["notebook_task"] == {
+        "notebook_path": f"{TARGET}/revenue",
+        "source": "WORKSPACE",
+    }
+
+
+def test_snapshot_tasks_raises_for_notebook_outside_flow(job_config: JobConfig) -> None:
+    with pytest.raises(ValueError, match="outside the"):
+        snapshot_tasks(job_config, flow_folder="domains/other", target=TARGET)
+
+
+def test_snapshot_libraries_points_notebooks_to_snapshot() -> None:
+    pipeline_config = default_pipeline_config()
+    pipeline_config.libraries = [{"notebook": {"path": f"{SOURCE}/revenue"}}]
+    payload = pipeline_config.payload()
+    result = snapshot_libraries(pipeline_config, source=SOURCE, target=TARGET)
+    assert result.libraries == [{"notebook": {"path": f"{TARGET}/revenue"}}]
+    assert result.payload() is not payload
+
+    with pytest.raises(ValueError, match="outside the"):
+        snapshot_libraries(pipeline_config, source="/Repos/other", target=TARGET)
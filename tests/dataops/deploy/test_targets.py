@@ -0,0 +1,126 @@
+import threading
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, RateLimiter
+from brickops.databricks.context import DbContext
+from brickops.dataops.deploy.targets import (
+    WorkspaceTarget,
+    deploy_to_targets,
+    requested_targets,
+    workspace_targets,
+)
+
+WORKSPACES = {
+    "workspaces": {
+        "west": {
+            "host": "https://west.test.com/",
+            "token_env": "TOKEN_WEST",
+            "max_requests_per_second": 10,
+        },
+        "north": {"host": "https://north.test.com", "token_env": "TOKEN_NORTH"},
+    }
+}
+GIT_SRC = {
+    "git_url": "git_url",
+    "git_branch": "main",
+    "git_commit": "abcdefgh123",
+    "git_path": "/Repos/test@vlfk.no/dp-notebooks/",
+}
+
+
+@pytest.fixture
+def workspaces(
+    mocker: pytest_mock.plugin.MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    mocker.patch("brickops.datamesh.cfg.read_config", return_value=WORKSPACES)
+    monkeypatch.setenv("TOKEN_WEST", "west_token")
+    monkeypatch.setenv("TOKEN_NORTH", "north_token")
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_token="token",  # noqa: S106
+        api_url="https://home.test.com",
+        notebook_path="/Repos/test@vlfk.no/dp-notebooks/domains/domainfoo/projects/projectfoo/flows/prep/flowfoo",
+        username="TestUser@vlfk.no",
+        widgets={"brickops_targets": "west, north"},
+    )
+
+
+def test_workspace_targets_from_config(workspaces: None) -> None:
+    west, north = workspace_targets(["west", "north"])
+    assert west == WorkspaceTarget(
+        "west", "https://west.test.com", "west_token", max_requests_per_second=10
+    )
+    assert north.token == "north_token"
+    assert "west_token" not in repr(west)
+
+
+def test_unknown_workspace_raises(workspaces: None) -> None:
+    with pytest.raises(ValueError, match="south"):
+        workspace_targets(["south"])
+
+
+def test_requested_targets_from_widget(workspaces: None, db_context: DbContext) -> None:
+    targets = requested_targets(db_context, None)
+    assert [target.name for target in targets] == ["west", "north"]
+    assert requested_targets(db_context, []) == []
+
+
+def test_deploy_to_targets_runs_concurrently_and_collects_failures(
+    workspaces: None, db_context: DbContext
+) -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    def deploy(target_context: DbContext) -> dict[str, Any]:
+        # Only passes when both targets are deployed at the same time
+        barrier.wait()
+        if target_context.api_url == "https://north.test.com":
+            msg = "north is down"
+            raise RuntimeError(msg)
+        return {
+            "host": target_context.api_url,
+            "token": target_context.api_token,
+            "git_commit": target_context.widgets["git_commit"],
+        }
+
+    result = deploy_to_targets(
+        deploy, db_context, requested_targets(db_context, None), GIT_SRC
+    )
+    assert result.results == {
+        "west": {
+            "host": "https://west.test.com",
+            "token": "west_token",
+            "git_commit": "abcdefgh123",
+        }
+    }
+    assert "north is down" in result.failed["north"]
+
+
+def test_clients_of_a_workspace_share_a_session() -> None:
+    first = ApiClient("https://west.test.com", "token")
+    second = ApiClient("https://west.test.com", "token")
+    other = ApiClient("https://north.test.com", "token")
+    assert first.session is second.session
+    assert first.session is not other.session
+
+
+def test_rate_limiter_spaces_out_requests(
+    mocker: pytest_mock.plugin.MockerFixture,
+) -> None:
+    monotonic = mocker.patch(
+        "brickops.databricks.api.time.monotonic", return_value=100.0
+    )
+    sleep = mocker.patch("brickops.databricks.api.time.sleep")
+    limiter = RateLimiter(per_second=4)
+    limiter.wait()
+    limiter.wait()
+    limiter.wait()
+    assert [call.args[0] for call in sleep.call_args_list] == [0.25, 0.5]
+    monotonic.return_value = 200.0
+    limiter.wait()
+    assert sleep.call_count == 2
@@ -0,0 +1,108 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient
+from brickops.databricks.context import DbContext
+from brickops.dataops.job import repair_run, tasks_to_repair
+from brickops.dataops.runs import JobRepair
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_url="api_url",
+        api_token="dummy",  # noqa: S106
+        username="username",
+        notebook_path="test/notebook_path",
+    )
+
+
+def _task(
+    task_key: str, life_cycle_state: str, result_state: str | None
+) -> dict[str, Any]:
+    state = {"life_cycle_state": life_cycle_state}
+    if result_state:
+        state["result_state"] = result_state
+    return {"task_key": task_key, "state": state}
+
+
+@pytest.fixture
+def failed_run() -> dict[str, Any]:
+    return {
+        "run_id": 1,
+        "tasks": [
+            _task("extract", "TERMINATED", "SUCCESS"),
+            _task("transform", "INTERNAL_ERROR", "FAILED"),
+            _task("load", "TERMINATED", "UPSTREAM_FAILED"),
+            _task("report", "SKIPPED", None),
+        ],
+        "repair_history": [
+            {"type": "ORIGINAL", "id": 10},
+            {"type": "REPAIR", "id": 11},
+        ],
+    }
+
+
+def test_tasks_to_repair_selects_failed_and_skipped(
+    failed_run: dict[str, Any],
+) -> None:
+    assert tasks_to_repair(failed_run) == ["transform", "load", "report"]
+
+
+def test_repair_run_reruns_failed_tasks_after_latest_repair(
+    mocker: pytest_mock.plugin.MockerFixture,
+    db_context: DbContext,
+    failed_run: dict[str, Any],
+) -> None:
+    mocker.patch.object(ApiClient, "get_run", return_value=failed_run)
+    repair = mocker.patch.object(
+        ApiClient, "repair_run", return_value={"repair_id": 12}
+    )
+    response = repair_run(1, db_context)
+    repair.assert_called_once_with(
+        "1",
+        rerun_tasks=["transform", "load", "report"],
+        rerun_all_failed_tasks=False,
+        latest_repair_id=11,
+    )
+    assert response["run"] == JobRepair(1, 12)
+
+
+def test_repair_run_without_failed_tasks_raises(
+    mocker: pytest_mock.plugin.MockerFixture, db_context: DbContext
+) -> None:
+    mocker.patch.object(
+        ApiClient,
+        "get_run",
+        return_value={"tasks": [_task("extract", "TERMINATED", "SUCCESS")]},
+    )
+    with pytest.raises(ValueError, match="no failed"):
+        repair_run(1, db_context)
+
+
+def test_repair_run_waits_for_repair(
+    mocker: pytest_mock.plugin.MockerFixture,
+    db_context: DbContext,
+    failed_run: dict[str, Any],
+) -> None:
+    mocker.patch("brickops.dataops.runs.time.sleep")
+    finished = {
+        **failed_run,
+        "repair_history": [
+            *failed_run["repair_history"],
+            {
+                "type": "REPAIR",
+                "id": 12,
+                "state": {"life_cycle_state": "TERMINATED", "result_state": "SUCCESS"},
+            },
+        ],
+    }
+    mocker.patch.object(
+        ApiClient, "get_run", side_effect=[failed_run, failed_run, finished]
+    )
+    mocker.patch.object(ApiClient, "repair_run", return_value={"repair_id": 12})
+    response = repair_run(1, db_context, wait=True)
+    assert response["result"].succeeded
+    assert response["result"].polls == 2
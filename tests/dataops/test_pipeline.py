@@ -0,0 +1,26 @@
+import pytest
+
+from brickops.databricks.context import DbContext
+from brickops.dataops.pipeline import run_pipeline
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_url="api_url",
+        api_token="dummy",  # noqa: S106
+        username="username",
+        notebook_path="test/notebook_path",
+    )
+
+
+def test_run_pipeline_full_refresh_with_selection_raises(
+    db_context: DbContext,
+) -> None:
+    with pytest.raises(ValueError, match="full_refresh"):
+        run_pipeline(
+            "123",
+            db_context=db_context,
+            full_refresh=True,
+            refresh_selection=["transport.revenue.daily"],
+        )
@@ -0,0 +1,102 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient
+from brickops.databricks.context import DbContext
+from brickops.dataops.runs import JobRun, PipelineUpdate, wait_all
+
+
+@pytest.fixture
+def db_context() -> DbContext:
+    return DbContext(
+        api_url="api_url",
+        api_token="dummy",  # noqa: S106
+        username="username",
+        notebook_path="test/notebook_path",
+    )
+
+
+@pytest.fixture
+def sleep(mocker: pytest_mock.plugin.MockerFixture) -> pytest_mock.MockType:
+    return mocker.patch("brickops.dataops.runs.time.sleep")
+
+
+def _job_run(life_cycle_state: str, result_state: str | None = None) -> dict[str, Any]:
+    state = {"life_cycle_state": life_cycle_state}
+    if result_state:
+        state["result_state"] = result_state
+    return {"state": state, "start_time": 1000, "end_time": 61000}
+
+
+def test_wait_all_polls_job_and_pipeline_until_terminal(
+    db_context: DbContext,
+    mocker: pytest_mock.plugin.MockerFixture,
+    sleep: pytest_mock.MockType,
+) -> None:
+    mocker.patch.object(
+        ApiClient,
+        "get_run",
+        side_effect=[
+            _job_run("RUNNING"),
+            _job_run("RUNNING"),
+            _job_run("TERMINATED", "SUCCESS"),
+        ],
+    )
+    mocker.patch.object(
+        ApiClient,
+        "get_pipeline_update",
+        side_effect=[
+            {"state": "RUNNING"},
+            {"state": "FAILED", "creation_time": 1_700_000_000_000},
+        ],
+    )
+    last_event = mocker.patch.object(
+        ApiClient,
+        "last_pipeline_update_event",
+        return_value={"timestamp": "2023-11-14T22:15:20.000Z"},
+    )
+    job_result, pipeline_result = wait_all(
+        [JobRun(1), PipelineUpdate("pipeline", "update")], db_context
+    )
+    assert job_result.succeeded
+    assert job_result.result_state == "SUCCESS"
+    assert job_result.duration == 60.0
+    assert job_result.polls == 3
+    assert not pipeline_result.succeeded
+    assert pipeline_result.result_state == "FAILED"
+    assert pipeline_result.polls == 2
+    assert pipeline_result.start_time == 1_700_000_000.0
+    assert pipeline_result.end_time == 1_700_000_120.0
+    assert pipeline_result.duration == 120.0
+    # Events are only fetched for the finished update
+    last_event.assert_called_once_with("pipeline", "update")
+
+
+def test_wait_all_backs_off_between_polls(
+    db_context: DbContext,
+    mocker: pytest_mock.plugin.MockerFixture,
+    sleep: pytest_mock.MockType,
+) -> None:
+    mocker.patch("brickops.dataops.runs.time.monotonic", return_value=0)
+    mocker.patch.object(
+        ApiClient,
+        "get_run",
+        side_effect=[_job_run("RUNNING")] * 3 + [_job_run("TERMINATED", "SUCCESS")],
+    )
+    wait_all([JobRun(1)], db_context, min_interval=2, backoff=2, max_interval=5)
+    # The clock is frozen, so the delays are the poll intervals
+    assert [call.args[0] for call in sleep.call_args_list] == [2, 4, 5]
+
+
+def test_wait_all_times_out(
+    db_context: DbContext,
+    mocker: pytest_mock.plugin.MockerFixture,
+    sleep: pytest_mock.MockType,
+) -> None:
+    mocker.patch.object(ApiClient, "get_run", return_value=_job_run("RUNNING"))
+    (result,) = wait_all([JobRun(1)], db_context, timeout=0)
+    assert result.timed_out
+    assert result.state == "RUNNING"
+    assert not result.succeeded
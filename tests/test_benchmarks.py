@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from benchmarks import harness
+from benchmarks.naming import CONFIGS, config_cases, main, naming_config, run_all
+
+
+def _result(name: str, score: float, alloc_bytes: int) -> harness.Result:
+    return harness.Result(
+        name=name, ops_per_sec=score * 1000, alloc_bytes=alloc_bytes, score=score
+    )
+
+
+def test_regressions_beyond_tolerance() -> None:
+    baseline = {
+        "fast": _result("fast", 1.0, 1000),
+        "lean": _result("lean", 1.0, 1000),
+    }
+    results = [
+        _result("fast", 0.5, 1050),
+        _result("lean", 0.9, 2000),
+        _result("new", 0.1, 10_000),
+    ]
+    found = harness.regressions(results, baseline)
+    assert found == [
+        "fast: score 0.5000, baseline 1.0000",
+        "lean: 2,000 bytes per call, baseline 1,000",
+    ]
+
+
+def test_baseline_roundtrips(tmp_path: Path) -> None:
+    path = tmp_path / "baseline.json"
+    assert harness.load_baseline(path) == {}
+    harness.save_baseline(path, [_result("case", 0.25, 1234)])
+    assert harness.load_baseline(path) == {"case": _result("case", 0.25, 1234)}
+
+
+def test_cases_use_the_naming_config() -> None:
+    with naming_config(CONFIGS["custom"]):
+        cases = dict(config_cases("custom"))
+        assert cases["custom/org/warm/tablename"]() == (
+            "acme_transport_taxinyc_dev."
+            "dev_TestUser_featurefasternames_0e7768a7_flows_prep_revenue_revenue.trips"
+        )
+        assert (
+            cases["custom/no-org/cold/catname_from_path"]() == "_transport_taxinyc_dev"
+        )
+
+
+def test_gate_fails_on_regression(tmp_path: Path) -> None:
+    results = run_all(lambda name: name.startswith("parsepath"), min_time=0.001)
+    assert [result.name for result in results] == ["parsepath/no-org", "parsepath/org"]
+    baseline = tmp_path / "baseline.json"
+    harness.save_baseline(
+        baseline,
+        [
+            harness.Result(
+                name=result.name,
+                ops_per_sec=result.ops_per_sec,
+                alloc_bytes=result.alloc_bytes // 10,
+                score=result.score,
+            )
+            for result in results
+        ],
+    )
+    args = ["-k", "parsepath", "--baseline", str(baseline), "--min-time", "0.001"]
+    assert main(args) == 1
+    assert main([*args, "--update"]) == 0
+    assert main([*args, "--speed-tolerance", "0.99"]) == 0
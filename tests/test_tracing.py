@@ -0,0 +1,119 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.tracing import (
+    ENV_VAR,
+    NOOP_SPAN,
+    active_trace,
+    current_span,
+    map_in_context,
+    span,
+    traced,
+    tracing,
+)
+
+
+def test_span_is_noop_without_tracing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(ENV_VAR, raising=False)
+    assert active_trace() is None
+    assert span("deploy") is NOOP_SPAN
+    with span("deploy"):
+        assert current_span() is NOOP_SPAN
+
+
+def test_nested_spans_are_recorded_with_depth() -> None:
+    @traced("inner")
+    def inner() -> None:
+        current_span().set(key="value")
+
+    with tracing() as trace:
+        with span("outer", step=1):
+            inner()
+        with span("second"):
+            pass
+
+    assert [(row["name"], row["depth"]) for row in trace.breakdown()] == [
+        ("outer", 0),
+        ("inner", 1),
+        ("second", 0),
+    ]
+    outer, inner_span = sorted(trace.spans, key=lambda s: s.start_time_unix_nano)[:2]
+    assert inner_span.parent_span_id == outer.span_id
+    assert inner_span.attributes == {"key": "value"}
+    assert outer.attributes == {"step": 1}
+
+
+def test_failed_span_has_error_status() -> None:
+    with tracing() as trace, pytest.raises(ValueError), span("failing"):
+        raise ValueError("boom")
+    assert trace.spans[0].status == "ERROR"
+    assert "boom" in trace.spans[0].attributes["error"]
+
+
+def test_nested_tracing_joins_outer_trace() -> None:
+    with tracing() as outer, tracing() as inner, span("step"):
+        pass
+    assert inner is outer
+    assert len(outer.spans) == 1
+
+
+def test_mapped_calls_nest_under_the_submitting_span() -> None:
+    @traced("task")
+    def task(value: int) -> int:
+        return value * 2
+
+    with (
+        tracing() as trace,
+        ThreadPoolExecutor(max_workers=2) as executor,
+        span("outer"),
+    ):
+        assert list(map_in_context(executor, task, [1, 2, 3])) == [2, 4, 6]
+
+    outer = next(s for s in trace.spans if s.name == "outer")
+    tasks = [s for s in trace.spans if s.name == "task"]
+    assert len(tasks) == 3
+    assert {s.parent_span_id for s in tasks} == {outer.span_id}
+
+
+def test_spans_are_exported_as_json_lines(tmp_path: Path) -> None:
+    path = tmp_path / "trace.jsonl"
+    with tracing(path) as trace, span("outer"), span("inner"):
+        pass
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["inner", "outer"]
+    assert {line["trace_id"] for line in lines} == {trace.trace_id}
+    assert lines[0]["parent_span_id"] == lines[1]["span_id"]
+    assert lines[0]["end_time_unix_nano"] >= lines[0]["start_time_unix_nano"]
+
+
+def test_env_var_enables_tracing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(ENV_VAR, str(path))
+    with span("deploy"):
+        pass
+    assert json.loads(path.read_text())["name"] == "deploy"
+
+
+def test_api_calls_are_traced_with_stub_and_status(
+    requests_mock: Any,  # noqa: ANN401
+) -> None:
+    client = ApiClient("https://test.com", "test_token")
+    requests_mock.get("https://test.com/api/2.1/jobs/get", json={"job_id": 1})
+    requests_mock.get("https://test.com/api/2.1/jobs/missing", status_code=404)
+    with tracing() as trace:
+        client.get("jobs/get")
+        with pytest.raises(ApiClientError):
+            client.get("jobs/missing")
+
+    ok, missing = trace.spans
+    assert ok.name == "api.GET"
+    assert ok.attributes == {"method": "GET", "stub": "jobs/get", "status_code": 200}
+    assert missing.status == "ERROR"
+    assert missing.attributes["status_code"] == 404
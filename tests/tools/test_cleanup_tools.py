@@ -0,0 +1,189 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.databricks.context import DbContext
+from brickops.tools.cleanup_tools import (
+    CleanupProgress,
+    delete_schema,
+    delete_schemas,
+    get_jobs,
+    get_schemas,
+)
+
+TABLES = {
+    "dev.abirkhan_revenue": [
+        {"full_name": "dev.abirkhan_revenue.daily", "table_type": "MANAGED"},
+        {"full_name": "dev.abirkhan_revenue.daily_v", "table_type": "VIEW"},
+    ],
+    "dev.abirkhan_trips": [
+        {"full_name": "dev.abirkhan_trips.trips", "table_type": "EXTERNAL"},
+    ],
+}
+
+
+@pytest.fixture
+def api_client(mocker: pytest_mock.plugin.MockerFixture) -> ApiClient:
+    api_client = ApiClient("https://test.com", "test_token")
+    mocker.patch.object(
+        api_client,
+        "get_tables",
+        side_effect=lambda catalog, schema, **_: TABLES[f"{catalog}.{schema}"],
+    )
+    mocker.patch.object(
+        api_client,
+        "get_volumes",
+        side_effect=lambda catalog, schema: (
+            [{"full_name": "dev.abirkhan_trips.raw"}]
+            if schema == "abirkhan_trips"
+            else []
+        ),
+    )
+    for method in ("delete_table", "delete_volume", "delete_schema"):
+        mocker.patch.object(api_client, method, return_value={})
+    return api_client
+
+
+def test_get_schemas_lists_catalogs_concurrently(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    mocker.patch(
+        "brickops.tools.cleanup_tools.get_context",
+        return_value=DbContext(
+            api_token="token",  # noqa: S106
+            api_url="",
+            notebook_path="",
+            username="a.birkhan@vlfk.no",
+        ),
+    )
+    mocker.patch.object(
+        api_client, "get_catalogs", return_value=[{"name": "dev"}, {"name": "test"}]
+    )
+    mocker.patch.object(
+        api_client,
+        "iter_schemas",
+        side_effect=lambda catalog: iter(
+            [
+                {
+                    "name": name,
+                    "full_name": f"{catalog}.{name}",
+                }
+                for name in (
+                    "dev_abirkhan_main_0e7768a7_revenue",
+                    "dev_jdoe_abirkhan_0e7768a7_revenue",
+                    "abirkhan_revenue",
+                )
+            ]
+        ),
+    )
+    assert get_schemas(api_client) == [
+        "dev.dev_abirkhan_main_0e7768a7_revenue",
+        "test.dev_abirkhan_main_0e7768a7_revenue",
+    ]
+
+
+def test_get_jobs_matches_the_username_exactly(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    mocker.patch(
+        "brickops.tools.cleanup_tools.get_context",
+        return_value=DbContext(
+            api_token="token",  # noqa: S106
+            api_url="",
+            notebook_path="",
+            username="ola@vlfk.no",
+        ),
+    )
+    mocker.patch.object(
+        api_client,
+        "iter_jobs",
+        return_value=iter(
+            [
+                {
+                    "job_id": job_id,
+                    "settings": {"name": name, "tags": {"deployment": deployment}},
+                }
+                for job_id, name, deployment in (
+                    (
+                        1,
+                        "transport_taxinyc_dev_ola_main_0e7768a7",
+                        "dev_ola_main_0e7768a7",
+                    ),
+                    (
+                        2,
+                        "transport_taxinyc_dev_kola_main_0e7768a7",
+                        "dev_kola_main_0e7768a7",
+                    ),
+                    (3, "transport_taxinyc_prod", "prod"),
+                )
+            ]
+        ),
+    )
+    assert [job.name for job in get_jobs(api_client)] == [
+        "transport_taxinyc_dev_ola_main_0e7768a7"
+    ]
+
+
+def test_delete_schemas_deletes_views_before_tables_and_schema_last(
+    api_client: ApiClient,
+) -> None:
+    progress: list[CleanupProgress] = []
+    result = delete_schemas(api_client, TABLES, progress=progress.append)
+
+    assert result.failed == {}
+    deleted = result.deleted
+    assert set(deleted) == {
+        "dev.abirkhan_revenue.daily_v",
+        "dev.abirkhan_revenue.daily",
+        "dev.abirkhan_revenue",
+        "dev.abirkhan_trips.trips",
+        "dev.abirkhan_trips.raw",
+        "dev.abirkhan_trips",
+    }
+    assert deleted.index("dev.abirkhan_revenue.daily_v") < deleted.index(
+        "dev.abirkhan_revenue.daily"
+    )
+    assert deleted.index("dev.abirkhan_revenue.daily") < deleted.index(
+        "dev.abirkhan_revenue"
+    )
+    assert deleted.index("dev.abirkhan_trips.raw") < deleted.index("dev.abirkhan_trips")
+    assert [p.deleted for p in progress] == [1, 2, 3, 4, 5, 6]
+    assert progress[-1].total == 6
+
+
+def test_delete_schemas_keeps_schema_when_table_delete_fails(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    def delete_table(full_name: str) -> dict[str, Any]:
+        if full_name == "dev.abirkhan_revenue.daily":
+            raise ApiClientError("in use")
+        return {}
+
+    mocker.patch.object(api_client, "delete_table", side_effect=delete_table)
+    result = delete_schemas(api_client, TABLES)
+
+    assert result.failed == {"dev.abirkhan_revenue.daily": "in use"}
+    assert "dev.abirkhan_revenue" not in result.deleted
+    assert "dev.abirkhan_trips" in result.deleted
+    with pytest.raises(ApiClientError, match="abirkhan_revenue"):
+        delete_schema(api_client, "dev.abirkhan_revenue")
+
+
+def test_delete_schemas_with_warehouse_drops_schema_cascade(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    mocker.patch.object(
+        api_client, "get_warehouse_by_name", return_value={"id": "abc123"}
+    )
+    execute = mocker.patch("brickops.tools.cleanup_tools.execute")
+    result = delete_schemas(api_client, ["dev.abirkhan_revenue"], warehouse="cleanup")
+
+    assert result.deleted == ["dev.abirkhan_revenue"]
+    execute.assert_called_once_with(
+        api_client,
+        "DROP SCHEMA IF EXISTS `dev`.`abirkhan_revenue` CASCADE",
+        warehouse_id="abc123",
+    )
+    api_client.delete_table.assert_not_called()  # type: ignore [attr-defined]
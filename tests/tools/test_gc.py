@@ -0,0 +1,302 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient, ApiClientError
+from brickops.tools.gc import (
+    SECONDS_PER_DAY,
+    Deployment,
+    Resource,
+    RetentionPolicy,
+    classify,
+    collect,
+    parse_deployment,
+)
+
+NOW = 1_750_000_000.0
+OLD = (NOW - 30 * SECONDS_PER_DAY) * 1000
+NEW = (NOW - 1 * SECONDS_PER_DAY) * 1000
+ROOT = "/Shared/brickops/snapshots"
+DEV_FOLDER = f"{ROOT}/transport_taxinyc_dev_abirkhan_feature_aaaaaaaa"
+PROD_FOLDER = f"{ROOT}/transport_taxinyc_prod"
+PIPELINE_FOLDER = f"{ROOT}/transport_taxinyc_prod_dlt"
+PIPELINES = {
+    "p1": {
+        "pipeline_id": "p1",
+        "name": "transport_taxinyc_prod_dlt",
+        "spec": {
+            "libraries": [
+                {"notebook": {"path": f"{PIPELINE_FOLDER}/aaaaaaaaaaaa/trips"}}
+            ]
+        },
+    },
+    "p2": {
+        "pipeline_id": "p2",
+        "name": "transport_taxinyc_dev_abirkhan_feature_aaaaaaaa_dlt",
+        "spec": {"tags": {"deployment": "dev_abirkhan_feature_aaaaaaaa"}},
+        # Recently edited, but created long ago
+        "last_modified": NEW,
+    },
+}
+CREATED_EVENT = {
+    "timestamp": datetime.fromtimestamp(OLD / 1000, tz=timezone.utc).isoformat(),
+    "event_type": "user_action",
+    "details": {"user_action": {"action": "CREATE"}},
+}
+
+
+def test_parse_deployment_from_tag_and_names() -> None:
+    expected = Deployment("dev", "a_birkhan", "branchname", "4c6799ab")
+    assert parse_deployment("dev_a_birkhan_branchname_4c6799ab") == expected
+    assert (
+        parse_deployment("transport_taxinyc_dev_a_birkhan_branchname_4c6799ab_dlt")
+        == expected
+    )
+    assert parse_deployment("dev_a_birkhan_branchname_4c6799ab_revenue") == expected
+    assert parse_deployment("transport_taxinyc_prod") is None
+
+
+def _resource(kind: str, deployment: str, created_ms: float) -> Resource:
+    parsed = parse_deployment(deployment)
+    assert parsed
+    return Resource(kind, deployment, deployment, parsed, created_ms / 1000)
+
+
+def test_classify_applies_commit_branch_and_age_retention() -> None:
+    resources = [
+        _resource("job", "dev_abirkhan_feature_aaaaaaaa", NEW - 1000),
+        _resource("schema", "dev_abirkhan_feature_bbbbbbbb", NEW),
+        _resource("job", "dev_abirkhan_merged_cccccccc", NEW),
+        _resource("job", "test_olduser_main_dddddddd", OLD),
+        _resource("job", "dev_olduser_main_eeeeeeee", NEW),
+    ]
+    deployments, reasons = classify(
+        resources,
+        RetentionPolicy(active_branches={"feature", "main"}),
+        now=NOW,
+    )
+    assert len(deployments) == 5
+    assert {d.gitshortref: reason for d, reason in reasons.items()} == {
+        "aaaaaaaa": "superseded by newer commit",
+        "cccccccc": "branch deleted",
+        "dddddddd": "older than 14 days",
+    }
+
+
+def test_classify_never_deletes_resources_of_unknown_age() -> None:
+    unknown = parse_deployment("dev_abirkhan_feature_aaaaaaaa")
+    assert unknown
+    resources = [
+        _resource("job", "dev_abirkhan_feature_aaaaaaaa", OLD),
+        Resource("dashboard", "d1", "revenue", unknown, None),
+        _resource("job", "dev_abirkhan_feature_bbbbbbbb", OLD),
+    ]
+    _, reasons = classify(resources, RetentionPolicy(active_branches=set()), now=NOW)
+    assert {d.gitshortref for d in reasons} == {"bbbbbbbb"}
+
+
+@pytest.fixture
+def api_client(mocker: pytest_mock.plugin.MockerFixture) -> ApiClient:
+    api_client = ApiClient("https://test.com", "test_token")
+    mocker.patch.object(
+        api_client,
+        "iter_jobs",
+        return_value=[
+            {
+                "job_id": 1,
+                "created_time": OLD,
+                "settings": {
+                    "name": "transport_taxinyc_dev_abirkhan_feature_aaaaaaaa",
+                    "tags": {"deployment": "dev_abirkhan_feature_aaaaaaaa"},
+                },
+            },
+            {
+                "job_id": 2,
+                "created_time": OLD,
+                "settings": {
+                    "name": "transport_taxinyc_prod",
+                    "tasks": [
+                        {
+                            "task_key": "revenue",
+                            "notebook_task": {
+                                "notebook_path": f"{PROD_FOLDER}/bbbbbbbbbbbb/revenue",
+                                "source": "WORKSPACE",
+                            },
+                        }
+                    ],
+                },
+            },
+        ],
+    )
+    folders = {
+        ROOT: [DEV_FOLDER, PROD_FOLDER, PIPELINE_FOLDER],
+        DEV_FOLDER: [f"{DEV_FOLDER}/dddddddddddd"],
+        PROD_FOLDER: [
+            f"{PROD_FOLDER}/{version}"
+            for version in (
+                "aaaaaaaaaaaa",
+                "bbbbbbbbbbbb",
+                "cccccccccccc",
+                "ffffffffffff",
+            )
+        ],
+        PIPELINE_FOLDER: [
+            f"{PIPELINE_FOLDER}/{version}"
+            for version in ("aaaaaaaaaaaa", "eeeeeeeeeeee")
+        ],
+    }
+    mocker.patch.object(
+        api_client,
+        "list_workspace",
+        side_effect=lambda path: [
+            {"path": folder, "object_type": "DIRECTORY"} for folder in folders[path]
+        ],
+    )
+    # ffffffffffff is not in the manifest, so its age is unknown
+    manifests = {
+        DEV_FOLDER: {"versions": {"dddddddddddd": OLD / 1000}},
+        PROD_FOLDER: {
+            "versions": {
+                "aaaaaaaaaaaa": OLD / 1000,
+                "bbbbbbbbbbbb": OLD / 1000 + 3600,
+                "cccccccccccc": NEW / 1000,
+            }
+        },
+        PIPELINE_FOLDER: {
+            "versions": {"aaaaaaaaaaaa": OLD / 1000, "eeeeeeeeeeee": OLD / 1000 + 3600}
+        },
+    }
+
+    def export_workspace(path: str) -> bytes:
+        folder, _ = path.rsplit("/", 1)
+        if folder not in manifests:
+            raise ApiClientError(message="RESOURCE_DOES_NOT_EXIST")
+        return json.dumps(manifests[folder]).encode()
+
+    mocker.patch.object(api_client, "export_workspace", side_effect=export_workspace)
+    mocker.patch.object(
+        api_client,
+        "iter_pipelines",
+        return_value=[
+            {"pipeline_id": "p1", "name": "transport_taxinyc_prod_dlt"},
+            {
+                "pipeline_id": "p2",
+                "name": "transport_taxinyc_dev_abirkhan_feature_aaaaaaaa_dlt",
+            },
+        ],
+    )
+    mocker.patch.object(api_client, "get_pipeline", side_effect=PIPELINES.get)
+    mocker.patch.object(api_client, "first_pipeline_event", return_value=CREATED_EVENT)
+    mocker.patch.object(
+        api_client, "get_catalogs", return_value=[{"name": "transport"}]
+    )
+    mocker.patch.object(
+        api_client,
+        "get_schemas",
+        return_value=[
+            {
+                "name": "dev_abirkhan_feature_aaaaaaaa_revenue",
+                "full_name": "transport.dev_abirkhan_feature_aaaaaaaa_revenue",
+                "created_at": OLD,
+            },
+            {"name": "revenue", "full_name": "transport.revenue", "created_at": OLD},
+        ],
+    )
+    mocker.patch.object(
+        api_client,
+        "get_dashboards",
+        return_value=[
+            {
+                "dashboard_id": "d1",
+                "display_name": "dev_abirkhan_feature_aaaaaaaa_revenue",
+                "create_time": "2025-01-01T00:00:00.000Z",
+            }
+        ],
+    )
+    for method in (
+        "delete_job",
+        "delete_pipeline",
+        "delete_dashboard",
+        "delete_workspace",
+    ):
+        mocker.patch.object(api_client, method, return_value={})
+    return api_client
+
+
+def test_collect_dry_run_only_reports(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    mocker.patch.object(
+        api_client,
+        "get_dashboards",
+        return_value=[
+            {
+                "dashboard_id": "d1",
+                "display_name": "dev_abirkhan_feature_aaaaaaaa_revenue",
+                "create_time": "2025-01-01T00:00:00.000Z",
+            },
+            {"dashboard_id": "d2", "display_name": "dev_jdoe_main_bbbbbbbb_revenue"},
+        ],
+    )
+    report = collect(api_client)
+
+    deployment = Deployment("dev", "abirkhan", "feature", "aaaaaaaa")
+    assert report.reasons == {deployment: "older than 14 days"}
+    assert sorted(r.kind for r in report.stale[deployment]) == [
+        "dashboard",
+        "job",
+        "pipeline",
+        "schema",
+        "snapshot",
+    ]
+    # Version b is used by the prod job, and c is the latest. Version a of the
+    # pipeline is superseded, but still used by the prod pipeline
+    assert report.superseded == [f"{PROD_FOLDER}/aaaaaaaaaaaa"]
+    assert "Would delete 1 stale deployments" in report.summary()
+    unknown = Deployment("dev", "jdoe", "main", "bbbbbbbb")
+    assert list(report.unknown) == [unknown]
+    assert "unknown age): dashboard dev_jdoe_main_bbbbbbbb_revenue" in report.summary()
+    api_client.delete_job.assert_not_called()  # type: ignore [attr-defined]
+
+
+def test_pipeline_without_creation_event_has_unknown_age(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    # The creation event is no longer retained in the event log
+    mocker.patch.object(
+        api_client,
+        "first_pipeline_event",
+        return_value={**CREATED_EVENT, "details": {"flow_progress": {}}},
+    )
+    report = collect(api_client)
+    deployment = Deployment("dev", "abirkhan", "feature", "aaaaaaaa")
+    assert deployment not in report.stale
+    assert deployment in report.unknown
+
+
+def test_collect_deletes_stale_deployments(
+    mocker: pytest_mock.plugin.MockerFixture, api_client: ApiClient
+) -> None:
+    delete_schemas = mocker.patch("brickops.tools.gc.delete_schemas")
+    delete_schemas.return_value.deleted = [
+        "transport.dev_abirkhan_feature_aaaaaaaa_revenue.daily",
+        "transport.dev_abirkhan_feature_aaaaaaaa_revenue",
+    ]
+    delete_schemas.return_value.failed = {}
+
+    report = collect(api_client, dry_run=False)
+
+    api_client.delete_job.assert_called_once_with(1)  # type: ignore [attr-defined]
+    api_client.delete_pipeline.assert_called_once_with("p2")  # type: ignore [attr-defined]
+    api_client.delete_dashboard.assert_called_once_with("d1")  # type: ignore [attr-defined]
+    api_client.delete_workspace.assert_any_call(DEV_FOLDER, recursive=True)  # type: ignore [attr-defined]
+    assert sorted(report.deleted) == [
+        DEV_FOLDER,
+        f"{PROD_FOLDER}/aaaaaaaaaaaa",
+        "dev_abirkhan_feature_aaaaaaaa_revenue",
+        "transport.dev_abirkhan_feature_aaaaaaaa_revenue",
+        "transport_taxinyc_dev_abirkhan_feature_aaaaaaaa",
+        "transport_taxinyc_dev_abirkhan_feature_aaaaaaaa_dlt",
+    ]
@@ -0,0 +1,127 @@
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient
+from brickops.dataops.deploy.job.buildconfig.health import apply_health_rules
+from brickops.tools.rightsizing import (
+    DurationStats,
+    deployed_jobs,
+    duration_stats,
+    health_rules,
+    job_run_stats,
+    recommend_cluster_size,
+    recommend_job_clusters,
+)
+
+JOB = {
+    "job_id": 1,
+    "settings": {
+        "name": "domainfoo_projectfoo_prod",
+        "tags": {"deployment": "prod"},
+        "job_clusters": [
+            {"job_cluster_key": "common-job-cluster", "new_cluster": {"num_workers": 2}}
+        ],
+    },
+}
+
+
+def _run(result_state: str, seconds: int) -> dict[str, Any]:
+    return {
+        "run_id": seconds,
+        "state": {"result_state": result_state},
+        "run_duration": seconds * 1000,
+        "queue_duration": 1000,
+        "setup_duration": 0,
+        "tasks": [
+            {
+                "task_key": "revenue",
+                "job_cluster_key": "common-job-cluster",
+                "execution_duration": (seconds - 10) * 1000,
+                "setup_duration": 10000,
+                "queue_duration": 0,
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def api_client(mocker: pytest_mock.plugin.MockerFixture) -> ApiClient:
+    client = ApiClient("https://test.com", "test_token")
+    mocker.patch.object(
+        client,
+        "get_jobs",
+        return_value=[JOB, {"job_id": 2, "settings": {"name": "manual_job"}}],
+    )
+    mocker.patch.object(
+        client,
+        "list_job_runs",
+        return_value=iter(
+            [_run("SUCCESS", seconds) for seconds in (100, 110, 120, 200)]
+            + [_run("FAILED", 1000)]
+        ),
+    )
+    return client
+
+
+def test_duration_stats_interpolates_percentiles() -> None:
+    stats = duration_stats([10.0, 20.0, 30.0, 40.0, 50.0])
+    assert stats == DurationStats(count=5, p50=30.0, p90=46.0, p95=48.0, max=50.0)
+
+
+def test_duration_stats_of_no_durations_is_zero() -> None:
+    assert duration_stats([]) == DurationStats(0, 0.0, 0.0, 0.0, 0.0)
+
+
+def test_deployed_jobs_only_returns_jobs_with_deployment_tag(
+    api_client: ApiClient,
+) -> None:
+    assert deployed_jobs(api_client) == [JOB]
+    assert deployed_jobs(api_client, deployment="dev_someone") == []
+
+
+def test_deployed_jobs_lists_jobs_with_their_job_clusters(
+    requests_mock: Any,
+) -> None:
+    listing = requests_mock.get(
+        "https://test.com/api/2.2/jobs/list",
+        json={"jobs": [JOB, {"job_id": 2, "settings": {"name": "manual_job"}}]},
+    )
+    client = ApiClient("https://test.com", "test_token")
+    jobs = deployed_jobs(client, deployment="prod")
+    assert listing.last_request.qs["expand_tasks"] == ["true"]
+    assert jobs == [JOB]
+    assert jobs[0]["settings"]["job_clusters"]
+
+
+def test_job_run_stats_skips_failed_runs(api_client: ApiClient) -> None:
+    stats = job_run_stats(api_client, JOB)
+    assert stats.run.count == 4
+    assert stats.run.max == 200.0
+    assert stats.queue.p50 == 1.0
+    assert stats.tasks["revenue"].setup.p50 == 10.0
+
+
+def test_recommend_cluster_size_scales_to_target() -> None:
+    stats = DurationStats(count=10, p50=600.0, p90=800.0, p95=900.0, max=1000.0)
+    result = recommend_cluster_size(stats, num_workers=2, target_duration_seconds=300)
+    assert result.num_workers == 4
+    assert result.autoscale == {"min_workers": 4, "max_workers": 6}
+
+
+def test_recommend_job_clusters_uses_tasks_on_cluster(api_client: ApiClient) -> None:
+    stats = job_run_stats(api_client, JOB)
+    result = recommend_job_clusters(JOB, stats)
+    assert result["common-job-cluster"].num_workers == 2
+
+
+def test_health_rules_are_applied_to_job_and_tasks(api_client: ApiClient) -> None:
+    rules = health_rules(job_run_stats(api_client, JOB), factor=1.0)
+    cfg = apply_health_rules({"tasks": [{"task_key": "revenue"}]}, rules)
+    assert cfg["health"] == {
+        "rules": [
+            {"metric": "RUN_DURATION_SECONDS", "op": "GREATER_THAN", "value": 188}
+        ]
+    }
+    assert cfg["tasks"][0]["health"]["rules"][0]["value"] == 178
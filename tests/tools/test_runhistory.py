@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from brickops.databricks.api import ApiClient
+from brickops.tools.runhistory import (
+    DAY_MS,
+    RunHistory,
+    collect_runs,
+    performance_report,
+    regressions,
+)
+
+NOW = 1_750_000_000.0
+NOW_MS = int(NOW * 1000)
+
+JOBS = [
+    {
+        "job_id": 1,
+        "settings": {"name": "transport_taxinyc_prod", "tags": {"deployment": "prod"}},
+    },
+    {
+        "job_id": 2,
+        "settings": {"name": "sales_revenue_prod", "tags": {"deployment": "prod"}},
+    },
+    {"job_id": 3, "settings": {"name": "adhoc", "tags": {}}},
+]
+
+
+def _run(
+    run_id: int, days_ago: float, seconds: int, state: str = "SUCCESS"
+) -> dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "start_time": NOW_MS - int(days_ago * DAY_MS),
+        "state": {"result_state": state},
+        "run_duration": seconds * 1000,
+        "tasks": [
+            {
+                "task_key": "ingest",
+                "setup_duration": 10_000,
+                "execution_duration": (seconds - 10) * 1000,
+                "cleanup_duration": 0,
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def api_client(mocker: pytest_mock.plugin.MockerFixture) -> ApiClient:
+    client = ApiClient("https://test.com", "test_token")
+    mocker.patch.object(client, "iter_jobs", return_value=iter(JOBS))
+    return client
+
+
+@pytest.fixture
+def history(
+    api_client: ApiClient, mocker: pytest_mock.plugin.MockerFixture
+) -> RunHistory:
+    runs = {
+        1: [_run(13, 1, 200), _run(12, 2, 190), _run(11, 20, 100), _run(10, 21, 110)],
+        2: [_run(21, 1, 50, state="FAILED"), _run(20, 20, 60)],
+    }
+    mocker.patch.object(
+        api_client,
+        "list_job_runs",
+        side_effect=lambda job_id, **_: iter(runs[int(job_id)]),
+    )
+    return collect_runs(api_client)
+
+
+def test_collect_runs_stores_runs_and_tasks_of_deployed_jobs(
+    history: RunHistory,
+) -> None:
+    assert len(history) == 12
+    first = next(history.rows())
+    assert first["job_name"] == "transport_taxinyc_prod"
+    assert first["domain"] == "transport"
+    assert first["project"] == "taxinyc"
+    assert first["task_key"] == ""
+    assert first["duration"] == 200.0
+    task = list(history.rows())[1]
+    assert task["task_key"] == "ingest"
+    assert (task["setup"], task["execution"]) == (10.0, 190.0)
+    assert set(history.column("job_id")) == {1, 2}
+
+
+def test_collect_runs_rescans_lookback_for_late_finishing_runs(
+    api_client: ApiClient, mocker: pytest_mock.plugin.MockerFixture
+) -> None:
+    history = RunHistory()
+    history.append(
+        {
+            "job_id": 1,
+            "run_id": 5,
+            "start_time": NOW_MS - DAY_MS,
+            "job_name": "transport_taxinyc_prod",
+            "domain": "transport",
+            "project": "taxinyc",
+            "task_key": "",
+            "result_state": "SUCCESS",
+            "queue": 0,
+            "setup": 0,
+            "execution": 0,
+            "cleanup": 0,
+            "duration": 100,
+        }
+    )
+    # Run 4 started before run 5, but only finished after it was collected
+    runs = {1: [_run(6, 0.5, 100), _run(5, 1, 100), _run(4, 1.5, 300)], 2: []}
+    list_runs = mocker.patch.object(
+        api_client,
+        "list_job_runs",
+        side_effect=lambda job_id, **_: iter(runs[int(job_id)]),
+    )
+    collect_runs(api_client, history)
+    assert list_runs.call_args_list == [
+        mocker.call(1, start_time_from=NOW_MS - 3 * DAY_MS),
+        mocker.call(2, start_time_from=None),
+    ]
+    run_ids = [row["run_id"] for row in history.rows() if row["task_key"] == ""]
+    assert run_ids == [5, 6, 4]
+
+
+def test_history_roundtrips_through_file(history: RunHistory, tmp_path: Path) -> None:
+    path = tmp_path / "runs.bin"
+    history.save(path)
+    loaded = RunHistory.load(path)
+    assert list(loaded.rows()) == list(history.rows())
+
+
+def test_performance_report_groups_by_domain_and_project(history: RunHistory) -> None:
+    report = performance_report(history, now=NOW)
+    assert [row.group for row in report] == [
+        {"domain": "transport", "project": "taxinyc"},
+        {"domain": "sales", "project": "revenue"},
+    ]
+    taxinyc, revenue = report
+    assert taxinyc.stats.count == 4
+    assert taxinyc.recent.p50 == 195.0
+    assert taxinyc.baseline.p50 == 105.0
+    assert taxinyc.change == pytest.approx(195 / 105 - 1)
+    # Failed runs are left out, so there is nothing recent to compare
+    assert revenue.stats.count == 1
+    assert revenue.change is None
+    assert regressions(report) == [taxinyc]
+
+
+def test_performance_report_for_tasks(history: RunHistory) -> None:
+    report = performance_report(
+        history, by=("job_name",), metric="execution", tasks=True, now=NOW
+    )
+    assert [row.group for row in report] == [
+        {"job_name": "transport_taxinyc_prod", "task_key": "ingest"},
+        {"job_name": "sales_revenue_prod", "task_key": "ingest"},
+    ]
+    assert report[0].stats.max == 190.0
+
+
+def test_performance_report_rejects_unknown_metric(history: RunHistory) -> None:
+    with pytest.raises(ValueError, match="metric"):
+        performance_report(history, metric="job_name")
@@ -1,6 +1,11 @@
 # Databricks notebook source
 from pathlib import Path
 
+# Comma separated workspaces from .brickopscfg/config.yml to deploy to,
+# all concurrently. Empty deploys to this workspace only.
+dbutils.widgets.text("brickops_targets", "")
+targets = dbutils.widgets.get("brickops_targets")
+
 deploy_notebooks = [
     str(path)
     for path in Path("/Workspace/Repos/Production/dp-notebooks/domains").glob(
@@ -14,4 +19,6 @@ display(deploy_notebooks)
 # COMMAND ----------
 
 for notebook in deploy_notebooks:
-    dbutils.notebook.run(str(notebook), timeout_seconds=180)
+    dbutils.notebook.run(
+        str(notebook), timeout_seconds=180, arguments={"brickops_targets": targets}
+    )